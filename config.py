@@ -6,12 +6,39 @@ load_dotenv()
 API_KEY    = os.getenv("API_KEY")
 API_SECRET = os.getenv("API_SECRET")
 SYMBOL = "PF_ETHUSD"
+# Contrats tradés par le même processus (ex: SYMBOLS="PF_ETHUSD,PF_XBTUSD,PF_SOLUSD")
+SYMBOLS = [s.strip() for s in os.getenv("SYMBOLS", SYMBOL).split(",") if s.strip()]
+# Départs des symboles étalés sur cette fenêtre (s) à chaque clôture ; au plus N traités à la fois
+SYMBOL_STAGGER = 2.0
+MAX_CONCURRENT_SYMBOLS = 8
+# Processus workers entre lesquels répartir les symboles (0 = tout dans ce processus)
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))
+SHARD_MP_CONTEXT = "spawn"
 INVESTMENT_USD = 12
 LEVERAGE = 8
 TIMEFRAMES = { 'M15': '15m', 'M5': '5m' }
 LOOKBACK = 100
 TICK_SIZE = 0.5
-POLL_INTERVAL = 10  # en secondes
+# SL / TP de la position tenus en nombre entier de ticks du marché (comparaisons exactes)
+TICK_PRICES = False
+# Réveil juste après chaque clôture M5/M15 (heure serveur), puis re-demande tant que
+# la bougie clôturée n'est pas publiée
+CANDLE_CLOSE_GRACE = 0.5  # en secondes après la clôture
+POLL_INTERVAL = 1  # en secondes entre deux demandes après une clôture
+CANDLE_MAX_WAIT = 30  # en secondes d'attente max de la bougie clôturée
+# Réconciliation du registre local d'ordres avec fetch_open_orders (secondes ; None = à chaque tick).
+# check_exit réconcilie à chaque tick quel que soit l'intervalle : SL / TP disparus vus sans délai
+ORDER_RECONCILE_INTERVAL: float | None = 60
+# Stockage local des bougies (colonnaire, memory-mappé) ; None pour désactiver
+CANDLE_STORE_DIR: str | None = os.getenv("CANDLE_STORE_DIR", "candles")
+# Trades enregistrés pour le rejeu tick par tick (`python -m simulation.replay`)
+TICK_STORE_DIR: str = os.getenv("TICK_STORE_DIR", "ticks")
+# Cache disque des métadonnées de marchés (évite load_markets au démarrage) ; None pour désactiver
+MARKET_CACHE_PATH: str | None = os.getenv("MARKET_CACHE_PATH", "cache/markets.json")
+MARKET_CACHE_TTL = 24 * 3600  # en secondes
+# Seau à jetons partagé par toutes les requêtes (unités de coût Kraken Futures : 500 / 10 s)
+REQUEST_RATE = 50.0   # unités rechargées par seconde
+REQUEST_BURST = 500   # capacité du seau
 
 
 # Sélection de stratégie au runtime
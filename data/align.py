@@ -0,0 +1,113 @@
+# path: data/align.py
+from collections import deque
+from typing import Any, Deque, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """Durée d'une timeframe CCXT ('5m', '15m', '1h', '1d'...) en millisecondes."""
+    units = {"s": 1_000, "m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+    try:
+        return int(timeframe[:-1]) * units[timeframe[-1]]
+    except (KeyError, ValueError):
+        raise ValueError(f"timeframe invalide: {timeframe!r}") from None
+
+
+def to_ms(times: Any) -> np.ndarray:
+    """Ouvertures de bougies (datetime64, Timestamp ou entiers ms) -> tableau int64 ms."""
+    if isinstance(times, pd.Series):
+        times = times.to_numpy()
+    arr = np.atleast_1d(np.asarray(times))
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ms]").astype("int64")
+    if arr.dtype == object:
+        return np.array([pd.Timestamp(t).value // 10**6 if not isinstance(t, (int, np.integer)) else int(t) for t in arr], dtype="int64")
+    return arr.astype("int64")
+
+
+def asof_indices(higher_times: Any, lower_times: Any, higher_tf: str, lower_tf: str) -> np.ndarray:
+    """
+    Jointure as-of vectorisée sans look-ahead.
+
+    Pour chaque bougie de la timeframe basse, index de la dernière bougie de
+    la timeframe haute clôturée à sa clôture (ouverture haute + durée haute
+    <= ouverture basse + durée basse), ou -1 s'il n'y en a pas encore.
+    Les deux séries d'ouvertures doivent être triées.
+    """
+    hi_close = to_ms(higher_times) + timeframe_ms(higher_tf)
+    lo_close = to_ms(lower_times) + timeframe_ms(lower_tf)
+    return np.searchsorted(hi_close, lo_close, side="right") - 1
+
+
+def align_frames(
+    higher: pd.DataFrame,
+    lower: pd.DataFrame,
+    higher_tf: str,
+    lower_tf: str,
+    columns: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Colonnes de `higher` ramenées sur les lignes de `lower` (NaN tant
+    qu'aucune bougie haute n'est clôturée). Index identique à `lower`.
+    """
+    idx = asof_indices(higher["time"], lower["time"], higher_tf, lower_tf)
+    cols = [c for c in (columns or higher.columns) if c != "time"]
+    ok = idx >= 0
+    out = higher[cols].iloc[np.where(ok, idx, 0)].reset_index(drop=True)
+    out = out.where(pd.Series(ok), other=np.nan) if not ok.all() else out
+    out.index = lower.index
+    return out
+
+
+def asof_frame(higher: pd.DataFrame, lower_time: Any, higher_tf: str, lower_tf: str) -> pd.DataFrame:
+    """Lignes de `higher` clôturées à la clôture de la bougie basse `lower_time`."""
+    k = int(asof_indices(higher["time"], lower_time, higher_tf, lower_tf)[0])
+    return higher.iloc[: k + 1]
+
+
+class AsOfAligner:
+    """
+    Jointure as-of incrémentale pour le live.
+
+    Les ouvertures des bougies hautes clôturées sont poussées au fil de l'eau
+    (`push`), puis chaque nouvelle bougie basse est associée en O(1) amorti à
+    la dernière bougie haute clôturée à sa clôture (`asof`). Les requêtes
+    sont supposées croissantes ; une requête antérieure repart d'une
+    recherche binaire.
+    """
+
+    def __init__(self, higher_tf: str, lower_tf: str, maxlen: int = 1000) -> None:
+        self.higher_ms = timeframe_ms(higher_tf)
+        self.lower_ms = timeframe_ms(lower_tf)
+        self._opens: Deque[int] = deque(maxlen=maxlen)
+        self._pos = -1  # index courant dans _opens
+        self._last_query: Optional[int] = None
+
+    def push(self, higher_open: Any) -> None:
+        """Ajoute une bougie haute clôturée (ignorée si déjà connue)."""
+        t = int(to_ms(higher_open)[0])
+        if self._opens and t <= self._opens[-1]:
+            return
+        if len(self._opens) == self._opens.maxlen:
+            self._pos -= 1  # l'élément le plus ancien va sortir
+        self._opens.append(t)
+
+    def extend(self, higher_opens: Any) -> None:
+        for t in to_ms(higher_opens):
+            self.push(int(t))
+
+    def asof(self, lower_open: Any) -> Optional[int]:
+        """Ouverture (ms) de la bougie haute à utiliser pour la bougie basse `lower_open`, ou None."""
+        t = int(to_ms(lower_open)[0])
+        limit = t + self.lower_ms - self.higher_ms  # ouverture haute max admissible
+        if self._last_query is not None and t < self._last_query:
+            self._pos = int(np.searchsorted(np.fromiter(self._opens, dtype="int64"), limit, side="right")) - 1
+        self._last_query = t
+        self._pos = max(self._pos, -1)
+        while self._pos + 1 < len(self._opens) and self._opens[self._pos + 1] <= limit:
+            self._pos += 1
+        while self._pos >= 0 and self._opens[self._pos] > limit:
+            self._pos -= 1
+        return self._opens[self._pos] if self._pos >= 0 else None
@@ -0,0 +1,139 @@
+# path: data/clock.py
+import email.utils
+import logging
+import time
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CandleClock:
+    """
+    Horloge des clôtures de bougies, calée sur l'heure du serveur.
+
+    Au lieu de dormir un intervalle fixe puis de redemander les bougies pour
+    savoir si l'une s'est clôturée, `wait` dort jusqu'à la prochaine clôture
+    (tous timeframes confondus) plus `grace`, puis `poll_until` redemande à
+    `poll_interval` jusqu'à ce que la bougie attendue soit publiée.
+
+    L'écart d'horloge local/serveur est estimé par `sync` : `fetch_time` si
+    l'exchange le supporte (échantillon au plus petit aller-retour), sinon
+    l'en-tête HTTP `Date` de la dernière réponse (précision à la seconde).
+    """
+
+    def __init__(
+        self,
+        exchange: Any,
+        timeframes: Iterable[str],
+        grace: float = 0.5,
+        poll_interval: float = 1.0,
+        max_wait: float = 30.0,
+        resync_interval: float = 3600.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.exchange = exchange
+        self.tf_ms = {tf: int(exchange.parse_timeframe(tf)) * 1000 for tf in timeframes}
+        if not self.tf_ms:
+            raise ValueError("at least one timeframe is required")
+        self.grace = grace
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.resync_interval = resync_interval
+        self._sleep = sleep
+        self.offset_ms = 0.0  # heure serveur - heure locale
+        self._synced_at: Optional[float] = None
+        self.closed: List[str] = []  # timeframes clôturés au dernier réveil
+
+    # --- heure serveur ---
+    def _local_ms(self) -> float:
+        return float(self.exchange.milliseconds())
+
+    def now_ms(self) -> int:
+        """Heure serveur estimée (ms)."""
+        return int(self._local_ms() + self.offset_ms)
+
+    def sync(self, samples: int = 3) -> float:
+        """Ré-estime l'écart d'horloge ; garde l'estimation précédente en cas d'échec."""
+        self._synced_at = time.monotonic()
+        try:
+            if (getattr(self.exchange, "has", None) or {}).get("fetchTime"):
+                best: Optional[Tuple[float, float]] = None  # (aller-retour, écart) le plus court
+                for _ in range(max(1, samples)):
+                    t0 = self._local_ms()
+                    server = float(self.exchange.fetch_time())
+                    t1 = self._local_ms()
+                    if best is None or t1 - t0 < best[0]:
+                        best = (t1 - t0, server - (t0 + t1) / 2)
+                if best is not None:
+                    self.offset_ms = best[1]
+            else:
+                date = (getattr(self.exchange, "last_response_headers", None) or {}).get("Date")
+                if date:
+                    server = email.utils.parsedate_to_datetime(date).timestamp() * 1000 + 500
+                    self.offset_ms = server - self._local_ms()
+        except Exception as e:
+            logger.warning(f"Estimation de l'heure serveur impossible: {e}")
+        logger.debug("Écart d'horloge serveur: %+.0f ms", self.offset_ms)
+        return self.offset_ms
+
+    # --- clôtures ---
+    def next_close(self, timeframe: str, now_ms: Optional[int] = None) -> int:
+        """Heure (ms) de la prochaine clôture de `timeframe` strictement après `now_ms`."""
+        tf = self.tf_ms[timeframe]
+        now = self.now_ms() if now_ms is None else now_ms
+        return (now // tf + 1) * tf
+
+    def last_closed_open(self, timeframe: str, now_ms: Optional[int] = None) -> int:
+        """Ouverture (ms) de la dernière bougie de `timeframe` clôturée à `now_ms`."""
+        tf = self.tf_ms[timeframe]
+        now = self.now_ms() if now_ms is None else now_ms
+        return (now // tf - 1) * tf
+
+    def wait(self) -> List[str]:
+        """
+        Dort jusqu'à la prochaine clôture + `grace`.
+
+        Returns:
+            Timeframes clôturés à ce réveil (aussi dans `self.closed`).
+        """
+        if self._synced_at is None or time.monotonic() - self._synced_at >= self.resync_interval:
+            self.sync()
+        now = self.now_ms()
+        target = min(self.next_close(tf, now) for tf in self.tf_ms)
+        self._sleep(max(0.0, (target - now) / 1000 + self.grace))
+        self.closed = [tf for tf, ms in self.tf_ms.items() if target % ms == 0]
+        return self.closed
+
+    def poll_until(self, fetch: Callable[[], int], ready: Callable[[], bool]) -> int:
+        """
+        Appelle `fetch` jusqu'à ce que `ready()` ou `max_wait` écoulé.
+
+        Returns:
+            Somme des valeurs renvoyées par `fetch` (bougies ajoutées).
+        """
+        added = fetch()
+        waited = 0.0
+        while not ready() and waited < self.max_wait:
+            self._sleep(self.poll_interval)
+            waited += self.poll_interval
+            added += fetch()
+        if not ready():
+            logger.warning("Bougie clôturée non publiée après %.0f s", waited)
+        return added
+
+    def poll_closed(self, feed: Any, symbol: str, timeframe: str) -> int:
+        """
+        Nouvelles bougies clôturées de `timeframe` dans `feed` (`CandleFeed`).
+
+        Aucune requête si la dernière bougie clôturée attendue est déjà là ;
+        sinon re-demande jusqu'à sa publication.
+        """
+        expected = self.last_closed_open(timeframe)
+
+        def ready() -> bool:
+            last = feed.last_closed(symbol, timeframe)
+            return last is not None and last >= expected
+
+        if ready():
+            return 0
+        return self.poll_until(lambda: feed.poll(symbol, timeframe), ready)
@@ -0,0 +1,140 @@
+# path: data/feed.py
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from data.fetcher import OHLCV_COLUMNS, fetch_ohlcv_since, ohlcv_to_frame
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+
+
+class _Window:
+    """Fenêtre bornée de bougies clôturées + bougie en formation éventuelle."""
+
+    def __init__(self, tf_ms: int, maxlen: int) -> None:
+        self.tf_ms = tf_ms
+        self.rows: Deque[List[Any]] = deque(maxlen=maxlen)
+        self.partial: Optional[List[Any]] = None
+        self.cursor: Optional[int] = None  # ouverture (ms) de la dernière bougie clôturée
+        self.frame: Optional[pd.DataFrame] = None  # cache invalidé à chaque ajout
+
+
+class CandleFeed:
+    """
+    Flux OHLCV incrémental par couple (symbole, timeframe).
+
+    Au lieu de refetcher `LOOKBACK` bougies à chaque tick, le flux mémorise
+    l'ouverture de la dernière bougie clôturée (le curseur) et ne demande que
+    les bougies postérieures. Seules les bougies clôturées entrent dans la
+    fenêtre bornée ; la bougie en cours est exposée à part via `partial()`.
+    """
+
+    def __init__(
+        self,
+        exchange: Any,
+        window: int = 100,
+        store: Optional[Any] = None,
+        clock: Optional[Callable[[], int]] = None,
+    ) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.exchange = exchange
+        self.window = window
+        self.store = store  # CandleStore optionnel : écriture au fil de l'eau + reprise
+        # heure (ms) qui décide qu'une bougie est clôturée ; heure serveur si fournie (CandleClock.now_ms)
+        self.clock = clock
+        self._windows: Dict[Key, _Window] = {}
+
+    def _now_ms(self) -> int:
+        return self.clock() if self.clock is not None else self.exchange.milliseconds()
+
+    def _tf_ms(self, timeframe: str) -> int:
+        return int(self.exchange.parse_timeframe(timeframe)) * 1000
+
+    def _ingest(self, w: _Window, raw: List[List[Any]], now_ms: int) -> int:
+        """Ajoute les bougies clôturées postérieures au curseur ; retourne leur nombre."""
+        added = 0
+        partial = None
+        for row in sorted(raw, key=lambda r: r[0]):
+            ts = int(row[0])
+            if w.cursor is not None and ts <= w.cursor:
+                continue  # déjà en fenêtre (le `since` est inclusif)
+            if ts + w.tf_ms > now_ms:
+                partial = list(row)  # bougie encore en formation
+                continue
+            w.rows.append(list(row))
+            w.cursor = ts
+            added += 1
+        w.partial = partial
+        if added:
+            w.frame = None
+        return added
+
+    def bootstrap(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        """Charge l'historique initial (une seule requête `window`) et retourne la fenêtre."""
+        w = _Window(self._tf_ms(timeframe), self.window)
+        self._windows[(symbol, timeframe)] = w
+        now_ms = int(self._now_ms())
+        # +1 : la dernière ligne renvoyée est en général la bougie en formation
+        since = now_ms - self.window * w.tf_ms
+        if self.store is not None:
+            # reprise depuis le disque : on ne télécharge que ce qui manque
+            self.store.backfill(self.exchange, symbol, timeframe, start=since)
+            cols = self.store.read(symbol, timeframe, start=since - since % w.tf_ms)
+            self._ingest(w, [list(r) for r in zip(*(cols[c].tolist() for c in OHLCV_COLUMNS))], now_ms)
+        else:
+            raw = fetch_ohlcv_since(self.exchange, symbol, timeframe, since, self.window + 1)
+            self._ingest(w, raw or [], now_ms)
+        logger.debug("Feed %s %s bootstrapped with %d candles", symbol, timeframe, len(w.rows))
+        return self.frame(symbol, timeframe)
+
+    def poll(self, symbol: str, timeframe: str) -> int:
+        """
+        Récupère uniquement les bougies depuis le curseur.
+
+        Returns:
+            Nombre de nouvelles bougies clôturées ajoutées à la fenêtre (0 le plus souvent).
+        """
+        w = self._windows.get((symbol, timeframe))
+        if w is None or w.cursor is None:
+            return len(self.bootstrap(symbol, timeframe))
+        now_ms = int(self._now_ms())
+        # curseur (inclusif) + bougies manquées + bougie en formation, borné par la fenêtre
+        missed = max(0, (now_ms - w.cursor) // w.tf_ms)
+        if missed <= self.window:
+            since = w.cursor
+        else:
+            since = now_ms - self.window * w.tf_ms
+        limit = int(min(missed, self.window) + 2)
+        raw = fetch_ohlcv_since(self.exchange, symbol, timeframe, since, limit, store=self.store)
+        added = self._ingest(w, raw or [], now_ms)
+        if added:
+            logger.debug("Feed %s %s: +%d closed candle(s)", symbol, timeframe, added)
+        return added
+
+    def frame(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        """Fenêtre des bougies clôturées au format de `fetch_ohlcv` (mise en cache)."""
+        w = self._windows[(symbol, timeframe)]
+        if w.frame is None:
+            w.frame = ohlcv_to_frame(list(w.rows))
+        return w.frame
+
+    def rows(self, symbol: str, timeframe: str, n: Optional[int] = None) -> List[List[Any]]:
+        """Lignes brutes des `n` dernières bougies clôturées (toutes si None)."""
+        rows = self._windows[(symbol, timeframe)].rows
+        if n is None or n >= len(rows):
+            return list(rows)
+        return list(rows)[len(rows) - n:]
+
+    def partial(self, symbol: str, timeframe: str) -> Optional[List[Any]]:
+        """Bougie en formation vue lors du dernier appel (ligne brute CCXT) ou None."""
+        return self._windows[(symbol, timeframe)].partial
+
+    def last_closed(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Ouverture (ms) de la dernière bougie clôturée connue pour ce couple."""
+        w = self._windows.get((symbol, timeframe))
+        return w.cursor if w else None
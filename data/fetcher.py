@@ -1,36 +1,103 @@
 # data/fetcher.py
+import weakref
+from typing import Any, Dict, Tuple
+
 import ccxt
 import pandas as pd
 from config import API_KEY, API_SECRET, SYMBOL
+from execution.scheduler import ScheduledExchange
+
+OHLCV_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+# index id -> symbole par exchange, avec le catalogue indexé et sa taille : reconstruit
+# si le catalogue de marchés change
+_SYMBOL_INDEX: weakref.WeakKeyDictionary[Any, Tuple[Dict[str, Any], int, Dict[str, str]]] = weakref.WeakKeyDictionary()
+
+
+def create_exchange(market_cache=None, scheduler=None):
+    """
+    Client Kraken Futures avec ses marchés chargés.
 
-def create_exchange():
+    Si `market_cache` (`data.markets.MarketCache`) est fourni, le catalogue
+    est lu depuis le disque tant qu'il est frais au lieu d'être téléchargé.
+    Si `scheduler` (`execution.scheduler.RequestScheduler`) est fourni, le
+    client est enveloppé pour que chaque appel réseau passe par lui, à la
+    place de la limitation FIFO de CCXT.
+    """
     ex = ccxt.krakenfutures({
         'apiKey': API_KEY,
         'secret': API_SECRET,
-        'enableRateLimit': True,
+        'enableRateLimit': scheduler is None,
     })
-    ex.load_markets()
+    if scheduler is not None:
+        ex = ScheduledExchange(ex, scheduler)
+    if market_cache is not None:
+        market_cache.apply(ex)
+    else:
+        ex.load_markets()
     return ex
 
 
+def _symbol_index(exchange):
+    markets = exchange.markets
+    try:
+        cached = _SYMBOL_INDEX.get(exchange)
+    except TypeError:  # exchange non référençable faiblement : pas d'index
+        cached = None
+    if cached is not None and cached[0] is markets and cached[1] == len(markets):
+        return cached[2]
+    index: Dict[str, str] = {}
+    for s, m in markets.items():
+        index.setdefault(m.get('id'), s)
+    try:
+        _SYMBOL_INDEX[exchange] = (markets, len(markets), index)
+    except TypeError:
+        pass
+    return index
+
+
 def resolve_symbol(exchange, symbol_id):
     """
     Trouve le ticker CCXT correspondant à un ID interne (p.ex. "PF_ETHUSD").
     Raise ValueError si introuvable.
     """
-    symbol = next(
-        (s for s, m in exchange.markets.items()
-         if m.get('id') == symbol_id),
-        None
-    )
+    symbol = _symbol_index(exchange).get(symbol_id)
     if symbol is None:
         raise ValueError(f"Symbole CCXT introuvable pour ID '{symbol_id}'")
     return symbol
 
 
-def fetch_ohlcv(exchange, symbol, timeframe, lookback):
+def ohlcv_to_frame(raw):
+    """Convertit des lignes OHLCV brutes CCXT ([ms, o, h, l, c, v]) en DataFrame."""
+    df = pd.DataFrame(raw, columns=OHLCV_COLUMNS)
+    df['time'] = pd.to_datetime(df['time'], unit='ms')
+    return df
+
+
+def _write_through(store, exchange, symbol, timeframe, raw):
+    """Persiste les bougies clôturées de `raw` dans le `CandleStore` fourni."""
+    tf_ms = exchange.parse_timeframe(timeframe) * 1000
+    now = exchange.milliseconds()
+    store.append(symbol, timeframe, [r for r in raw if r[0] + tf_ms <= now])
+
+
+def fetch_ohlcv_since(exchange, symbol, timeframe, since, limit=None, store=None):
+    """
+    Récupère les bougies brutes dont l'ouverture est >= `since` (ms).
+
+    Contrairement à `fetch_ohlcv`, ne construit pas de DataFrame : utilisé par
+    les flux incrémentaux qui n'ont besoin que de quelques lignes par tick.
+    Si `store` est fourni, les bougies clôturées y sont écrites au passage.
+    """
+    raw = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+    if store is not None and raw:
+        _write_through(store, exchange, symbol, timeframe, raw)
+    return raw
+
+
+def fetch_ohlcv(exchange, symbol, timeframe, lookback, store=None):
     since = exchange.milliseconds() - lookback * exchange.parse_timeframe(timeframe) * 1000
     raw = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=lookback)
-    df = pd.DataFrame(raw, columns=["time","open","high","low","close","volume"])
-    df['time'] = pd.to_datetime(df['time'], unit='ms')
-    return df
\ No newline at end of file
+    if store is not None and raw:
+        _write_through(store, exchange, symbol, timeframe, raw)
+    return ohlcv_to_frame(raw)
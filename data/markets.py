@@ -0,0 +1,120 @@
+# path: data/markets.py
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def market_tick_size(market: Dict[str, Any]) -> Optional[float]:
+    """
+    Tick size d'un marché CCXT : tickSize explicite, sinon précision décimale
+    du prix, sinon pas de prix des limites ; None si rien n'est exploitable.
+    """
+    tick = (market.get("info") or {}).get("tickSize") or market.get("tickSize")
+    if tick is not None:
+        return float(tick)
+    prec = (market.get("precision") or {}).get("price")
+    if isinstance(prec, int):
+        return 10 ** (-prec)
+    step = ((market.get("limits") or {}).get("price") or {}).get("step")
+    if step is not None:
+        return float(step)
+    return None
+
+
+@dataclass(frozen=True)
+class MarketMeta:
+    symbol: str
+    id: str
+    tick_size: Optional[float]
+    amount_precision: Optional[float]
+    limits: Dict[str, Any] = field(default_factory=dict)
+
+
+class MarketCache:
+    """
+    Métadonnées de marchés persistées sur disque avec une durée de validité.
+
+    Au démarrage, `apply` injecte le catalogue en cache dans le client CCXT
+    (`set_markets`) s'il a moins de `ttl` secondes, sinon le télécharge
+    (`load_markets`) et le réécrit. Les index id -> symbole et symbole ->
+    `MarketMeta` (tick, précision de quantité, limites) sont construits une
+    fois : lectures O(1) sur le chemin chaud.
+    """
+
+    def __init__(self, path: str, ttl: float = 86_400.0) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._by_id: Dict[str, str] = {}
+        self._meta: Dict[str, MarketMeta] = {}
+
+    # --- disque ---
+    def read(self) -> Optional[Dict[str, Any]]:
+        """Contenu du cache ({'saved_at', 'markets', 'currencies'}) s'il est frais, sinon None."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        age = time.time() - float(payload.get("saved_at", 0))
+        if not payload.get("markets") or age > self.ttl:
+            return None
+        return payload
+
+    def write(self, markets: Dict[str, Any], currencies: Optional[Dict[str, Any]] = None) -> None:
+        """Écriture atomique (fichier temporaire puis renommage)."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "markets": markets, "currencies": currencies or {}}, f, default=str)
+        os.replace(tmp, self.path)
+
+    # --- client ---
+    def apply(self, exchange: Any) -> bool:
+        """
+        Charge les marchés du client, depuis le cache si possible.
+
+        Returns:
+            True si le cache a servi, False si les marchés ont été téléchargés.
+        """
+        payload = self.read()
+        if payload is not None:
+            exchange.set_markets(payload["markets"], payload.get("currencies") or None)
+            self.index(exchange.markets)
+            logger.info("Marchés chargés depuis le cache %s (%d)", self.path, len(self._meta))
+            return True
+        exchange.load_markets()
+        self.index(exchange.markets)
+        try:
+            self.write(exchange.markets, getattr(exchange, "currencies", None))
+        except OSError as e:
+            logger.warning(f"Écriture du cache de marchés impossible: {e}")
+        return False
+
+    # --- index ---
+    def index(self, markets: Dict[str, Any]) -> None:
+        self._by_id = {}
+        self._meta = {}
+        for symbol, m in markets.items():
+            self._by_id.setdefault(m.get("id"), symbol)
+            self._meta[symbol] = MarketMeta(
+                symbol=symbol,
+                id=m.get("id"),
+                tick_size=market_tick_size(m),
+                amount_precision=(m.get("precision") or {}).get("amount"),
+                limits=m.get("limits") or {},
+            )
+
+    def symbol_for(self, market_id: str) -> Optional[str]:
+        return self._by_id.get(market_id)
+
+    def meta(self, symbol: str) -> Optional[MarketMeta]:
+        return self._meta.get(symbol)
+
+    def tick_size(self, symbol: str) -> Optional[float]:
+        meta = self._meta.get(symbol)
+        return meta.tick_size if meta else None
@@ -0,0 +1,156 @@
+# path: data/shm_ring.py
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Tuple
+
+import ccxt
+import numpy as np
+import pandas as pd
+from numpy.typing import ArrayLike
+
+from data.feed import CandleFeed, _Window
+
+# ordre des colonnes d'une ligne (celui de CCXT / OHLCV_COLUMNS)
+ROW_WIDTH = 6
+_HEADER = 2  # [seq, count] en int64
+
+
+class CandleRing:
+    """
+    Tampon circulaire de bougies OHLCV en mémoire partagée.
+
+    Un seul écrivain (le superviseur) publie les bougies clôturées ; les
+    lecteurs (processus workers) s'y attachent par nom et lisent sans copie
+    ni sérialisation. L'en-tête porte un compteur de séquence (impair pendant
+    une écriture) et le nombre total de lignes écrites depuis la création :
+    un lecteur qui retient ce nombre sait ce qui est nouveau pour lui.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, owner: bool) -> None:
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+        self._header = np.ndarray((_HEADER,), dtype=np.int64, buffer=shm.buf)
+        self._rows = np.ndarray((capacity, ROW_WIDTH), dtype=np.float64, buffer=shm.buf, offset=_HEADER * 8)
+
+    @classmethod
+    def create(cls, capacity: int, name: Optional[str] = None) -> "CandleRing":
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        size = _HEADER * 8 + capacity * ROW_WIDTH * 8
+        ring = cls(shared_memory.SharedMemory(name=name, create=True, size=size), capacity, owner=True)
+        ring._header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, capacity: int, untrack: bool = True) -> "CandleRing":
+        """
+        `untrack` : Python < 3.13 enregistre le segment auprès du resource_tracker
+        du lecteur, qui le détruirait à sa sortie ; seul le créateur en est
+        responsable. À False pour un processus enfant du créateur (fork comme
+        spawn), qui partage son tracker.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            # le tracker connaît le nom POSIX du segment, barre initiale comprise
+            resource_tracker.unregister("/" + shm.name if os.name == "posix" else shm.name, "shared_memory")
+        return cls(shm, capacity, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def count(self) -> int:
+        """Nombre total de lignes écrites depuis la création."""
+        return int(self._header[1])
+
+    # --- écriture (un seul écrivain) ---
+    def append(self, rows: ArrayLike) -> int:
+        """Ajoute des lignes [ms, o, h, l, c, v] ; retourne le nouveau `count`."""
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, ROW_WIDTH)
+        if len(data) > self.capacity:
+            data = data[-self.capacity:]
+        n = len(data)
+        if not n:
+            return self.count
+        start = self.count
+        self._header[0] += 1  # écriture en cours
+        pos = start % self.capacity
+        first = min(n, self.capacity - pos)
+        self._rows[pos:pos + first] = data[:first]
+        self._rows[:n - first] = data[first:]
+        self._header[1] = start + n
+        self._header[0] += 1
+        return start + n
+
+    # --- lecture ---
+    def read(self, since: int, limit: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        """
+        Lignes d'indice global >= `since` (les `limit` dernières au plus), et
+        le `count` auquel la lecture correspond.
+
+        Vue directe sur la mémoire partagée si la plage est contiguë, copie
+        sinon ; les lignes déjà écrasées par le tour suivant sont perdues.
+        """
+        while True:
+            seq = int(self._header[0])
+            if seq % 2:
+                time.sleep(0)  # écriture en cours : on cède la main à l'écrivain
+                continue
+            count = int(self._header[1])
+            lo = max(since, count - self.capacity, 0)
+            if limit is not None:
+                lo = max(lo, count - limit)
+            if lo >= count:
+                out = self._rows[:0]
+            else:
+                a, b = lo % self.capacity, (count - 1) % self.capacity + 1
+                out = self._rows[a:b] if a < b else np.concatenate((self._rows[a:], self._rows[:b]))
+            if int(self._header[0]) == seq:
+                return out, count
+
+    def close(self) -> None:
+        # les vues numpy retiennent le tampon : elles doivent être lâchées avant
+        del self._header, self._rows
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingFeed(CandleFeed):
+    """
+    `CandleFeed` alimenté par des `CandleRing` au lieu de l'exchange : même
+    interface (`bootstrap`, `poll`, `frame`, `last_closed`) pour un moteur
+    tournant dans un worker sans client API. Le superviseur ne publie que des
+    bougies clôturées.
+    """
+
+    def __init__(self, rings: Dict[Tuple[str, str], CandleRing], window: int = 100) -> None:
+        super().__init__(exchange=None, window=window)
+        self.rings = rings
+        self._seen: Dict[Tuple[str, str], int] = {}
+
+    def _now_ms(self) -> int:
+        return sys.maxsize
+
+    def _tf_ms(self, timeframe: str) -> int:
+        return int(ccxt.Exchange.parse_timeframe(timeframe)) * 1000
+
+    def bootstrap(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        key = (symbol, timeframe)
+        w = _Window(self._tf_ms(timeframe), self.window)
+        self._windows[key] = w
+        rows, self._seen[key] = self.rings[key].read(0, limit=self.window)
+        self._ingest(w, rows.tolist(), self._now_ms())
+        return self.frame(symbol, timeframe)
+
+    def poll(self, symbol: str, timeframe: str) -> int:
+        key = (symbol, timeframe)
+        w = self._windows.get(key)
+        if w is None:
+            return len(self.bootstrap(symbol, timeframe))
+        rows, self._seen[key] = self.rings[key].read(self._seen[key])
+        return self._ingest(w, rows.tolist(), self._now_ms())
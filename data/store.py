@@ -0,0 +1,248 @@
+# path: data/store.py
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data.fetcher import OHLCV_COLUMNS, fetch_ohlcv_since
+
+logger = logging.getLogger(__name__)
+
+# une colonne = un fichier binaire brut (little-endian), lisible par np.memmap
+_DTYPES = {
+    "time": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+
+Gap = Tuple[int, int]
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+class CandleStore:
+    """
+    Stockage local colonnaire des bougies OHLCV, une arborescence par
+    (symbole, timeframe) : `<root>/<symbole>/<timeframe>/<colonne>.bin`.
+
+    Les écritures sont en ajout seul ; les lectures passent par `np.memmap`
+    (pas de copie, pages partagées par l'OS entre processus). Un ajout de
+    bougies plus anciennes que la fin (backfill) déclenche une compaction
+    (tri + dédoublonnage) réécrite de façon atomique.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    # --- chemins ---
+    def _dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, _safe(symbol), _safe(timeframe))
+
+    def _path(self, symbol: str, timeframe: str, col: str) -> str:
+        return os.path.join(self._dir(symbol, timeframe), f"{col}.bin")
+
+    # --- lecture ---
+    def _column(self, symbol: str, timeframe: str, col: str) -> np.ndarray:
+        path = self._path(symbol, timeframe, col)
+        dtype = _DTYPES[col]
+        if not os.path.exists(path) or os.path.getsize(path) < dtype.itemsize:
+            return np.empty(0, dtype=dtype)
+        n = os.path.getsize(path) // dtype.itemsize
+        return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        return len(self._column(symbol, timeframe, "time"))
+
+    def last_time(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Ouverture (ms) de la dernière bougie stockée, ou None si vide."""
+        t = self._column(symbol, timeframe, "time")
+        return int(t[-1]) if len(t) else None
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Colonnes memory-mappées (vues en lecture seule) pour les bougies dont
+        l'ouverture est dans [start, end] (ms, bornes incluses).
+        """
+        t = self._column(symbol, timeframe, "time")
+        lo = int(np.searchsorted(t, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(t, end, side="right")) if end is not None else len(t)
+        return {col: self._column(symbol, timeframe, col)[lo:hi] for col in OHLCV_COLUMNS}
+
+    def frame(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Même format que `fetch_ohlcv` (copie en mémoire)."""
+        cols = self.read(symbol, timeframe, start, end)
+        df = pd.DataFrame({col: np.asarray(cols[col]) for col in OHLCV_COLUMNS})
+        df["time"] = pd.to_datetime(df["time"], unit="ms")
+        return df
+
+    # --- écriture ---
+    def _write(self, symbol: str, timeframe: str, cols: Dict[str, np.ndarray], mode: str) -> None:
+        os.makedirs(self._dir(symbol, timeframe), exist_ok=True)
+        for col in OHLCV_COLUMNS:
+            path = self._path(symbol, timeframe, col)
+            data = np.ascontiguousarray(cols[col], dtype=_DTYPES[col]).tobytes()
+            if mode == "ab":
+                with open(path, "ab") as f:
+                    f.write(data)
+            else:
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+
+    @staticmethod
+    def _to_columns(rows: Any) -> Dict[str, np.ndarray]:
+        if isinstance(rows, pd.DataFrame):
+            t = rows["time"]
+            if pd.api.types.is_datetime64_any_dtype(t):
+                t = t.astype("datetime64[ms]").astype("int64")
+            out = {"time": np.asarray(t, dtype="<i8")}
+            for col in OHLCV_COLUMNS[1:]:
+                out[col] = pd.to_numeric(rows[col], errors="coerce").to_numpy(dtype="<f8")
+            return out
+        arr = [list(r) + [np.nan] * (6 - len(r)) for r in rows]
+        if not arr:
+            return {col: np.empty(0, dtype=_DTYPES[col]) for col in OHLCV_COLUMNS}
+        m = np.array(arr, dtype=object)
+        out = {"time": m[:, 0].astype("<i8")}
+        for i, col in enumerate(OHLCV_COLUMNS[1:], start=1):
+            out[col] = pd.to_numeric(pd.Series(m[:, i]), errors="coerce").to_numpy(dtype="<f8")
+        return out
+
+    def append(self, symbol: str, timeframe: str, rows: Any) -> int:
+        """
+        Ajoute des bougies (lignes CCXT brutes ou DataFrame OHLCV).
+
+        Les bougies déjà présentes sont ignorées ; celles postérieures à la fin
+        sont ajoutées en fin de fichier, les plus anciennes (trous comblés)
+        déclenchent une compaction.
+
+        Returns:
+            Nombre de bougies réellement écrites.
+        """
+        cols = self._to_columns(rows)
+        if not len(cols["time"]):
+            return 0
+        order = np.argsort(cols["time"], kind="stable")
+        cols = {c: v[order] for c, v in cols.items()}
+        # dédoublonnage interne (garde la dernière occurrence)
+        t = cols["time"]
+        keep = np.append(t[1:] != t[:-1], True)
+        cols = {c: v[keep] for c, v in cols.items()}
+
+        stored = self._column(symbol, timeframe, "time")
+        last = int(stored[-1]) if len(stored) else None
+        if last is None:
+            self._write(symbol, timeframe, cols, "ab")
+            return len(cols["time"])
+        newer = cols["time"] > last
+        # présence des plus anciennes par recherche binaire (le stockage est trié)
+        pos = np.minimum(np.searchsorted(stored, cols["time"]), len(stored) - 1)
+        older = ~newer & (stored[pos] != cols["time"])
+        if newer.any():
+            self._write(symbol, timeframe, {c: v[newer] for c, v in cols.items()}, "ab")
+        if older.any():
+            self._write(symbol, timeframe, {c: v[older] for c, v in cols.items()}, "ab")
+            self.compact(symbol, timeframe)
+        return int(newer.sum() + older.sum())
+
+    def compact(self, symbol: str, timeframe: str) -> None:
+        """Réécrit les colonnes triées et dédoublonnées (remplacement atomique par colonne)."""
+        cols = {c: np.array(self._column(symbol, timeframe, c)) for c in OHLCV_COLUMNS}
+        n = min(len(v) for v in cols.values())  # écriture interrompue : on tronque
+        cols = {c: v[:n] for c, v in cols.items()}
+        order = np.argsort(cols["time"], kind="stable")
+        cols = {c: v[order] for c, v in cols.items()}
+        t = cols["time"]
+        keep = np.append(t[1:] != t[:-1], True) if n else np.empty(0, dtype=bool)
+        self._write(symbol, timeframe, {c: v[keep] for c, v in cols.items()}, "wb")
+
+    # --- trous & backfill ---
+    def gaps(
+        self,
+        symbol: str,
+        timeframe: str,
+        tf_ms: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> List[Gap]:
+        """
+        Plages de bougies manquantes [première, dernière] (ouvertures en ms, incluses)
+        entre `start` et `end` (par défaut : l'étendue stockée).
+        """
+        if start is not None:
+            start -= start % tf_ms
+        if end is not None:
+            end -= end % tf_ms
+        t = np.asarray(self.read(symbol, timeframe, start, end)["time"])
+        if not len(t):
+            if start is not None and end is not None and start <= end:
+                return [(start, end)]
+            return []
+        out: List[Gap] = []
+        if start is not None and t[0] > start:
+            out.append((start, int(t[0]) - tf_ms))
+        d = np.diff(t)
+        for i in np.flatnonzero(d > tf_ms):
+            out.append((int(t[i]) + tf_ms, int(t[i + 1]) - tf_ms))
+        if end is not None and t[-1] < end:
+            out.append((int(t[-1]) + tf_ms, end))
+        return out
+
+    def backfill(
+        self,
+        exchange: Any,
+        symbol: str,
+        timeframe: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        page: int = 500,
+    ) -> int:
+        """
+        Comble les trous entre `start` et `end` par requêtes paginées (`page`
+        bougies max par appel). Seules les bougies clôturées sont écrites.
+
+        Returns:
+            Nombre de bougies ajoutées.
+        """
+        tf_ms = int(exchange.parse_timeframe(timeframe)) * 1000
+        now = int(exchange.milliseconds())
+        last_closed = now - now % tf_ms - tf_ms
+        end = last_closed if end is None else min(end, last_closed)
+        added = 0
+        for lo, hi in self.gaps(symbol, timeframe, tf_ms, start, end):
+            since = lo
+            while since <= hi:
+                raw = fetch_ohlcv_since(exchange, symbol, timeframe, since, page) or []
+                rows = [r for r in raw if since <= int(r[0]) <= hi]
+                added += self.append(symbol, timeframe, rows)
+                if not raw:
+                    break
+                nxt = max(int(r[0]) for r in raw) + tf_ms
+                if nxt <= since:
+                    break
+                since = nxt
+        if added:
+            logger.info("Backfill %s %s: +%d candles", symbol, timeframe, added)
+        return added
+
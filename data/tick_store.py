@@ -0,0 +1,166 @@
+# path: data/tick_store.py
+import logging
+import os
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+
+from data.store import _safe
+
+logger = logging.getLogger(__name__)
+
+TICK_COLUMNS = ("time", "price", "amount", "side")
+# 21 octets par trade ; même format brut que `CandleStore` (lisible par np.memmap)
+_DTYPES: Dict[str, np.dtype] = {
+    "time": np.dtype("<i8"),
+    "price": np.dtype("<f8"),
+    "amount": np.dtype("<f4"),
+    "side": np.dtype("<i1"),  # +1 achat agresseur, -1 vente, 0 inconnu (ticker)
+}
+
+
+class TickStore:
+    """
+    Stockage local colonnaire des trades (ou prix ticker) d'un symbole :
+    `<root>/<symbole>/trades/<colonne>.bin`.
+
+    Même principe que `CandleStore` : ajout seul, lecture `np.memmap` sans
+    copie. Plusieurs trades peuvent partager une milliseconde : pas de
+    dédoublonnage par heure, un ajout plus ancien que la fin est fusionné
+    (tri stable) par réécriture atomique.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    # --- chemins ---
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.root, _safe(symbol), "trades")
+
+    def _path(self, symbol: str, col: str) -> str:
+        return os.path.join(self._dir(symbol), f"{col}.bin")
+
+    # --- lecture ---
+    def _column(self, symbol: str, col: str) -> np.ndarray:
+        path = self._path(symbol, col)
+        dtype = _DTYPES[col]
+        if not os.path.exists(path) or os.path.getsize(path) < dtype.itemsize:
+            return np.empty(0, dtype=dtype)
+        n = os.path.getsize(path) // dtype.itemsize
+        return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+    def count(self, symbol: str) -> int:
+        return len(self._column(symbol, "time"))
+
+    def last_time(self, symbol: str) -> Optional[int]:
+        t = self._column(symbol, "time")
+        return int(t[-1]) if len(t) else None
+
+    def read(self, symbol: str, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Colonnes memory-mappées des trades d'heure dans [start, end[ (ms)."""
+        t = self._column(symbol, "time")
+        lo = int(np.searchsorted(t, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(t, end, side="left")) if end is not None else len(t)
+        n = min(len(self._column(symbol, c)) for c in TICK_COLUMNS)  # écriture interrompue
+        return {col: self._column(symbol, col)[lo:min(hi, n)] for col in TICK_COLUMNS}
+
+    def chunks(
+        self,
+        symbol: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        size: int = 1 << 20,
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """`read` par tranches de `size` trades (pages lues par l'OS à la demande)."""
+        cols = self.read(symbol, start, end)
+        for lo in range(0, len(cols["time"]), size):
+            yield {c: v[lo:lo + size] for c, v in cols.items()}
+
+    # --- écriture ---
+    def _write(self, symbol: str, cols: Dict[str, np.ndarray], mode: str) -> None:
+        os.makedirs(self._dir(symbol), exist_ok=True)
+        for col in TICK_COLUMNS:
+            path = self._path(symbol, col)
+            data = np.ascontiguousarray(cols[col], dtype=_DTYPES[col]).tobytes()
+            if mode == "ab":
+                with open(path, "ab") as f:
+                    f.write(data)
+            else:
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+
+    @staticmethod
+    def _to_columns(trades: Any) -> Dict[str, np.ndarray]:
+        """Trades CCXT (dicts) ou colonnes {time, price[, amount, side]}."""
+        if isinstance(trades, dict):
+            n = len(trades["time"])
+            out = {"time": np.asarray(trades["time"], dtype="<i8"), "price": np.asarray(trades["price"], dtype="<f8")}
+            out["amount"] = np.asarray(trades.get("amount", np.zeros(n)), dtype="<f4")
+            out["side"] = np.asarray(trades.get("side", np.zeros(n)), dtype="<i1")
+            return out
+        trades = list(trades)
+        sides = {"buy": 1, "sell": -1}
+        return {
+            "time": np.array([int(tr["timestamp"]) for tr in trades], dtype="<i8"),
+            "price": np.array([float(tr["price"]) for tr in trades], dtype="<f8"),
+            "amount": np.array([float(tr.get("amount") or 0.0) for tr in trades], dtype="<f4"),
+            "side": np.array([sides.get(tr.get("side"), 0) for tr in trades], dtype="<i1"),
+        }
+
+    def append(self, symbol: str, trades: Any) -> int:
+        """
+        Ajoute des trades (liste CCXT `fetch_trades` ou colonnes).
+
+        Returns:
+            Nombre de trades écrits.
+        """
+        cols = self._to_columns(trades)
+        if not len(cols["time"]):
+            return 0
+        order = np.argsort(cols["time"], kind="stable")
+        cols = {c: v[order] for c, v in cols.items()}
+        last = self.last_time(symbol)
+        self._write(symbol, cols, "ab")
+        if last is not None and int(cols["time"][0]) < last:
+            self.compact(symbol)
+        return len(cols["time"])
+
+    def compact(self, symbol: str) -> None:
+        """Réécrit les colonnes triées par heure (tri stable : ordre d'arrivée conservé)."""
+        cols = {c: np.array(self._column(symbol, c)) for c in TICK_COLUMNS}
+        n = min(len(v) for v in cols.values())
+        order = np.argsort(cols["time"][:n], kind="stable")
+        self._write(symbol, {c: v[:n][order] for c, v in cols.items()}, "wb")
+
+    def record(
+        self,
+        exchange: Any,
+        symbol: str,
+        since: int,
+        end: Optional[int] = None,
+        page: int = 1000,
+    ) -> int:
+        """
+        Télécharge les trades publics depuis `since` (ms) par pages de `page`.
+
+        La reprise se fait à la milliseconde suivant le dernier trade d'une
+        page : les trades de cette milliseconde arrivés après la page sont
+        perdus, ceux d'avant ne sont jamais écrits deux fois.
+
+        Returns:
+            Nombre de trades ajoutés.
+        """
+        end = int(exchange.milliseconds()) if end is None else end
+        added = 0
+        while since < end:
+            raw = exchange.fetch_trades(symbol, since=since, limit=page) or []
+            rows = [tr for tr in raw if since <= int(tr["timestamp"]) < end]
+            added += self.append(symbol, rows)
+            if not rows:
+                break
+            since = max(int(tr["timestamp"]) for tr in rows) + 1
+        if added:
+            logger.info("Trades %s: +%d", symbol, added)
+        return added
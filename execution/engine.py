@@ -0,0 +1,271 @@
+# path: execution/engine.py
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import ccxt
+import pandas as pd
+
+from config import TIMEFRAMES
+from data.align import asof_frame
+from strategy.signal import generate_signal
+
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+RETRYABLE_EXC = (
+    ccxt.NetworkError,
+    ccxt.RequestTimeout,
+    ccxt.DDoSProtection,
+    ccxt.ExchangeNotAvailable,
+)
+
+
+def _backoff(attempt: int, base_delay: float, max_delay: float) -> float:
+    backoff = min(base_delay * (2 ** (attempt - 1)), max_delay)
+    # jitter ±20%
+    return max(0.0, backoff + backoff * (0.2 * (2 * random.random() - 1)))
+
+
+def with_retries(fn: Callable[[], T], *, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0) -> T:
+    """Exécute fn avec retries exponentiels + jitter, ne lève que si tous les essais échouent."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except RETRYABLE_EXC as e:
+            attempt += 1
+            if attempt > max_retries:
+                logger.error("API temporairement indisponible après %d tentatives: %s", attempt - 1, e)
+                raise
+            sleep_s = _backoff(attempt, base_delay, max_delay)
+            logger.warning("Erreur réseau (%s). Nouvelle tentative dans %.2fs (essai %d/%d)...", type(e).__name__, sleep_s, attempt, max_retries)
+            time.sleep(sleep_s)
+
+
+async def with_retries_async(fn: Callable[[], T], *, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0) -> T:
+    """
+    `with_retries` pour la boucle asyncio : `fn` (bloquante) tourne dans un
+    thread et le backoff est un `asyncio.sleep`, qui ne bloque aucune autre tâche.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await asyncio.to_thread(fn)
+        except RETRYABLE_EXC as e:
+            attempt += 1
+            if attempt > max_retries:
+                logger.error("API temporairement indisponible après %d tentatives: %s", attempt - 1, e)
+                raise
+            sleep_s = _backoff(attempt, base_delay, max_delay)
+            logger.warning("Erreur réseau (%s). Nouvelle tentative dans %.2fs (essai %d/%d)...", type(e).__name__, sleep_s, attempt, max_retries)
+            await asyncio.sleep(sleep_s)
+
+
+class AsyncEngine:
+    """
+    Boucle de trading asyncio d'un symbole.
+
+    Le client CCXT et le `PositionManager` restent synchrones : chaque appel
+    bloquant est déporté dans un thread (`asyncio.to_thread`). À chaque tick,
+    M15, M5 et la lecture des positions / ordres ouverts partent en parallèle,
+    et la durée d'une itération tend vers celle de la requête la plus lente.
+    La logique par bougie M5 clôturée (watchdog, trailing, sortie, signal,
+    entrée) est celle de la boucle synchrone historique.
+    """
+
+    def __init__(
+        self,
+        feed: Any,
+        pm: Any,
+        symbol: str,
+        ind15: Any,
+        ind5: Any,
+        investment_usd: float,
+        leverage: float,
+        clock: Optional[Any] = None,
+        timeframes: Dict[str, str] = TIMEFRAMES,
+    ) -> None:
+        self.feed = feed
+        self.pm = pm
+        self.symbol = symbol
+        self.ind15 = ind15
+        self.ind5 = ind5
+        self.investment_usd = investment_usd
+        self.leverage = leverage
+        self.clock = clock  # CandleClock en live : aucune requête tant qu'aucune bougie n'est clôturée
+        self.tf15 = timeframes["M15"]
+        self.tf5 = timeframes["M5"]
+        self.df15: Optional[pd.DataFrame] = None
+        self.df5: Optional[pd.DataFrame] = None
+
+    # --- données ---
+    def _poll(self, timeframe: str) -> int:
+        if self.clock is None:
+            return self.feed.poll(self.symbol, timeframe)
+        return self.clock.poll_closed(self.feed, self.symbol, timeframe)
+
+    async def bootstrap(self) -> None:
+        """Historique initial M15 et M5 (en parallèle) puis calcul batch des indicateurs."""
+        raw15, raw5 = await asyncio.gather(
+            with_retries_async(lambda: self.feed.bootstrap(self.symbol, self.tf15)),
+            with_retries_async(lambda: self.feed.bootstrap(self.symbol, self.tf5)),
+        )
+        self.ind15.seed(raw15)
+        self.ind5.seed(raw5)
+        self.df15 = self.ind15.frame()
+        self.df5 = self.ind5.frame()
+
+    async def _refresh(self, timeframe: str) -> Optional[int]:
+        """Nouvelles bougies clôturées ; None si le réseau n'a pas répondu."""
+        try:
+            return await with_retries_async(lambda: self._poll(timeframe), max_retries=3)
+        except RETRYABLE_EXC:
+            return None
+
+    # --- itération ---
+    async def step(self) -> bool:
+        """
+        Une itération : rafraîchit M15 et M5 pendant que les positions et
+        ordres ouverts sont lus, puis traite la bougie M5 clôturée s'il y en a.
+
+        Returns:
+            True si une bougie M5 a été traitée.
+        """
+        # positions / ordres ouverts lus une fois pour toute l'itération
+        with self.pm.tick():
+            new15, new5, _ = await asyncio.gather(
+                self._refresh(self.tf15),
+                self._refresh(self.tf5),
+                asyncio.to_thread(self.pm.prefetch),
+            )
+            # M15 d'abord : une M15 clôturée en même temps que la M5 sert de contexte à son signal
+            if new15 is None:
+                logger.info("Impossible de rafraîchir M15 sur ce tour ; on réessaiera au suivant.")
+            elif new15:
+                self.ind15.extend(self.feed.frame(self.symbol, self.tf15).tail(new15))
+                self.df15 = self.ind15.frame()
+            if new5 is None:
+                logger.warning("Skip tick: données M5 non rafraîchies (réseau).")
+                return False
+            if not new5:
+                return False
+            self.ind5.extend(self.feed.frame(self.symbol, self.tf5).tail(new5))
+            self.df5 = self.ind5.frame()
+            await asyncio.to_thread(self.on_m5_close)
+            return True
+
+    def on_m5_close(self) -> None:
+        """Gestion de position et signal sur la dernière bougie M5 clôturée (bloquant)."""
+        pm, df5, df15 = self.pm, self.df5, self.df15
+        if df5 is None or df15 is None:
+            raise RuntimeError("on_m5_close appelé avant bootstrap()")
+        current_price = df5.close.iloc[-1]
+        pm.watchdog(current_price)
+        pm.update_trail(df5)
+        pm.check_exit()
+        # contexte M15 : dernière bougie clôturée à la clôture de la M5 (pas de look-ahead)
+        ctx15 = asof_frame(df15, df5.time.iloc[-1], self.tf15, self.tf5)
+        if ctx15.empty:
+            logger.info("Pas encore de bougie M15 clôturée ; pas de signal.")
+            return
+        sig = generate_signal(ctx15, df5)
+        logger.info(f"Signal reçu ({self.symbol}) : {sig}")
+
+        if not pm.active:
+            # ATR14 déjà calculé : SL/TP préparés avant le fill, sans rechargement des bougies
+            atr = df5.ATR14.iloc[-1]
+            atr = float(atr) if pd.notna(atr) else None
+            if sig['long']:
+                size = self.investment_usd * self.leverage / current_price
+                pm.open_position('buy', current_price, size, atr=atr)
+            elif sig['short']:
+                size = self.investment_usd * self.leverage / current_price
+                pm.open_position('sell', current_price, size, atr=atr)
+        else:
+            pm.update_trail(df5)
+
+        pm.check_exit()
+
+    async def run(self, next_tick: Callable[[], Any]) -> None:
+        """
+        Boucle principale : `next_tick` (bloquante, exécutée dans un thread)
+        attend le tick suivant et retourne une valeur fausse pour arrêter.
+        """
+        try:
+            if self.df5 is None:
+                await self.bootstrap()
+                logger.info("Initialisation des données terminée.")
+            while await asyncio.to_thread(next_tick):
+                await self.step()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Libère les threads du `PositionManager`."""
+        self.pm.close()
+
+
+class MultiSymbolEngine:
+    """
+    Plusieurs `AsyncEngine` (un par contrat) dans un seul processus.
+
+    Les moteurs partagent le client d'exchange (donc son `RequestScheduler`),
+    la `CandleClock` et le `CandleFeed` ; chacun garde ses indicateurs et son
+    `PositionManager`. À chaque tick, les symboles démarrent en décalé sur
+    `stagger` secondes et au plus `max_concurrency` sont traités à la fois :
+    les requêtes de données arrivent en flux régulier au lieu d'une rafale.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], stagger: float = 2.0, max_concurrency: int = 8) -> None:
+        if not engines:
+            raise ValueError("at least one engine is required")
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.engines = engines
+        self.stagger = stagger
+        self.max_concurrency = max_concurrency
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    async def _each(self, action: Callable[[AsyncEngine], Awaitable[Any]]) -> List[Any]:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        sem = self._sem
+        delay = self.stagger / len(self.engines)
+
+        async def one(i: int, engine: AsyncEngine) -> Any:
+            await asyncio.sleep(i * delay)
+            async with sem:
+                return await action(engine)
+
+        results = await asyncio.gather(*(one(i, e) for i, e in enumerate(self.engines)), return_exceptions=True)
+        for engine, res in zip(self.engines, results):
+            # une erreur sur un symbole n'arrête pas les autres
+            if isinstance(res, Exception):
+                logger.error(f"{engine.symbol}: {type(res).__name__}: {res}")
+        return results
+
+    async def bootstrap(self) -> None:
+        await self._each(lambda e: e.bootstrap())
+
+    async def step(self) -> int:
+        """Une itération sur tous les symboles ; retourne le nombre de bougies M5 traitées."""
+        return sum(r is True for r in await self._each(lambda e: e.step()))
+
+    async def run(self, next_tick: Callable[[], Any]) -> None:
+        # assez de threads pour les 3 requêtes parallèles de chaque symbole actif
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=3 * self.max_concurrency + 1)
+        loop.set_default_executor(executor)
+        try:
+            await self.bootstrap()
+            logger.info("Initialisation des données terminée (%d symboles).", len(self.engines))
+            while await asyncio.to_thread(next_tick):
+                await self.step()
+        finally:
+            for engine in self.engines:
+                engine.close()
+            executor.shutdown(wait=False)
@@ -2,6 +2,10 @@
 import logging
 from typing import Any, Dict, Optional
 
+import ccxt
+
+from execution.order_registry import OrderRegistry
+from execution.scheduler import Priority, request_priority
 from utils.decorators import verify_order
 
 logger = logging.getLogger(__name__)
@@ -22,6 +26,10 @@ class OrderManager:
         """
         self.exchange = exchange
         self.symbol = symbol
+        # ordres ouverts connus localement, mis à jour par chaque appel ci-dessous
+        self.registry = OrderRegistry()
+        # support natif de editOrder, détecté une fois (cf. supports_edit)
+        self._edit_supported: Optional[bool] = None
 
     @verify_order
     def place_market_order(
@@ -59,14 +67,18 @@ class OrderManager:
         logger.info(
             f"Placing market order: {side} {size:.6f} {self.symbol} with params={final_params}"
         )
-        order = self.exchange.create_order(
-            symbol=self.symbol,
-            type="market",
-            side=side,
-            amount=size,
-            price=None,
-            params=final_params,
-        )
+        # une fermeture reduceOnly au marché passe avant toute autre requête
+        priority = Priority.EMERGENCY if final_params.get("reduceOnly") else Priority.PROTECTIVE
+        with request_priority(priority):
+            order = self.exchange.create_order(
+                symbol=self.symbol,
+                type="market",
+                side=side,
+                amount=size,
+                price=None,
+                params=final_params,
+            )
+        self.registry.add(order, role="mkt", reduce_only=bool(final_params.get("reduceOnly")))
         logger.info(
             "Market order response: id=%s, status=%s",
             order.get("id"),
@@ -110,6 +122,7 @@ class OrderManager:
         order = self.exchange.create_order(
             self.symbol, "limit", side, size, price, params
         )
+        self.registry.add(order, role="tp", reduce_only=bool(params.get("reduceOnly")))
         logger.info(
             "Limit order response: id=%s, status=%s",
             order.get("id"),
@@ -161,6 +174,7 @@ class OrderManager:
         order = self.exchange.create_order(
             self.symbol, "limit", side, size, price, params
         )
+        self.registry.add(order, role="sl", reduce_only=bool(params.get("reduceOnly")))
         logger.info(
             "Stop limit order response: id=%s, status=%s",
             order.get("id"),
@@ -185,6 +199,84 @@ class OrderManager:
         if not order_id or not isinstance(order_id, str):
             raise ValueError("order_id must be a non-empty string")
         logger.info("Cancelling order: id=%s", order_id)
-        result = self.exchange.cancel_order(order_id, self.symbol)
+        try:
+            result = self.exchange.cancel_order(order_id, self.symbol)
+        except ccxt.OrderNotFound:
+            self.registry.discard(order_id)  # déjà exécuté ou annulé côté exchange
+            raise
+        self.registry.discard(order_id)
         logger.info("Cancel result: id=%s, status=%s", result.get("id"), result.get("status"))
-        return result
\ No newline at end of file
+        return result
+
+    @property
+    def supports_edit(self) -> bool:
+        """
+        L'exchange modifie-t-il un ordre en place (`has['editOrder']`) ?
+
+        Détecté une fois puis mis en cache ; une édition émulée par CCXT
+        (annulation + création) n'est pas retenue.
+        """
+        if self._edit_supported is None:
+            has = getattr(self.exchange, "has", None) or {}
+            self._edit_supported = has.get("editOrder") is True and hasattr(self.exchange, "edit_order")
+        return self._edit_supported
+
+    @verify_order
+    def amend_order(
+        self,
+        order_id: str,
+        side: str,
+        size: float,
+        price: float,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Modifie le prix (et `stopPrice`) d'un ordre limit / stop limit ouvert.
+
+        Une seule requête `edit_order` si l'exchange le permet, sinon
+        annulation puis recréation (ordre stop si `stopPrice` est fourni).
+
+        Args:
+            order_id: Ordre à modifier.
+            side: 'buy' ou 'sell'.
+            size: Taille de l'ordre (> 0).
+            price: Nouveau prix limite (> 0).
+            params: Paramètres de l'ordre (ex: {'stopPrice': ..., 'reduceOnly': True}).
+
+        Returns:
+            L'ordre modifié ou recréé (son id peut changer).
+
+        Raises:
+            ValueError: Si `order_id` vide, `side` invalide, ou `size`/`price` <= 0.
+        """
+        if not order_id or not isinstance(order_id, str):
+            raise ValueError("order_id must be a non-empty string")
+        if side not in ("buy", "sell"):
+            raise ValueError("side must be 'buy' or 'sell'")
+        if size <= 0:
+            raise ValueError("size must be positive")
+        if price <= 0:
+            raise ValueError("price must be positive")
+        params = dict(params or {})
+        role = "sl" if params.get("stopPrice") is not None else "tp"
+        if self.supports_edit:
+            logger.info(f"Amending order {order_id}: {side} {size:.6f} {self.symbol} at {price} params={params}")
+            try:
+                order = self.exchange.edit_order(order_id, self.symbol, "limit", side, size, price, params)
+            except ccxt.NotSupported:
+                logger.warning("editOrder refusé par l'exchange ; repli sur annulation + création")
+                self._edit_supported = False
+            except ccxt.OrderNotFound:
+                self.registry.discard(order_id)
+                raise
+            else:
+                self.registry.discard(order_id)
+                self.registry.add(order, role=role, reduce_only=bool(params.get("reduceOnly")))
+                logger.info("Amend response: id=%s, status=%s", order.get("id"), order.get("status"))
+                return order
+        self.cancel_order(order_id)
+        # entre l'annulation et la recréation, la position n'est plus protégée
+        with request_priority(Priority.PROTECTIVE):
+            if role == "sl":
+                return self.place_stop_limit_order(side, size, price, params=params)
+            return self.place_limit_order(side, size, price, params=params)
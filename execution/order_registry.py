@@ -0,0 +1,163 @@
+# path: execution/order_registry.py
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class OrderRegistry:
+    """
+    État local des ordres ouverts d'un symbole, tenu à jour par nos propres
+    créations/annulations (`OrderManager`).
+
+    Chaque ordre est indexé par id, côté, rôle (sl = ordre stop, tp = limite,
+    mkt = marché) et drapeau reduceOnly : appartenance et sélection sans
+    aller-retour réseau. Les exécutions et annulations faites par l'exchange
+    ne sont vues qu'à la réconciliation (`reconcile`) avec `fetch_open_orders`.
+    """
+
+    def __init__(self) -> None:
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._index: Dict[Tuple[str, Any], Set[str]] = defaultdict(set)
+        self._seq: Dict[str, int] = {}
+        self._counter = 0
+        self.last_sync: Optional[float] = None
+        # les jambes TP/SL peuvent être enregistrées depuis deux threads
+        self._lock = threading.RLock()
+
+    # --- classification ---
+    @staticmethod
+    def stop_price(order: Dict[str, Any]) -> Optional[float]:
+        info = order.get("info") or {}
+        params = order.get("params") or {}
+        stop = order.get("stopPrice") or order.get("triggerPrice") or info.get("stopPrice") or params.get("stopPrice")
+        return float(stop) if stop else None
+
+    @staticmethod
+    def is_reduce_only(order: Dict[str, Any]) -> bool:
+        info = order.get("info") or {}
+        params = order.get("params") or {}
+        return bool(order.get("reduceOnly") or info.get("reduceOnly") or params.get("reduceOnly"))
+
+    @classmethod
+    def role_of(cls, order: Dict[str, Any]) -> str:
+        if order.get("type") == "market":
+            return "mkt"
+        return "sl" if cls.stop_price(order) else "tp"
+
+    # --- mutations ---
+    def add(self, order: Dict[str, Any], role: Optional[str] = None, reduce_only: Optional[bool] = None) -> None:
+        """
+        Enregistre un ordre ouvert (remplace l'entrée existante de même id).
+
+        `role` / `reduce_only` priment sur ce que contient la réponse de
+        l'exchange, qui ne renvoie pas toujours les paramètres envoyés.
+        """
+        with self._lock:
+            oid = (order or {}).get("id")
+            if not oid:
+                return
+            role = role or self.role_of(order)
+            # sans statut, un ordre marché est supposé exécuté, les autres au carnet
+            status = (order.get("status") or ("closed" if role == "mkt" else "open")).lower()
+            if status != "open":
+                self.discard(oid)
+                return
+            price = order.get("price")
+            rec = {
+                "id": oid,
+                "side": order.get("side"),
+                "role": role,
+                "reduce_only": self.is_reduce_only(order) if reduce_only is None else bool(reduce_only),
+                "price": float(price) if price is not None else None,
+                "stop_price": self.stop_price(order),
+                "amount": order.get("amount"),
+            }
+            if oid in self._orders:
+                self._unindex(oid)
+            else:
+                self._counter += 1
+                self._seq[oid] = self._counter
+            self._orders[oid] = rec
+            for key in self._keys(rec):
+                self._index[key].add(oid)
+
+    def discard(self, order_id: str) -> None:
+        with self._lock:
+            if order_id in self._orders:
+                self._unindex(order_id)
+                del self._orders[order_id]
+                del self._seq[order_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._orders.clear()
+            self._index.clear()
+            self._seq.clear()
+
+    def reconcile(self, open_orders: Iterable[Dict[str, Any]]) -> int:
+        """
+        Aligne le registre sur la liste d'ordres ouverts de l'exchange.
+
+        Returns:
+            Nombre d'écarts corrigés (ordres apparus ou disparus).
+        """
+        with self._lock:
+            remote = {o["id"]: o for o in open_orders if o.get("id")}
+            gone = [oid for oid in self._orders if oid not in remote]
+            new = [oid for oid in remote if oid not in self._orders]
+            for oid in gone:
+                self.discard(oid)
+            for oid, o in remote.items():
+                known = self._orders.get(oid)
+                # rôle / reduceOnly connus localement : conservés si la réponse ne les porte pas
+                self.add(
+                    o,
+                    role=known["role"] if known else None,
+                    reduce_only=known["reduce_only"] if known and not self.is_reduce_only(o) else None,
+                )
+            self.last_sync = time.monotonic()
+            drift = len(gone) + len(new)
+            if drift:
+                logger.debug("Order registry reconciled: %d disparu(s), %d nouveau(x)", len(gone), len(new))
+            return drift
+
+    def age(self) -> float:
+        """Secondes depuis la dernière réconciliation (inf si jamais faite)."""
+        return float("inf") if self.last_sync is None else time.monotonic() - self.last_sync
+
+    # --- lecture ---
+    def __contains__(self, order_id: Any) -> bool:
+        return order_id in self._orders
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self._orders.get(order_id)
+
+    def select(self, side: Optional[str] = None, role: Optional[str] = None, reduce_only: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Ordres ouverts correspondant aux critères fournis, dans l'ordre d'enregistrement."""
+        keys = [k for k in (("side", side), ("role", role), ("reduce", reduce_only)) if k[1] is not None]
+        with self._lock:
+            if keys:
+                ids = set.intersection(*(self._index.get(k, set()) for k in keys))
+            else:
+                ids = set(self._orders)
+            return [self._orders[oid] for oid in sorted(ids, key=self._seq.__getitem__)]
+
+    # --- interne ---
+    @staticmethod
+    def _keys(rec: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+        return (("side", rec["side"]), ("role", rec["role"]), ("reduce", rec["reduce_only"]))
+
+    def _unindex(self, order_id: str) -> None:
+        for key in self._keys(self._orders[order_id]):
+            ids = self._index.get(key)
+            if ids is not None:
+                ids.discard(order_id)
+                if not ids:
+                    del self._index[key]
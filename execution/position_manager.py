@@ -1,29 +1,115 @@
 # execution/position_manager.py
 import logging
 import threading
-from typing import Any, Dict, Optional
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Optional, Tuple, overload
 
 import ccxt
 import pandas as pd
 
-from risk.strategies.base import StrategyContext, PositionSnapshot
+from risk.strategies.base import Price, StrategyContext, PositionSnapshot
 from config import TICK_SIZE
 from execution.order_manager import OrderManager
-from risk.sl_tp import calculate_initial_sl_tp
+from execution.order_registry import OrderRegistry
+from execution.scheduler import Priority, request_priority
+from execution.snapshot import ExchangeSnapshot
+from risk.sl_tp import DEFAULT_ATR_MULTIPLIER, calculate_initial_sl_tp, get_tick_size, sl_tp_from_distance
 from risk.rules import RULES
-from utils.price_utils import align_price
+from utils.price_utils import align_price, price_to_ticks, ticks_to_price
 
 logger = logging.getLogger(__name__)
 
 
 class PositionManager:
-    def __init__(self, exchange, symbol, order_manager, strategy: Optional[object] = None):
+    def __init__(
+        self,
+        exchange,
+        symbol,
+        order_manager,
+        strategy: Optional[object] = None,
+        atr_multiplier: Optional[float] = None,
+        reconcile_interval: Optional[float] = None,
+        concurrent_protection: bool = True,
+        tick_prices: bool = False,
+    ):
         self.exchange = exchange
         self.symbol = symbol
         self.om = order_manager
         self.strategy = strategy
+        # None = valeur par défaut de calculate_initial_sl_tp
+        self.atr_multiplier = atr_multiplier
         self._lock = threading.RLock()
         self.active = None
+        # positions / ordres ouverts lus une fois par tick (cf. tick())
+        self.snapshot = ExchangeSnapshot(exchange, symbol)
+        # secondes entre deux réconciliations du registre d'ordres ; None = à chaque lecture
+        self.reconcile_interval = reconcile_interval
+        # TP et SL envoyés en parallèle après le fill (cf. _place_protection)
+        self.concurrent_protection = concurrent_protection
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # latences des dernières ouvertures (ms) : fill, calcul SL/TP, ordres de protection, total
+        self.protection_latency: Deque[Dict[str, float]] = deque(maxlen=100)
+        # SL / TP de `active` en nombre entier de ticks du marché, convertis en
+        # prix seulement à l'envoi des ordres (cf. price_of)
+        self.tick_prices = tick_prices
+
+    def tick(self):
+        """
+        Contexte d'une itération de boucle : positions et ordres ouverts sont
+        lus une seule fois et partagés par watchdog, update_trail, check_exit...
+        jusqu'à la prochaine mutation de notre part.
+        """
+        return self.snapshot.tick()
+
+    def prefetch(self) -> None:
+        """
+        Lit positions et ordres ouverts dans le snapshot du tick en cours, pour
+        qu'ils arrivent pendant le rafraîchissement des bougies. Sans position,
+        rien à lire ; les erreurs sont laissées aux lectures suivantes.
+        """
+        if not self.active:
+            return
+        try:
+            self.snapshot.positions()
+            self._orders(force=True)
+        except Exception as e:
+            logger.warning(f"Prefetch positions/ordres échoué: {e}")
+
+    def _orders(self, force: bool = False) -> OrderRegistry:
+        """
+        Registre des ordres ouverts de l'OrderManager, réconcilié avec
+        `fetch_open_orders` s'il est plus vieux que `reconcile_interval` (ou
+        si `force`). Lève si la lecture de l'exchange échoue.
+        """
+        registry = self.om.registry
+        if force or self.reconcile_interval is None or registry.age() >= self.reconcile_interval:
+            registry.reconcile(self.snapshot.open_orders())
+        return registry
+
+    @property
+    def tick_size(self) -> float:
+        """Tick du trailing : celui du marché en domaine ticks, TICK_SIZE sinon."""
+        if self.tick_prices:
+            return get_tick_size(self.exchange, self.symbol)
+        return TICK_SIZE
+
+    @overload
+    def price_of(self, value: None) -> None: ...
+    @overload
+    def price_of(self, value: Price) -> float: ...
+    def price_of(self, value: Optional[Price]) -> Optional[float]:
+        """SL / TP de `active` en prix flottant."""
+        if value is None or not self.tick_prices:
+            return value
+        return ticks_to_price(int(value), self.tick_size)
+
+    def _state_price(self, price: float) -> Price:
+        """Prix d'ordre (déjà aligné sur le tick) dans le domaine de `active`."""
+        if not self.tick_prices:
+            return price
+        return round(price / self.tick_size)
 
     @staticmethod
     def opposite(side: str) -> str:
@@ -36,17 +122,16 @@ class PositionManager:
         with self._lock:
             logger.debug("Loading active position")
             try:
-                opens = self.exchange.fetch_open_orders(symbol=self.symbol)
+                # reprise : toujours repartir de l'état de l'exchange
+                registry = self.om.registry
+                registry.reconcile(self.snapshot.open_orders())
             except Exception as e:
                 logger.error(f"Failed to fetch open orders in load_active: {e}")
                 self.active = None
                 return
 
-            def _stop_price(o: Dict[str, Any]) -> float | None:
-                return o.get("stopPrice") or (o.get("info") or {}).get("stopPrice")
-
-            sl_orders = [o for o in opens if _stop_price(o)]
-            tp_orders = [o for o in opens if not _stop_price(o)]
+            sl_orders = registry.select(role="sl")
+            tp_orders = registry.select(role="tp")
             if not sl_orders or not tp_orders:
                 logger.info("No active SL/TP orders; no position.")
                 self.active = None
@@ -54,7 +139,7 @@ class PositionManager:
             try:
                 positions = [
                     p
-                    for p in self.exchange.fetch_positions([self.symbol])
+                    for p in self.snapshot.positions()
                     if p["symbol"] == self.symbol and float(p["contracts"]) != 0
                 ]
             except Exception as e:
@@ -69,15 +154,15 @@ class PositionManager:
             side = "buy" if float(pos["contracts"]) > 0 else "sell"
             size = abs(float(pos["contracts"]))
             entry = float(pos["entryPrice"])
-            sl_price = float(_stop_price(sl_orders[0]) or sl_orders[0]["price"])
+            sl_price = float(sl_orders[0]["stop_price"] or sl_orders[0]["price"])
             tp_price = float(tp_orders[0]["price"])
             trail_dist = abs(entry - sl_price)
             self.active = {
                 "side": side,
                 "size": size,
                 "entry_price": entry,
-                "tp_price": tp_price,
-                "current_sl_price": sl_price,
+                "tp_price": self._state_price(tp_price),
+                "current_sl_price": self._state_price(sl_price),
                 "trail_dist": trail_dist,
                 "ids": {
                     "sl": sl_orders[0]["id"],
@@ -85,14 +170,29 @@ class PositionManager:
                     # pas d’info mkt lors d’un reload
                 },
                 # utile aux stratégies si rechargé
-                "tp_initial": tp_price,
+                "tp_initial": self._state_price(tp_price),
             }
             logger.info("Loaded position: %s %.6f@%s, SL=%s, TP=%s", side, size, entry, sl_price, tp_price)  # pragma: no cover
 
-    def open_position(self, side: str, entry_price: float, size: float) -> None:
+    def open_position(self, side: str, entry_price: float, size: float, atr: Optional[float] = None) -> None:
+        """
+        Ouvre une position au marché puis pose TP et SL reduceOnly.
+
+        Si `atr` (ATR14 M5 déjà calculé par l'appelant) est fourni, la distance
+        SL et le tick size sont préparés avant l'ordre marché : après le fill,
+        il ne reste qu'un décalage aligné sur le tick. Sinon
+        `calculate_initial_sl_tp` recharge les bougies après le fill.
+        """
         with self._lock:
+            pre = None
+            if atr is not None:
+                mult = DEFAULT_ATR_MULTIPLIER if self.atr_multiplier is None else self.atr_multiplier
+                pre = (float(atr) * mult, get_tick_size(self.exchange, self.symbol))
+            t0 = time.perf_counter()
             # 1) Ordre marché
             mkt_order = self.om.place_market_order(side, size)
+            t_fill = time.perf_counter()
+            self.snapshot.invalidate()
             mkt_id = (mkt_order or {}).get("id")
             fill_price = (
                 (mkt_order or {}).get("average")
@@ -102,24 +202,22 @@ class PositionManager:
 
             try:
                 # 2) Calcul SL/TP basé sur le vrai prix de remplissage
-                sltp = calculate_initial_sl_tp(self.exchange, self.symbol, float(fill_price), side)
+                if pre is not None:
+                    sltp = sl_tp_from_distance(float(fill_price), side, *pre)
+                else:
+                    sl_kwargs = {} if self.atr_multiplier is None else {"atr_multiplier": self.atr_multiplier}
+                    # position encore nue : le rechargement des bougies passe avant le polling
+                    with request_priority(Priority.PROTECTIVE):
+                        sltp = calculate_initial_sl_tp(self.exchange, self.symbol, float(fill_price), side, **sl_kwargs)
+                t_sltp = time.perf_counter()
 
                 # 3) Placement des ordres de protection
-                tp_order = self.om.place_limit_order(
-                    side=self.opposite(side),
-                    size=size,
-                    price=sltp["tp_price"],
-                    params={"reduceOnly": True},
-                )
-                sl_order = self.om.place_stop_limit_order(
-                    side=self.opposite(side),
-                    size=size,
-                    price=sltp["sl_price"],
-                    params={"stopPrice": sltp["sl_price"], "reduceOnly": True},
-                )
+                tp_order, sl_order = self._place_protection(side, size, sltp)
+                self._record_protection_latency(t0, t_fill, t_sltp, time.perf_counter())
 
-                sl_order_price = float(sltp["sl_price"])
-                tp_order_price = float(sltp["tp_price"])
+                self.snapshot.invalidate()
+                sl_order_price = self._state_price(float(sltp["sl_price"]))
+                tp_order_price = self._state_price(float(sltp["tp_price"]))
 
                 # 4) État actif
                 self.active = {
@@ -139,12 +237,78 @@ class PositionManager:
                 }
             except Exception as e:
                 logger.error(f"Failed to place SL/TP orders: {e}")
+                self.snapshot.invalidate()
                 try:
                     self._emergency_exit("SL/TP placement failure")
                 except Exception as ee:
                     logger.critical(f"Emergency exit failed after SL/TP error: {ee}")
                 raise RuntimeError("Failed to open position safely, position closed") from e
 
+    def _place_protection(self, side: str, size: float, sltp: Dict[str, float]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Envoie le TP (limit) et le SL (stop limit) reduceOnly, en parallèle si
+        `concurrent_protection`. Les deux envois sont attendus avant de
+        propager l'erreur éventuelle, pour que la sortie d'urgence voie (et
+        annule) la jambe qui a réussi.
+        """
+        exit_side = self.opposite(side)
+
+        # priorité posée dans chaque jambe : le contexte est propre au thread
+        def tp_leg() -> Dict[str, Any]:
+            with request_priority(Priority.PROTECTIVE):
+                return self.om.place_limit_order(
+                    side=exit_side, size=size, price=sltp["tp_price"], params={"reduceOnly": True}
+                )
+
+        def sl_leg() -> Dict[str, Any]:
+            with request_priority(Priority.PROTECTIVE):
+                return self.om.place_stop_limit_order(
+                    side=exit_side, size=size, price=sltp["sl_price"],
+                    params={"stopPrice": sltp["sl_price"], "reduceOnly": True},
+                )
+
+        if not self.concurrent_protection:
+            return tp_leg(), sl_leg()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="protect")
+        sl_future = self._executor.submit(sl_leg)
+        tp_future = self._executor.submit(tp_leg)
+        wait((sl_future, tp_future))
+        # le SL d'abord : c'est son échec qui laisse la position sans stop
+        sl_order = sl_future.result()
+        return tp_future.result(), sl_order
+
+    def close(self) -> None:
+        """Arrête les threads d'envoi des ordres de protection (recréés au besoin)."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _record_protection_latency(self, t0: float, t_fill: float, t_sltp: float, t_protected: float) -> None:
+        sample = {
+            "fill_ms": (t_fill - t0) * 1e3,
+            "sltp_ms": (t_sltp - t_fill) * 1e3,
+            "orders_ms": (t_protected - t_sltp) * 1e3,
+            "total_ms": (t_protected - t0) * 1e3,
+        }
+        self.protection_latency.append(sample)
+        logger.info(
+            "Time-to-protected: %.1f ms (fill %.1f, SL/TP %.1f, ordres %.1f)",
+            sample["total_ms"], sample["fill_ms"], sample["sltp_ms"], sample["orders_ms"],
+        )
+
+    def protection_stats(self) -> Dict[str, float]:
+        """Résumé des fenêtres sans protection des dernières ouvertures (ms)."""
+        totals = sorted(s["total_ms"] for s in self.protection_latency)
+        if not totals:
+            return {"count": 0}
+        return {
+            "count": len(totals),
+            "mean_ms": sum(totals) / len(totals),
+            "p50_ms": totals[len(totals) // 2],
+            "max_ms": totals[-1],
+        }
+
     def update_trail(self, df: pd.DataFrame) -> None:
         if not self.active:
             return
@@ -156,12 +320,13 @@ class PositionManager:
 
         # Sans stratégie : legacy trailing
         if not self.strategy:
+            align = price_to_ticks if self.tick_prices else align_price
             if side == "buy":
-                new_sl = align_price(price - trail, TICK_SIZE, mode="down")
+                new_sl = align(price - trail, self.tick_size, mode="down")
                 if new_sl <= old_sl:
                     return
             else:
-                new_sl = align_price(price + trail, TICK_SIZE, mode="up")
+                new_sl = align(price + trail, self.tick_size, mode="up")
                 if new_sl >= old_sl:
                     return
             self._replace_sl(new_sl)
@@ -178,7 +343,7 @@ class PositionManager:
             tp_initial=self.active.get("tp_initial"),
             trail_dist=trail,
         )
-        ctx = StrategyContext(symbol=self.symbol, side=side, tick_size=TICK_SIZE)
+        ctx = StrategyContext(symbol=self.symbol, side=side, tick_size=self.tick_size, ticks=self.tick_prices)
         desired = self.strategy.compute_targets(snap, ctx)
 
         # SL monotone
@@ -188,6 +353,8 @@ class PositionManager:
         else:
             if desired.sl_price is not None and desired.sl_price < old_sl:
                 self._replace_sl(desired.sl_price)
+        if not self.active:
+            return  # SL déjà exécuté : _replace_sl a soldé la position
 
         # TP si changement
         if desired.tp_price is not None and old_tp is not None and desired.tp_price != old_tp:
@@ -202,7 +369,7 @@ class PositionManager:
             try:
                 positions = [
                     p
-                    for p in self.exchange.fetch_positions([self.symbol])
+                    for p in self.snapshot.positions()
                     if p["symbol"] == self.symbol and float(p["contracts"]) != 0
                 ]
             except Exception as e:
@@ -213,14 +380,15 @@ class PositionManager:
                 self._cancel_all_open()
                 self.active = None
                 return
+            # SL / TP exécutés ou annulés hors du bot : le registre seul les verrait
+            # au plus `reconcile_interval` plus tard ; lecture partagée par le tick
             try:
-                opens = self.exchange.fetch_open_orders(symbol=self.symbol)
+                registry = self._orders(force=True)
             except Exception as e:
                 logger.error(f"Failed to fetch open orders in check_exit: {e}")
                 return
-            open_ids = {o["id"] for o in opens}
             ids = self.active.get("ids", {})
-            if ids.get("sl") not in open_ids and ids.get("tp") not in open_ids:
+            if ids.get("sl") not in registry and ids.get("tp") not in registry:
                 logger.warning("Position still open but SL/TP orders missing - emergency exit")
                 self._emergency_exit("missing protective orders")
                 return
@@ -231,7 +399,7 @@ class PositionManager:
 
     @property
     def tp_price(self):
-        return self.active.get("tp_price") if self.active else None
+        return self.price_of(self.active.get("tp_price")) if self.active else None
 
     def watchdog(self, current_price: float) -> None:
         with self._lock:
@@ -245,41 +413,36 @@ class PositionManager:
 
     def _purge_stale_reduce_only(self, side: str) -> None:
         try:
-            opens = self.exchange.fetch_open_orders(symbol=self.symbol)
+            stale = self._orders().select(side=side, reduce_only=True)
         except Exception as e:
             logger.error(f"Failed to fetch open orders in purge_stale: {e}")
             return
-
-        def _is_reduce(o: Dict[str, Any]) -> bool:
-            info = o.get("info") or {}
-            params = o.get("params") or {}
-            return bool(o.get("reduceOnly") or info.get("reduceOnly") or params.get("reduceOnly"))
-
-        for o in opens:
-            if o.get("side") == side and _is_reduce(o):
-                try:
-                    self.exchange.cancel_order(o["id"], symbol=self.symbol)
-                    logger.info(f"Cancelled stale reduceOnly {side} id={o['id']}")
-                except Exception as e:
-                    logger.warning(f"Cancel stale failed: {e}")
+        for o in stale:
+            try:
+                self.om.cancel_order(o["id"])
+                logger.info(f"Cancelled stale reduceOnly {side} id={o['id']}")
+            except Exception as e:
+                logger.warning(f"Cancel stale failed: {e}")
+        self.snapshot.invalidate()
 
     def _cancel_all_open(self) -> None:
         try:
-            opens = self.exchange.fetch_open_orders(symbol=self.symbol)
+            opens = self._orders().select()
         except Exception as e:
             logger.error(f"Failed to fetch open orders in cancel_all_open: {e}")
             return
         for o in opens:
             try:
-                self.exchange.cancel_order(o["id"], symbol=self.symbol)
+                self.om.cancel_order(o["id"])
             except Exception as e:
                 logger.warning(f"Failed to cancel order {o.get('id')}: {e}")
+        self.snapshot.invalidate()
 
     def _position_contracts(self) -> float:
         try:
             positions = [
                 p
-                for p in self.exchange.fetch_positions([self.symbol])
+                for p in self.snapshot.positions()
                 if p["symbol"] == self.symbol and float(p.get("contracts") or 0) != 0
             ]
         except Exception:
@@ -293,50 +456,57 @@ class PositionManager:
                 return
             self.closing = True
             try:
-                logger.error(f"Emergency exit triggered due to {reason}")
-                if self._position_contracts() == 0.0:
-                    logger.info("Already flat — skip emergency market")
+                with request_priority(Priority.EMERGENCY):
+                    logger.error(f"Emergency exit triggered due to {reason}")
+                    if self._position_contracts() == 0.0:
+                        logger.info("Already flat — skip emergency market")
+                        self._cancel_all_open()
+                        self.active = None
+                        return
+                    exit_side = "sell" if self._position_contracts() > 0 else "buy"
+                    qty = abs(self._position_contracts() or (self.active and self.active["size"]) or 0.0)
+                    self._purge_stale_reduce_only(exit_side)
+                    self.om.place_market_order(exit_side, qty, params={"reduceOnly": True})
+                    self.snapshot.invalidate()
                     self._cancel_all_open()
                     self.active = None
-                    return
-                exit_side = "sell" if self._position_contracts() > 0 else "buy"
-                qty = abs(self._position_contracts() or (self.active and self.active["size"]) or 0.0)
-                self._purge_stale_reduce_only(exit_side)
-                self.om.place_market_order(exit_side, qty, params={"reduceOnly": True})
-                self._cancel_all_open()
-                self.active = None
             finally:
                 self.closing = False
 
     # Helpers internes
     def _replace_sl(self, new_sl: float) -> None:
+        side = self.opposite(self.active["side"])
+        size = self.active["size"]
+        price = self.price_of(new_sl)
         try:
-            self.exchange.cancel_order(self.active["ids"]["sl"], self.symbol)
+            with request_priority(Priority.TRAILING):
+                order = self.om.amend_order(
+                    self.active["ids"]["sl"], side, size, price,
+                    params={"stopPrice": price, "reduceOnly": True},
+                )
         except (ccxt.BaseError, ccxt.OrderNotFound) as e:
-            logger.error(f"cancel_order failed for SL {self.active['ids'].get('sl')}: {e}")
-            self._emergency_exit("cancel SL failed")
+            logger.error(f"amend failed for SL {self.active['ids'].get('sl')}: {e}")
+            self.snapshot.invalidate()  # l'ordre a pu être exécuté entre-temps
+            self._emergency_exit("replace SL failed")
             return
-        side = self.opposite(self.active["side"])
-        size = self.active["size"]
-        order = self.om.place_stop_limit_order(
-            side=side, size=size, price=new_sl,
-            params={"stopPrice": new_sl, "reduceOnly": True},
-        )
+        self.snapshot.invalidate()
         self.active["ids"]["sl"] = order["id"]
         self.active["current_sl_price"] = new_sl
 
     def _replace_tp(self, new_tp: float) -> None:
+        side = self.opposite(self.active["side"])
+        size = self.active["size"]
         try:
-            self.exchange.cancel_order(self.active["ids"]["tp"], self.symbol)
+            with request_priority(Priority.TRAILING):
+                order = self.om.amend_order(
+                    self.active["ids"]["tp"], side, size, self.price_of(new_tp), params={"reduceOnly": True}
+                )
         except (ccxt.BaseError, ccxt.OrderNotFound) as e:
-            logger.error(f"cancel_order failed for TP {self.active['ids'].get('tp')}: {e}")
-            self._emergency_exit("cancel TP failed")
+            logger.error(f"amend failed for TP {self.active['ids'].get('tp')}: {e}")
+            self.snapshot.invalidate()
+            self._emergency_exit("replace TP failed")
             return
-        side = self.opposite(self.active["side"])
-        size = self.active["size"]
-        order = self.om.place_limit_order(
-            side=side, size=size, price=new_tp, params={"reduceOnly": True}
-        )
+        self.snapshot.invalidate()
         self.active["ids"]["tp"] = order["id"]
         self.active["tp_price"] = new_tp
 
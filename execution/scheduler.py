@@ -0,0 +1,168 @@
+# path: execution/scheduler.py
+import contextlib
+import heapq
+import itertools
+import logging
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Classes de requêtes, de la plus urgente à la moins urgente."""
+    EMERGENCY = 0    # sortie d'urgence reduceOnly et ce qui la prépare
+    PROTECTIVE = 1   # pose / annulation des ordres SL / TP, ordre d'entrée
+    TRAILING = 2     # déplacement des SL / TP
+    MARKET_DATA = 3  # bougies, positions, ordres ouverts
+
+
+# Poids par endpoint, dans l'unité de coût de Kraken Futures (500 unités / 10 s
+# pour les endpoints de trading ; les bougies comptent peu).
+ENDPOINT_COSTS: Dict[str, float] = {
+    "create_order": 10,
+    "edit_order": 10,
+    "cancel_order": 10,
+    "cancel_all_orders": 25,
+    "fetch_positions": 2,
+    "fetch_open_orders": 2,
+    "fetch_balance": 2,
+    "fetch_order": 2,
+    "fetch_ticker": 1,
+    "fetch_time": 1,
+    "fetch_ohlcv": 1,
+    "load_markets": 5,
+}
+
+# Priorité d'un appel fait hors de tout contexte `request_priority`
+_DEFAULT_PRIORITY: Dict[str, Priority] = {
+    "create_order": Priority.PROTECTIVE,
+    "cancel_order": Priority.PROTECTIVE,
+    "cancel_all_orders": Priority.PROTECTIVE,
+    "edit_order": Priority.TRAILING,
+}
+
+_context = threading.local()
+
+
+@contextlib.contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """
+    Classe des requêtes émises par ce thread dans le bloc.
+
+    Les contextes imbriqués ne peuvent que rendre l'appel plus urgent : une
+    annulation faite pendant une sortie d'urgence reste EMERGENCY.
+    """
+    previous = getattr(_context, "priority", None)
+    _context.priority = priority if previous is None else min(previous, priority)
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+
+def current_priority(endpoint: str) -> Priority:
+    priority = getattr(_context, "priority", None)
+    if priority is not None:
+        return priority
+    return _DEFAULT_PRIORITY.get(endpoint, Priority.MARKET_DATA)
+
+
+class RequestScheduler:
+    """
+    Seau à jetons partagé par tous les appels à l'exchange, servis par priorité.
+
+    Un appel attend d'être le plus prioritaire des appels en attente (FIFO
+    à priorité égale) et que le seau contienne son coût. Une sortie d'urgence
+    n'attend jamais le seau : elle peut le mettre à découvert, ce que paient
+    les appels suivants.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._last = clock()
+        self._cond = threading.Condition()
+        self._waiting: list = []
+        self._seq = itertools.count()
+        # requêtes servies et attente cumulée (s) par classe
+        self.served: Dict[Priority, int] = {p: 0 for p in Priority}
+        self.waited: Dict[Priority, float] = {p: 0.0 for p in Priority}
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, cost: float = 1.0, priority: Priority = Priority.MARKET_DATA) -> float:
+        """Bloque jusqu'à obtenir `cost` jetons ; retourne l'attente en secondes."""
+        cost = min(float(cost), self.capacity)
+        t0 = self._clock()
+        with self._cond:
+            ticket = (int(priority), next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiting[0] == ticket and (priority == Priority.EMERGENCY or self._tokens >= cost):
+                        break
+                    # en tête : attendre la recharge du manque ; sinon être réveillé par le départ de la tête
+                    timeout = (cost - self._tokens) / self.rate if self._waiting[0] == ticket else None
+                    self._cond.wait(timeout)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            self._tokens -= cost
+            waited = self._clock() - t0
+            self.served[priority] += 1
+            self.waited[priority] += waited
+        if waited > 1.0:
+            logger.debug("Requête %s servie après %.2f s d'attente", priority.name, waited)
+        return waited
+
+    def call(self, endpoint: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Exécute `fn` après avoir payé le coût de `endpoint` à la priorité courante."""
+        self.acquire(ENDPOINT_COSTS.get(endpoint, 1), current_priority(endpoint))
+        return fn(*args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._cond:
+            return {
+                p.name: {"served": self.served[p], "wait_s": self.waited[p]}
+                for p in Priority
+            }
+
+
+class ScheduledExchange:
+    """
+    Client CCXT dont les appels réseau de `ENDPOINT_COSTS` passent par un
+    `RequestScheduler` ; le reste (marchés, `parse_timeframe`...) est délégué tel quel.
+    """
+
+    def __init__(self, exchange: Any, scheduler: RequestScheduler) -> None:
+        object.__setattr__(self, "_exchange", exchange)
+        object.__setattr__(self, "scheduler", scheduler)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._exchange, name)
+        if name not in ENDPOINT_COSTS or not callable(attr):
+            return attr
+
+        def scheduled(*args: Any, **kwargs: Any) -> Any:
+            return self.scheduler.call(name, attr, *args, **kwargs)
+
+        return scheduled
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._exchange, name, value)
+
+    @property
+    def unwrapped(self) -> Any:
+        return self._exchange
@@ -0,0 +1,344 @@
+# path: execution/sharding.py
+import asyncio
+import itertools
+import logging
+import multiprocessing as mp
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import ccxt
+
+from config import LOOKBACK, TIMEFRAMES
+from data.feed import CandleFeed
+from data.shm_ring import CandleRing, RingFeed
+from execution.engine import AsyncEngine, MultiSymbolEngine, with_retries
+from execution.order_manager import OrderManager
+from execution.position_manager import PositionManager
+from execution.scheduler import ENDPOINT_COSTS, Priority, current_priority, request_priority
+from indicators.streaming import StreamingIndicators
+from risk.strategies.registry import make_from_name
+
+logger = logging.getLogger(__name__)
+
+# méthodes exécutées par le superviseur pour le compte des workers
+REMOTE_METHODS = frozenset(ENDPOINT_COSTS) | {"milliseconds"}
+_ACK = "ack"
+
+
+def _picklable(value: Any) -> Any:
+    """Une exception non sérialisable bloquerait le worker qui l'attend : on la résume."""
+    try:
+        pickle.dumps(value)
+        return value
+    except Exception:
+        return RuntimeError(repr(value))
+
+
+class RemoteExchange:
+    """
+    Client d'exchange d'un worker : chaque appel réseau (`REMOTE_METHODS`) est
+    transmis au superviseur, seul détenteur du client API et de son seau de
+    requêtes, avec la priorité courante du thread appelant. Catalogue de
+    marchés et `has` sont des copies locales.
+    """
+
+    def __init__(self, worker_id: int, requests: Any, responses: Any, markets: Dict[str, Any], has: Dict[str, Any]) -> None:
+        self.worker_id = worker_id
+        self.markets = markets
+        self.has = has
+        self._requests = requests
+        self._responses = responses
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._listener = threading.Thread(target=self._listen, name="rpc-responses", daemon=True)
+        self._listener.start()
+
+    def _listen(self) -> None:
+        while True:
+            msg = self._responses.get()
+            if msg is None:
+                return
+            call_id, ok, value = msg
+            with self._lock:
+                fut = self._pending.pop(call_id, None)
+            if fut is None:
+                continue
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+
+    def _call(self, name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        fut: Future = Future()
+        with self._lock:
+            call_id = next(self._ids)
+            self._pending[call_id] = fut
+        self._requests.put((self.worker_id, call_id, name, args, kwargs, int(current_priority(name))))
+        return fut.result()
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in REMOTE_METHODS:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, args, kwargs)
+
+    def load_markets(self, reload: bool = False) -> Dict[str, Any]:
+        return self.markets
+
+    def market(self, symbol: str) -> Dict[str, Any]:
+        return self.markets[symbol]
+
+    @staticmethod
+    def parse_timeframe(timeframe: str) -> int:
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def ack(self) -> None:
+        """Signale au superviseur la fin du traitement du tick en cours."""
+        self._requests.put((self.worker_id, None, _ACK, (), {}, 0))
+
+    def close(self) -> None:
+        self._responses.put(None)
+
+
+def _worker_main(
+    worker_id: int,
+    symbols: Sequence[str],
+    rings: Dict[Tuple[str, str], Tuple[str, int]],
+    markets: Dict[str, Any],
+    has: Dict[str, Any],
+    requests: Any,
+    responses: Any,
+    ticks: Any,
+    settings: Dict[str, Any],
+) -> None:
+    """Processus worker : un `MultiSymbolEngine` sur ses symboles, données lues dans les anneaux."""
+    # enfant du superviseur : même resource_tracker, le segment reste enregistré à son nom
+    attached = {key: CandleRing.attach(name, capacity, untrack=False) for key, (name, capacity) in rings.items()}
+    exchange = RemoteExchange(worker_id, requests, responses, markets, has)
+    feed = RingFeed(attached, window=settings["window"])
+    name = settings["strategy_name"]
+    engines = []
+    for symbol in symbols:
+        pm = PositionManager(
+            exchange, symbol, OrderManager(exchange, symbol),
+            # None : stratégie legacy du PositionManager
+            strategy=make_from_name(name, **settings["strategy_params"]) if name else None,
+            reconcile_interval=settings["reconcile_interval"],
+            tick_prices=settings["tick_prices"],
+        )
+        pm.load_active()
+        engines.append(AsyncEngine(
+            feed, pm, symbol,
+            StreamingIndicators(settings["timeframes"]["M15"], maxlen=settings["window"]),
+            StreamingIndicators(settings["timeframes"]["M5"], maxlen=settings["window"]),
+            settings["investment_usd"], settings["leverage"], timeframes=settings["timeframes"],
+        ))
+    multi = MultiSymbolEngine(engines, stagger=0.0, max_concurrency=settings["max_concurrency"])
+
+    def next_tick() -> bool:
+        exchange.ack()
+        return ticks.get() is not None
+
+    try:
+        asyncio.run(multi.run(next_tick))
+    finally:
+        exchange.close()
+        for ring in attached.values():
+            ring.close()
+
+
+class ShardSupervisor:
+    """
+    Répartit les symboles entre `n_workers` processus.
+
+    Le superviseur détient l'unique client API (et donc l'unique
+    `RequestScheduler`) : il récupère les bougies une fois, les publie dans
+    des `CandleRing` en mémoire partagée lus sans copie par les workers, et
+    exécute pour eux, par priorité, tous les appels à l'exchange (ordres,
+    positions). Chaque tick est une barrière : le suivant n'est publié
+    qu'une fois que tous les workers ont traité le précédent.
+
+    L'exécuteur d'ordres est un pool de threads de ce processus et non un
+    processus dédié : le superviseur ne fait pas de calcul d'indicateurs,
+    et un processus à part aurait soit son propre client (deux seaux de
+    requêtes pour une même limite d'API), soit imposé un saut IPC de plus
+    à chaque récupération de bougies. Tout le trafic des workers passe
+    ainsi par un seul client et un seul `RequestScheduler`.
+    """
+
+    def __init__(
+        self,
+        exchange: Any,
+        symbols: Sequence[str],
+        n_workers: int,
+        investment_usd: float,
+        leverage: float,
+        strategy_name: Optional[str] = None,
+        strategy_params: Optional[Dict[str, Any]] = None,
+        reconcile_interval: Optional[float] = None,
+        tick_prices: bool = False,
+        window: int = LOOKBACK,
+        clock: Optional[Any] = None,
+        store: Optional[Any] = None,
+        max_concurrency: int = 8,
+        rpc_threads: int = 8,
+        ring_capacity: Optional[int] = None,
+        timeframes: Dict[str, str] = TIMEFRAMES,
+        mp_context: Optional[str] = None,
+    ) -> None:
+        if n_workers <= 0:
+            raise ValueError("n_workers must be positive")
+        self.exchange = exchange
+        self.symbols = list(symbols)
+        self.shards = [s for s in (self.symbols[i::n_workers] for i in range(n_workers)) if s]
+        self.timeframes = dict(timeframes)
+        self.window = window
+        self.clock = clock
+        self.feed = CandleFeed(exchange, window=window, store=store, clock=clock.now_ms if clock else None)
+        self.ring_capacity = ring_capacity or 4 * window
+        self.settings = {
+            "window": window,
+            "timeframes": self.timeframes,
+            "strategy_name": strategy_name,
+            "strategy_params": dict(strategy_params or {}),
+            "reconcile_interval": reconcile_interval,
+            "tick_prices": tick_prices,
+            "investment_usd": investment_usd,
+            "leverage": leverage,
+            "max_concurrency": max_concurrency,
+        }
+        # contexte concret (fork / spawn / forkserver) : `Process` n'est pas déclaré sur BaseContext
+        self._ctx: Any = mp.get_context(mp_context)
+        self._pool = ThreadPoolExecutor(max_workers=rpc_threads, thread_name_prefix="executor")
+        self.rings: Dict[Tuple[str, str], CandleRing] = {}
+        self.workers: List[Any] = []
+        self._requests: Any = None
+        self._responses: List[Any] = []
+        self._ticks: List[Any] = []
+        self._acks: "queue.Queue[int]" = queue.Queue()
+        self._dispatcher: Optional[threading.Thread] = None
+        # appels exécutés pour les workers, par méthode
+        self.calls: Dict[str, int] = {}
+        self._calls_lock = threading.Lock()
+
+    # --- données ---
+    def _poll(self, key: Tuple[str, str]) -> int:
+        symbol, timeframe = key
+        if self.clock is None:
+            return self.feed.poll(symbol, timeframe)
+        return self.clock.poll_closed(self.feed, symbol, timeframe)
+
+    def _publish(self, counts: Dict[Tuple[str, str], int]) -> None:
+        for key, n in counts.items():
+            if n:
+                self.rings[key].append(self.feed.rows(*key, n=n))
+
+    def _fetch_all(self, fn: Callable[[Tuple[str, str]], int]) -> Dict[Tuple[str, str], int]:
+        keys = [(s, tf) for s in self.symbols for tf in self.timeframes.values()]
+
+        def safe(key: Tuple[str, str]) -> int:
+            try:
+                return with_retries(lambda: fn(key), max_retries=3)
+            except Exception as e:
+                logger.warning(f"Bougies {key[0]} {key[1]} non rafraîchies: {e}")
+                return 0
+
+        return dict(zip(keys, self._pool.map(safe, keys)))
+
+    # --- exécuteur ---
+    def _dispatch(self) -> None:
+        while True:
+            msg = self._requests.get()
+            if msg is None:
+                return
+            worker_id, call_id, name, args, kwargs, prio = msg
+            if name == _ACK:
+                self._acks.put(worker_id)
+                continue
+            self._pool.submit(self._execute, worker_id, call_id, name, args, kwargs, Priority(prio))
+
+    def _execute(self, worker_id: int, call_id: int, name: str, args: Any, kwargs: Any, prio: Priority) -> None:
+        with self._calls_lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        try:
+            with request_priority(prio):
+                result = getattr(self.exchange, name)(*args, **kwargs)
+            reply = (call_id, True, _picklable(result))
+        except Exception as e:
+            reply = (call_id, False, _picklable(e))
+        self._responses[worker_id].put(reply)
+
+    def _wait_acks(self, timeout: float = 600.0) -> None:
+        pending = set(range(len(self.workers)))
+        deadline = time.monotonic() + timeout
+        while pending:
+            try:
+                pending.discard(self._acks.get(timeout=1.0))
+            except queue.Empty:
+                dead = [i for i in pending if not self.workers[i].is_alive()]
+                if dead or time.monotonic() > deadline:
+                    raise RuntimeError(f"Workers sans réponse: {sorted(dead or pending)}")
+
+    # --- cycle de vie ---
+    def start(self) -> None:
+        """Historique initial publié dans les anneaux, puis démarrage des workers."""
+        for key in ((s, tf) for s in self.symbols for tf in self.timeframes.values()):
+            self.rings[key] = CandleRing.create(self.ring_capacity)
+        self._publish(self._fetch_all(lambda key: len(self.feed.bootstrap(*key))))
+        markets = {s: self.exchange.markets[s] for s in self.symbols}
+        has = dict(getattr(self.exchange, "has", None) or {})
+        self._requests = self._ctx.Queue()
+        for worker_id, shard in enumerate(self.shards):
+            responses, ticks = self._ctx.Queue(), self._ctx.Queue()
+            rings = {k: (r.name, r.capacity) for k, r in self.rings.items() if k[0] in shard}
+            proc = self._ctx.Process(
+                target=_worker_main,
+                args=(worker_id, shard, rings, markets, has, self._requests, responses, ticks, self.settings),
+                name=f"shard-{worker_id}",
+                daemon=True,
+            )
+            proc.start()
+            self.workers.append(proc)
+            self._responses.append(responses)
+            self._ticks.append(ticks)
+        self._dispatcher = threading.Thread(target=self._dispatch, name="executor-dispatch", daemon=True)
+        self._dispatcher.start()
+        self._wait_acks()
+        logger.info("%d symboles répartis sur %d workers", len(self.symbols), len(self.workers))
+
+    def publish(self) -> int:
+        """Un tick : nouvelles bougies publiées, traitées par tous les workers ; retourne leur nombre."""
+        counts = self._fetch_all(self._poll)
+        self._publish(counts)
+        for ticks in self._ticks:
+            ticks.put(True)
+        self._wait_acks()
+        return sum(counts.values())
+
+    def stop(self) -> None:
+        for ticks in self._ticks:
+            ticks.put(None)
+        for proc in self.workers:
+            proc.join(timeout=30)
+            if proc.is_alive():
+                proc.terminate()
+        if self._requests is not None:
+            self._requests.put(None)
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=5)
+        self._pool.shutdown(wait=True)
+        for ring in self.rings.values():
+            ring.close()
+        self.rings.clear()
+
+    def run(self, next_tick: Callable[[], Any]) -> None:
+        self.start()
+        try:
+            while next_tick():
+                self.publish()
+        finally:
+            self.stop()
@@ -0,0 +1,63 @@
+# path: execution/snapshot.py
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExchangeSnapshot:
+    """
+    Vue des positions et ordres ouverts d'un symbole, partagée pendant un tick.
+
+    Hors tick, chaque lecture interroge l'exchange (comportement historique).
+    Dans un tick (`with snapshot.tick():`), `fetch_positions` et
+    `fetch_open_orders` ne sont appelés qu'une fois chacun ; toute mutation
+    de notre part (création/annulation d'ordre) doit appeler `invalidate()`
+    pour que la lecture suivante reparte de l'exchange. Les erreurs de
+    lecture ne sont pas mises en cache.
+    """
+
+    def __init__(self, exchange: Any, symbol: str) -> None:
+        self.exchange = exchange
+        self.symbol = symbol
+        self._depth = 0
+        self._positions: Optional[List[Dict[str, Any]]] = None
+        self._open_orders: Optional[List[Dict[str, Any]]] = None
+
+    @contextmanager
+    def tick(self) -> Iterator["ExchangeSnapshot"]:
+        """Active le cache pour la durée du bloc (réentrant) ; vidé à la sortie."""
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.invalidate()
+
+    @property
+    def active(self) -> bool:
+        return self._depth > 0
+
+    def invalidate(self) -> None:
+        self._positions = None
+        self._open_orders = None
+
+    def positions(self) -> List[Dict[str, Any]]:
+        """Résultat brut de `fetch_positions([symbol])`."""
+        if self._positions is not None:
+            return self._positions
+        positions = self.exchange.fetch_positions([self.symbol])
+        if self.active:
+            self._positions = positions
+        return positions
+
+    def open_orders(self) -> List[Dict[str, Any]]:
+        """Résultat brut de `fetch_open_orders(symbol=...)`."""
+        if self._open_orders is not None:
+            return self._open_orders
+        opens = self.exchange.fetch_open_orders(symbol=self.symbol)
+        if self.active:
+            self._open_orders = opens
+        return opens
@@ -0,0 +1,323 @@
+# path: indicators/streaming.py
+import math
+import re
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import pandas_ta as ta
+
+from indicators.compute import compute_indicators
+
+NAN = float("nan")
+OHLCV = ["time", "open", "high", "low", "close", "volume"]
+
+
+def _ta_version() -> Tuple[int, int]:
+    """(majeure, mineure) de pandas_ta ; (0, 4) si illisible (seules les 0.4 s'installent encore)."""
+    m = re.match(r"(\d+)\.(\d+)", str(getattr(ta, "version", "") or getattr(ta, "__version__", "")))
+    return (int(m[1]), int(m[2])) if m else (0, 4)
+
+
+# RMA (RSI, ATR) de pandas_ta : 0.3.x = ewm(adjust=True, min_periods=length) ;
+# 0.4.x = ewm(adjust=False), ATR amorcé par la SMA des `length` premiers TR
+LEGACY_RMA = _ta_version() < (0, 4)
+
+
+class _EWM:
+    """
+    Moyenne exponentielle incrémentale, même récurrence que
+    `pandas.Series.ewm(alpha=..., adjust=..., min_periods=...).mean()` (ignore_na=False).
+    """
+
+    __slots__ = ("alpha", "adjust", "min_periods", "weighted", "old_wt", "nobs")
+
+    def __init__(self, alpha: float, adjust: bool, min_periods: int = 0) -> None:
+        self.alpha = alpha
+        self.adjust = adjust
+        self.min_periods = max(int(min_periods), 1)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, x: float) -> float:
+        is_obs = x == x
+        if is_obs:
+            self.nobs += 1
+        if self.weighted == self.weighted:
+            self.old_wt *= 1.0 - self.alpha
+            if is_obs:
+                new_wt = 1.0 if self.adjust else self.alpha
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + new_wt * x) / (self.old_wt + new_wt)
+                self.old_wt = self.old_wt + new_wt if self.adjust else 1.0
+        elif is_obs:
+            self.weighted = x
+        return self.weighted if self.nobs >= self.min_periods else NAN
+
+    def restore(self, values: np.ndarray, weighted: Optional[float] = None) -> None:
+        """
+        Reconstruit l'état après la série `values` sans la rejouer.
+
+        `weighted` peut être fourni (dernière valeur d'une colonne batch) ; sinon il
+        est recalculé par pandas.
+        """
+        obs = ~np.isnan(values)
+        self.nobs = int(obs.sum())
+        if not self.nobs:
+            self.weighted, self.old_wt = NAN, 1.0
+            return
+        if weighted is None:
+            weighted = float(pd.Series(values).ewm(alpha=self.alpha, adjust=self.adjust).mean().iloc[-1])
+        self.weighted = float(weighted)
+        idx = np.flatnonzero(obs)
+        decay = 1.0 - self.alpha
+        if self.adjust:
+            # somme des poids (1-a)^(dernier index - i) sur les observations
+            self.old_wt = float(np.sum(decay ** (len(values) - 1 - idx)))
+        else:
+            self.old_wt = float(decay ** (len(values) - 1 - idx[-1]))
+
+
+class _EMA:
+    """`ta.ema` : SMA des `length` premières valeurs puis ewm(span=length, adjust=False)."""
+
+    __slots__ = ("length", "seed", "ewm")
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self.seed: Optional[List[float]] = []
+        self.ewm = _EWM(2.0 / (length + 1), adjust=False)
+
+    def update(self, x: float) -> float:
+        if self.seed is None:
+            return self.ewm.update(x)
+        self.seed.append(x)
+        if len(self.seed) < self.length:
+            return NAN
+        vals = [v for v in self.seed if v == v]
+        self.seed = None
+        return self.ewm.update(math.fsum(vals) / len(vals) if vals else NAN)
+
+    def restore(self, closes: np.ndarray, column: Optional[np.ndarray]) -> None:
+        if len(closes) < self.length or column is None:
+            # pas de valeur batch exploitable : on rejoue la (courte) série
+            self.seed = []
+            self.ewm = _EWM(self.ewm.alpha, adjust=False)
+            for x in closes:
+                self.update(float(x))
+            return
+        self.seed = None
+        # entrée de l'ewm : NaN puis la SMA en position length-1, puis les closes
+        series = np.array(closes, dtype=float)
+        series[: self.length - 1] = np.nan
+        seeds = closes[: self.length]
+        series[self.length - 1] = np.nanmean(seeds) if (~np.isnan(seeds)).any() else np.nan
+        self.ewm.restore(series, weighted=float(column[-1]))
+
+
+class _RSI:
+    """`ta.rsi` : rma (ewm alpha=1/length) des hausses et des baisses."""
+
+    __slots__ = ("prev", "pos", "neg")
+
+    def __init__(self, length: int, legacy: bool = LEGACY_RMA) -> None:
+        self.prev = NAN
+        min_periods = length if legacy else 0
+        self.pos = _EWM(1.0 / length, adjust=legacy, min_periods=min_periods)
+        self.neg = _EWM(1.0 / length, adjust=legacy, min_periods=min_periods)
+
+    def update(self, close: float) -> float:
+        d = close - self.prev
+        self.prev = close
+        up = self.pos.update(d if d != d else max(d, 0.0))
+        down = self.neg.update(d if d != d else min(d, 0.0))
+        denom = up + abs(down)
+        if denom != denom or denom == 0:
+            return NAN
+        return 100.0 * up / denom
+
+    def restore(self, closes: np.ndarray) -> None:
+        d = np.diff(closes, prepend=np.nan)
+        self.pos.restore(np.where(d < 0, 0.0, d))
+        self.neg.restore(np.where(d > 0, 0.0, d))
+        self.prev = float(closes[-1]) if len(closes) else NAN
+
+
+class _ATR:
+    """
+    `ta.atr` : rma du true range. 0.3.x : premier TR indéfini ; 0.4.x : premier
+    TR = high - low et rma amorcée par la SMA des `length` premiers TR.
+    """
+
+    __slots__ = ("length", "legacy", "prev_close", "started", "seed", "rma")
+
+    def __init__(self, length: int, legacy: bool = LEGACY_RMA) -> None:
+        self.length = length
+        self.legacy = legacy
+        self.prev_close = NAN
+        self.started = False
+        self.seed: Optional[List[float]] = None if legacy else []
+        self.rma = _EWM(1.0 / length, adjust=legacy, min_periods=length if legacy else 0)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.started or not self.legacy:
+            pc = self.prev_close
+            ranges = [abs(v) for v in (high - low, high - pc, pc - low) if v == v]
+            tr = max(ranges) if ranges else NAN
+        else:
+            tr = NAN
+        self.started = True
+        self.prev_close = close
+        if self.seed is None:
+            return self.rma.update(tr)
+        self.seed.append(tr)
+        if len(self.seed) < self.length:
+            return NAN
+        vals = [v for v in self.seed if v == v]
+        self.seed = None
+        return self.rma.update(math.fsum(vals) / len(vals) if vals else NAN)
+
+    def restore(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, column: Optional[np.ndarray]) -> None:
+        if not self.legacy and len(close) < self.length:
+            # amorce SMA incomplète : on rejoue la (courte) série
+            self.prev_close, self.started, self.seed = NAN, False, []
+            self.rma = _EWM(self.rma.alpha, adjust=False)
+            for h, l, c in zip(high, low, close):
+                self.update(float(h), float(l), float(c))
+            return
+        pc = np.concatenate(([np.nan], close[:-1]))
+        ranges = np.abs(np.vstack((high - low, high - pc, pc - low)))
+        all_nan = np.isnan(ranges).all(axis=0)
+        tr = np.where(all_nan, np.nan, np.nanmax(np.where(np.isnan(ranges), -np.inf, ranges), axis=0))
+        if self.legacy and len(tr):
+            tr[0] = np.nan
+        if not self.legacy:
+            self.seed = None
+            seeds = tr[: self.length]
+            tr[: self.length - 1] = np.nan
+            tr[self.length - 1] = np.nanmean(seeds) if (~np.isnan(seeds)).any() else np.nan
+        last = None
+        if column is not None and len(column) and column[-1] == column[-1]:
+            last = float(column[-1])
+        self.rma.restore(tr, weighted=last)
+        self.started = len(close) > 0
+        self.prev_close = float(close[-1]) if len(close) else NAN
+
+
+class _SMA:
+    """`rolling(window, min_periods=1).mean()` sur un buffer circulaire."""
+
+    __slots__ = ("buf",)
+
+    def __init__(self, window: int) -> None:
+        self.buf: Deque[float] = deque(maxlen=window)
+
+    def update(self, x: float) -> float:
+        self.buf.append(x)
+        vals = [v for v in self.buf if v == v]
+        return math.fsum(vals) / len(vals) if vals else NAN
+
+    def restore(self, values: np.ndarray) -> None:
+        self.buf.clear()
+        self.buf.extend(float(v) for v in values[-(self.buf.maxlen or 0):])
+
+
+class StreamingIndicators:
+    """
+    Moteur d'indicateurs incrémental : O(1) par bougie ajoutée.
+
+    Produit les mêmes colonnes que `compute_indicators` pour la timeframe donnée
+    (EMA21/EMA50/RSI14 en 15m ; EMA9/EMA21/RSI7/Vol_SMA5/ATR14 sinon) en gardant
+    les récurrences EMA/Wilder et les buffers circulaires au lieu de tout
+    recalculer. Les `maxlen` dernières lignes sont conservées pour `frame()`.
+    `legacy_rma` choisit la RMA de pandas_ta 0.3.x ou 0.4.x (défaut : celle
+    de la version installée, cf. `LEGACY_RMA`).
+    """
+
+    def __init__(self, timeframe: str, maxlen: int = 100, legacy_rma: bool = LEGACY_RMA) -> None:
+        if maxlen <= 0:
+            raise ValueError("maxlen must be positive")
+        self.timeframe = timeframe
+        self.maxlen = maxlen
+        if timeframe == '15m':
+            self.columns = ["EMA21", "EMA50", "RSI14"]
+            self._ema = {"EMA21": _EMA(21), "EMA50": _EMA(50)}
+            self._rsi: Tuple[str, _RSI] = ("RSI14", _RSI(14, legacy_rma))
+            self._vol: Optional[_SMA] = None
+            self._atr: Optional[_ATR] = None
+        else:
+            self.columns = ["EMA9", "EMA21", "RSI7", "Vol_SMA5", "ATR14"]
+            self._ema = {"EMA9": _EMA(9), "EMA21": _EMA(21)}
+            self._rsi = ("RSI7", _RSI(7, legacy_rma))
+            self._vol = _SMA(5)
+            self._atr = _ATR(14, legacy_rma)
+        self._rows: Deque[Tuple[Any, ...]] = deque(maxlen=maxlen)
+        self._frame: Optional[pd.DataFrame] = None
+
+    def update(self, candle: Sequence[Any]) -> Dict[str, float]:
+        """
+        Ajoute une bougie clôturée (time, open, high, low, close, volume) et
+        retourne les valeurs des indicateurs pour cette bougie.
+        """
+        t, o, h, l, c, v = candle
+        o, h, l, c, v = float(o), float(h), float(l), float(c), float(v)
+        out: Dict[str, float] = {name: ema.update(c) for name, ema in self._ema.items()}
+        out[self._rsi[0]] = self._rsi[1].update(c)
+        if self._vol is not None:
+            out["Vol_SMA5"] = self._vol.update(v)
+        if self._atr is not None:
+            out["ATR14"] = self._atr.update(h, l, c)
+        self._rows.append((t, o, h, l, c, v, *(out[col] for col in self.columns)))
+        self._frame = None
+        return out
+
+    def extend(self, df: pd.DataFrame) -> None:
+        """Ajoute toutes les bougies d'un DataFrame OHLCV (ordre chronologique)."""
+        for row in df[OHLCV].itertuples(index=False, name=None):
+            self.update(row)
+
+    def seed(self, df: pd.DataFrame) -> None:
+        """
+        Initialise l'état depuis un calcul batch.
+
+        `df` est la sortie de `compute_indicators` (ou un OHLCV brut, auquel cas le
+        batch est calculé ici) ; les états EMA/ATR sont repris des colonnes, les
+        moyennes RSI reconstruites de façon vectorisée.
+        """
+        if not set(self.columns).issubset(df.columns):
+            df = compute_indicators(df, self.timeframe)
+        close = df["close"].to_numpy(dtype=float)
+        for name, ema in self._ema.items():
+            ema.restore(close, df[name].to_numpy(dtype=float))
+        self._rsi[1].restore(close)
+        if self._vol is not None:
+            self._vol.restore(df["volume"].to_numpy(dtype=float))
+        if self._atr is not None:
+            self._atr.restore(
+                df["high"].to_numpy(dtype=float),
+                df["low"].to_numpy(dtype=float),
+                close,
+                df["ATR14"].to_numpy(dtype=float),
+            )
+        self._rows.clear()
+        self._rows.extend(df[OHLCV + self.columns].tail(self.maxlen).itertuples(index=False, name=None))
+        self._frame = None
+
+    def frame(self) -> pd.DataFrame:
+        """Dernières lignes au format de `compute_indicators` (mise en cache)."""
+        if self._frame is None:
+            df = pd.DataFrame(list(self._rows), columns=OHLCV + self.columns)
+            if pd.api.types.is_integer_dtype(df["time"]):
+                df["time"] = pd.to_datetime(df["time"], unit="ms")
+            self._frame = df
+        return self._frame
+
+    def last(self) -> Dict[str, float]:
+        """Valeurs des indicateurs sur la dernière bougie."""
+        if not self._rows:
+            return {col: NAN for col in self.columns}
+        row = self._rows[-1]
+        return dict(zip(self.columns, row[len(OHLCV):]))
@@ -1,18 +1,22 @@
 # main.py
+import asyncio
 import logging
-import time
-from data.fetcher import create_exchange, fetch_ohlcv, resolve_symbol
-from indicators.compute import compute_indicators
-from strategy.signal import generate_signal
+from data.clock import CandleClock
+from data.fetcher import create_exchange, resolve_symbol
+from data.markets import MarketCache
+from execution.scheduler import RequestScheduler
+from data.feed import CandleFeed
+from data.store import CandleStore
+from indicators.streaming import StreamingIndicators
 # plus besoin de place_market_order direct
+from execution.engine import AsyncEngine, MultiSymbolEngine
+from execution.sharding import ShardSupervisor
 from execution.order_manager import OrderManager
 from execution.position_manager import PositionManager
-from config import SYMBOL, TIMEFRAMES, LOOKBACK, POLL_INTERVAL, INVESTMENT_USD, LEVERAGE, STRATEGY, STRATEGY_PARAMS
+from config import SYMBOL, SYMBOLS, SYMBOL_STAGGER, MAX_CONCURRENT_SYMBOLS, SHARD_WORKERS, SHARD_MP_CONTEXT, TIMEFRAMES, LOOKBACK, POLL_INTERVAL, CANDLE_CLOSE_GRACE, CANDLE_MAX_WAIT, INVESTMENT_USD, LEVERAGE, STRATEGY, STRATEGY_PARAMS, CANDLE_STORE_DIR, ORDER_RECONCILE_INTERVAL, TICK_PRICES, MARKET_CACHE_PATH, MARKET_CACHE_TTL, REQUEST_RATE, REQUEST_BURST
 import argparse
 from risk.strategies.registry import make_from_name
-import random
-from typing import Callable, TypeVar
-import ccxt
+import pandas as pd
 
 
 # ========== LOGGER ==========
@@ -26,32 +30,6 @@ logging.basicConfig(
     ]
 )
 logger = logging.getLogger(__name__)
-T = TypeVar("T")
-
-RETRYABLE_EXC = (
-    ccxt.NetworkError,
-    ccxt.RequestTimeout,
-    ccxt.DDoSProtection,
-    ccxt.ExchangeNotAvailable,
-    )
-
-def with_retries(fn: Callable[[], T], *, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0) -> T:
-    """Exécute fn avec retries exponentiels + jitter, ne lève que si tous les essais échouent."""
-    attempt = 0
-    while True:
-        try:
-            return fn()
-        except RETRYABLE_EXC as e:
-            attempt += 1
-            if attempt > max_retries:
-                logging.error("API temporairement indisponible après %d tentatives: %s", attempt - 1, e)
-                raise
-            backoff = min(base_delay * (2 ** (attempt - 1)), max_delay)
-            # jitter ±20%
-            jitter = backoff * (0.2 * (2 * random.random() - 1))
-            sleep_s = max(0.0, backoff + jitter)
-            logging.warning("Erreur réseau (%s). Nouvelle tentative dans %.2fs (essai %d/%d)...", type(e).__name__, sleep_s, attempt, max_retries)
-            time.sleep(sleep_s)
 
 def _parse_args():
     parser = argparse.ArgumentParser(description="Bot trading")
@@ -73,14 +51,43 @@ def _parse_args():
         default=None,
         help="Multiplicateur >= 0 pour bump TP (ex: 1.0)."
     )
+    parser.add_argument(
+        "--paper",
+        action="store_true",
+        help="Paper trading : exchange simulé rejouant le CandleStore, sans appel API."
+    )
+    parser.add_argument("--paper-start", default=None, help="Début du rejeu paper (date ISO).")
+    parser.add_argument("--paper-end", default=None, help="Fin du rejeu paper (date ISO).")
+    parser.add_argument("--paper-balance", type=float, default=1000.0, help="Capital initial paper (USD).")
     return parser.parse_args()
+
+
+def _create_paper_exchange(args):
+    from simulation.paper import create_paper_exchange
+
+    if not CANDLE_STORE_DIR:
+        raise SystemExit("--paper requiert CANDLE_STORE_DIR (stockage des bougies rejouées)")
+    ms = lambda s: None if s is None else int(pd.Timestamp(s).value // 10**6)  # noqa: E731
+    return create_paper_exchange(
+        CANDLE_STORE_DIR, start=ms(args.paper_start), end=ms(args.paper_end), balance=args.paper_balance
+    )
+
+
 def main():
-    # Création du client et résolution du symbole
-    exchange = create_exchange()
-    ccxt_symbol = resolve_symbol(exchange, SYMBOL)
-    logger.info(f"> Utilisation du ticker CCXT : {ccxt_symbol}")
-      # 🔸 CLI overrides
+    # 🔸 CLI overrides
     args = _parse_args()
+    # Création du client (ou de l'exchange simulé en paper) et résolution du symbole
+    if args.paper:
+        exchange = _create_paper_exchange(args)
+    else:
+        market_cache = MarketCache(MARKET_CACHE_PATH, MARKET_CACHE_TTL) if MARKET_CACHE_PATH else None
+        # toutes les requêtes (bougies, ordres, positions) partagent un seau servi par priorité
+        scheduler = RequestScheduler(REQUEST_RATE, REQUEST_BURST)
+        exchange = create_exchange(market_cache, scheduler=scheduler)
+    # le rejeu paper ne simule qu'un contrat
+    symbol_ids = [SYMBOL] if args.paper else SYMBOLS
+    ccxt_symbols = [resolve_symbol(exchange, sid) for sid in symbol_ids]
+    logger.info(f"> Utilisation des tickers CCXT : {', '.join(ccxt_symbols)}")
     # stratégie finale = CLI > config.py
     if args.strategy in (None, "none", "legacy"):
         strategy_name = STRATEGY  # peut être None
@@ -94,69 +101,71 @@ def main():
     if args.rho is not None:
         params["rho"] = args.rho
 
-    strategy = make_from_name(strategy_name, **(params or {}))
-    if strategy is None:
+    if strategy_name is None:
         logger.info("> Stratégie: legacy (SL-only)")
     else:
         logger.info(f"> Stratégie: {strategy_name} params={params}")
 
-    # Instanciation du PositionManager
-    om = OrderManager(exchange, ccxt_symbol)
-    pm = PositionManager(exchange, ccxt_symbol, om, strategy=strategy)
-    pm.load_active()
-    
     # Chargement historique
-    # Chargement initial résilient (réseau)
-    _df_m15 = compute_indicators(
-        with_retries(lambda: fetch_ohlcv(exchange, ccxt_symbol, TIMEFRAMES['M15'], LOOKBACK)),
-        TIMEFRAMES['M15'],
-    )
-    _df_m5 = compute_indicators(
-        with_retries(lambda: fetch_ohlcv(exchange, ccxt_symbol, TIMEFRAMES['M5'], LOOKBACK)),
-        TIMEFRAMES['M5'],
+    # Chargement initial résilient (réseau) ; ensuite seules les nouvelles bougies sont demandées
+    # en paper, le stockage est la source rejouée : on ne le réécrit pas
+    store = CandleStore(CANDLE_STORE_DIR) if CANDLE_STORE_DIR and not args.paper else None
+    # en live : réveil juste après chaque clôture M5/M15, à l'heure du serveur
+    clock = None
+    if not args.paper:
+        live_clock = CandleClock(
+            exchange, TIMEFRAMES.values(), grace=CANDLE_CLOSE_GRACE, poll_interval=POLL_INTERVAL, max_wait=CANDLE_MAX_WAIT
+        )
+        live_clock.sync()
+        clock = live_clock
+
+    # Symboles répartis sur des processus workers : ce processus lit les bougies et passe les ordres pour eux
+    if SHARD_WORKERS > 0 and not args.paper:
+        ShardSupervisor(
+            exchange, ccxt_symbols, SHARD_WORKERS, INVESTMENT_USD, LEVERAGE,
+            strategy_name=strategy_name, strategy_params=params, reconcile_interval=ORDER_RECONCILE_INTERVAL,
+            tick_prices=TICK_PRICES,
+            window=LOOKBACK, clock=clock, store=store, max_concurrency=MAX_CONCURRENT_SYMBOLS,
+            mp_context=SHARD_MP_CONTEXT,
+        ).run(lambda: live_clock.wait() or True)
+        return
+
+    feed = CandleFeed(exchange, window=LOOKBACK, store=store, clock=clock.now_ms if clock else None)
+
+    # Un OrderManager / PositionManager / jeu d'indicateurs par contrat ; client, seau de
+    # requêtes, horloge et flux partagés
+    engines = []
+    for ccxt_symbol in ccxt_symbols:
+        om = OrderManager(exchange, ccxt_symbol)
+        pm = PositionManager(
+            exchange, ccxt_symbol, om,
+            strategy=make_from_name(strategy_name, **(params or {})),
+            reconcile_interval=ORDER_RECONCILE_INTERVAL, tick_prices=TICK_PRICES,
+        )
+        pm.load_active()
+        # Indicateurs : calcul batch une fois, puis mise à jour O(1) par bougie clôturée
+        engines.append(AsyncEngine(
+            feed, pm, ccxt_symbol,
+            StreamingIndicators(TIMEFRAMES['M15'], maxlen=LOOKBACK),
+            StreamingIndicators(TIMEFRAMES['M5'], maxlen=LOOKBACK),
+            INVESTMENT_USD, LEVERAGE, clock=clock,
+        ))
+    engine = MultiSymbolEngine(
+        engines, stagger=0.0 if args.paper else SYMBOL_STAGGER, max_concurrency=MAX_CONCURRENT_SYMBOLS
     )
-    logger.info("Initialisation des données terminée.")
-
-    # Boucle principale
-    while True:
-        time.sleep(POLL_INTERVAL)
-        size = INVESTMENT_USD * LEVERAGE / _df_m5.close.iloc[-1]
-     
-        # Mise à jour M5
-        try:
-            new5 = with_retries(lambda: fetch_ohlcv(exchange, ccxt_symbol, TIMEFRAMES['M5'], LOOKBACK), max_retries=3)
-        except RETRYABLE_EXC:
-            logger.warning("Skip tick: données M5 non rafraîchies (réseau).")
-            continue
-        if new5.time.iloc[-1] != _df_m5.time.iloc[-1]:
-            _df_m5 = compute_indicators(new5, TIMEFRAMES['M5'])
-            current_price = _df_m5.close.iloc[-1]
-            pm.watchdog(current_price)
-            pm.update_trail(_df_m5)
-            pm.check_exit()
-            sig = generate_signal(_df_m15, _df_m5)
-            logger.info(f"Signal reçu : {sig}")
-
-            if not pm.active:
-                if sig['long']:
-                    size = INVESTMENT_USD * LEVERAGE / _df_m5.close.iloc[-1]
-                    pm.open_position('buy', _df_m5.close.iloc[-1], size)
-                elif sig['short']:
-                    size = INVESTMENT_USD * LEVERAGE / _df_m5.close.iloc[-1]
-                    pm.open_position('sell', _df_m5.close.iloc[-1], size)
-            else:
-                pm.update_trail(_df_m5)
-
-            pm.check_exit()
-
-        # Mise à jour M15
-        try:
-            new15 = with_retries(lambda: fetch_ohlcv(exchange, ccxt_symbol, TIMEFRAMES['M15'], LOOKBACK), max_retries=3)
-        except RETRYABLE_EXC:
-            logger.info("Impossible de rafraîchir M15 sur ce tour ; on réessaiera au suivant.")
-            continue
-        if new15.time.iloc[-1] != _df_m15.time.iloc[-1]:
-            _df_m15 = compute_indicators(new15, TIMEFRAMES['M15'])
+
+    # Boucle principale asyncio, pilotée par les clôtures de bougies ; en paper, par la bougie suivante du rejeu
+    if args.paper:
+        next_tick = exchange.advance_ticks
+    else:
+        next_tick = lambda: live_clock.wait() or True  # noqa: E731
+    asyncio.run(engine.run(next_tick))
+
+    if args.paper:
+        logger.info(
+            "Fin du rejeu paper : %d trades, equity %.2f USD, frais %.2f USD",
+            len(exchange.trades), exchange.equity(), exchange.fees,
+        )
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING, Callable, Dict, TypedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, TypedDict
 
 if TYPE_CHECKING:
     # Import uniquement pour le typage (évite les cycles runtime)
@@ -17,12 +17,20 @@ class Rule(TypedDict):
     action: Callable[["PositionManager"], None]
 
 
+def _level(pm: "PositionManager", key: str) -> float:
+    """SL / TP de l'état en prix ; le PositionManager peut les tenir en ticks."""
+    state: Dict[str, Any] = pm.active or {}
+    value = state.get(key, 0.0)
+    price_of = getattr(pm, "price_of", None)
+    return float(price_of(value) if price_of is not None else value)
+
+
 def _cond_sl(pm: "PositionManager", price: float) -> bool:
     state = pm.active
     if not state:
         return False
     side = state.get("side")
-    sl = float(state.get("current_sl_price", 0.0))
+    sl = _level(pm, "current_sl_price")
     if side == "buy":
         return price <= sl
     if side == "sell":
@@ -39,7 +47,7 @@ def _cond_tp(pm: "PositionManager", price: float) -> bool:
     if not state:
         return False
     side = state.get("side")
-    tp = float(state.get("tp_price", 0.0))
+    tp = _level(pm, "tp_price")
     if side == "buy":
         return price >= tp
     if side == "sell":
@@ -1,12 +1,18 @@
 # path: risk/sl_tp.py
 from indicators.compute import compute_indicators
 from data.fetcher import create_exchange, fetch_ohlcv, resolve_symbol
+from data.markets import market_tick_size
 from utils.price_utils import align_price
 from typing import Any, Dict
+import weakref
 
 # Constants (peuvent être redéfinies au besoin)
 TF_M5 = "5m"
 LOOKBACK = 100
+DEFAULT_ATR_MULTIPLIER = 1.5
+
+# tick size par exchange puis symbole (métadonnées stables : lues une fois)
+_TICK_CACHE: "weakref.WeakKeyDictionary[Any, Dict[str, float]]" = weakref.WeakKeyDictionary()
 
 def _get_tick_size(exchange: Any, symbol: str) -> float:
     """
@@ -16,49 +22,36 @@ def _get_tick_size(exchange: Any, symbol: str) -> float:
     Sinon utilise la précision décimale (price precision) ou step si disponible.
     """
     exchange.load_markets()
-    m = exchange.market(symbol)
-    tick = (
-        (m.get("info") or {}).get("tickSize")
-        or m.get("tickSize")
-    )
-    if tick is not None:
-        return float(tick)
-    prec = (m.get("precision") or {}).get("price")
-    if isinstance(prec, int):
-        return 10 ** (-prec)
-    step = (((m.get("limits") or {}).get("price") or {}).get("step"))
-    if step is not None:
-        return float(step)
-    raise ValueError(f"Impossible de déterminer le tick size pour {symbol}")
- 
-def calculate_initial_sl_tp(exchange: Any, symbol: str, entry_price: float, side: str, atr_multiplier: float = 1.5) -> Dict[str, float]:
+    tick = market_tick_size(exchange.market(symbol))
+    if tick is None:
+        raise ValueError(f"Impossible de déterminer le tick size pour {symbol}")
+    return tick
+
+
+def get_tick_size(exchange: Any, symbol: str) -> float:
+    """`_get_tick_size` mis en cache par exchange : `load_markets` n'est appelé qu'au premier accès."""
+    try:
+        per_symbol = _TICK_CACHE.setdefault(exchange, {})
+    except TypeError:  # exchange non référençable faiblement : pas de cache
+        return _get_tick_size(exchange, symbol)
+    if symbol not in per_symbol:
+        per_symbol[symbol] = _get_tick_size(exchange, symbol)
+    return per_symbol[symbol]
+
+
+def sl_tp_from_distance(entry_price: float, side: str, trail_dist: float, tick: float) -> Dict[str, float]:
     """
-    Calcule les prix de Stop Loss (SL) et Take Profit (TP) initiaux
-    en fonction de l'ATR14 du timeframe 5m.
+    SL/TP alignés sur le tick à partir d'une distance de trailing déjà connue
+    (SL à `trail_dist`, TP à 2 × `trail_dist` du prix d'entrée).
 
-    :param entry_price: prix d'entrée
-    :param side: 'buy' ou 'sell'
-    :param atr_multiplier: multiple de l'ATR pour la distance du SL
     :return: dict { 'sl_price': float, 'tp_price': float, 'trail_dist': float }
     """
-    # 1. Récupérer OHLCV M5 et calculer ATR14
-    df5 = fetch_ohlcv(exchange, symbol, TF_M5, LOOKBACK)
-    df5 = compute_indicators(df5, TF_M5)
-    atr = float(df5.iloc[-1].ATR14)
-
-    # 2. Distance de trailing = atr * multiplier
-    trail_dist = atr * atr_multiplier
-
-    # 3. Calcul des prix bruts
     if side == 'buy':
         sl_raw = entry_price - trail_dist
         tp_raw = entry_price + 2 * trail_dist
     else:
         sl_raw = entry_price + trail_dist
         tp_raw = entry_price - 2 * trail_dist
-
-    # 4. Alignement sur le tick le plus proche
-    tick = _get_tick_size(exchange, symbol)
     # Pour un achat : SL arrondi vers le BAS, TP vers le HAUT (inverse pour une vente)
     if side == 'buy':
         sl_price = align_price(sl_raw, tick, mode="down")
@@ -68,6 +61,28 @@ def calculate_initial_sl_tp(exchange: Any, symbol: str, entry_price: float, side
         tp_price = align_price(tp_raw, tick, mode="down")
     return { 'sl_price': sl_price, 'tp_price': tp_price, 'trail_dist': trail_dist }
 
+
+def calculate_initial_sl_tp(exchange: Any, symbol: str, entry_price: float, side: str, atr_multiplier: float = DEFAULT_ATR_MULTIPLIER) -> Dict[str, float]:
+    """
+    Calcule les prix de Stop Loss (SL) et Take Profit (TP) initiaux
+    en fonction de l'ATR14 du timeframe 5m.
+
+    :param entry_price: prix d'entrée
+    :param side: 'buy' ou 'sell'
+    :param atr_multiplier: multiple de l'ATR pour la distance du SL
+    :return: dict { 'sl_price': float, 'tp_price': float, 'trail_dist': float }
+    """
+    # 1. Récupérer OHLCV M5 et calculer ATR14
+    df5 = fetch_ohlcv(exchange, symbol, TF_M5, LOOKBACK)
+    df5 = compute_indicators(df5, TF_M5)
+    atr = float(df5.iloc[-1].ATR14)
+
+    # 2. Distance de trailing = atr * multiplier
+    trail_dist = atr * atr_multiplier
+
+    # 3. Prix alignés sur le tick (tick size en cache après le premier appel)
+    return sl_tp_from_distance(entry_price, side, trail_dist, get_tick_size(exchange, symbol))
+
 def place_sl_tp_orders(exchange: Any, symbol: str, side: str, size: float, sl_price: float, tp_price: float) -> Dict[str, str]:
     """
     Passe deux ordres de clôture : Stop-Limit (SL) et Limit (TP) en mode reduceOnly.
@@ -1,14 +1,57 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional, Literal, Protocol
+from typing import Optional, Literal, Protocol, Union, overload
+
+import numpy as np
+
+from utils.price_utils import (
+    align_price,
+    align_prices,
+    price_to_ticks,
+    prices_to_ticks,
+    ticks_to_price,
+    ticks_to_prices,
+)
 
 Side = Literal["buy", "sell"]
+# SL / TP d'état : prix flottant, ou nombre entier de ticks si ctx.ticks
+Price = Union[int, float]
 
 @dataclass(frozen=True)
 class StrategyContext:
     symbol: str
     side: Side
     tick_size: float = 0.01
+    # True : SL / TP du snapshot et de l'état désiré en nombre entier de ticks
+    ticks: bool = False
+
+    def align(self, price: float, mode: Literal["down", "up"]) -> Price:
+        """Prix aligné sur le tick, dans le domaine de l'état (float ou ticks)."""
+        if self.ticks:
+            return price_to_ticks(price, self.tick_size, mode)
+        return align_price(price, self.tick_size, mode)
+
+    @overload
+    def price(self, value: None) -> None: ...
+    @overload
+    def price(self, value: Price) -> float: ...
+    def price(self, value: Optional[Price]) -> Optional[float]:
+        """SL / TP de l'état en prix flottant (identité hors domaine ticks)."""
+        if value is None or not self.ticks:
+            return value
+        return ticks_to_price(int(value), self.tick_size)
+
+    def align_array(self, prices: np.ndarray, mode: Literal["down", "up"]) -> np.ndarray:
+        """`align` sur un tableau (float64, ou int64 en domaine ticks)."""
+        if self.ticks:
+            return prices_to_ticks(prices, self.tick_size, mode)
+        return align_prices(prices, self.tick_size, mode)
+
+    def price_array(self, values: np.ndarray) -> np.ndarray:
+        """`price` sur un tableau."""
+        if self.ticks:
+            return ticks_to_prices(values, self.tick_size)
+        return np.asarray(values, dtype=np.float64)
 
 @dataclass(frozen=True)
 class PositionSnapshot:
@@ -16,17 +59,23 @@ class PositionSnapshot:
     current_price: float
     qty_open: float                 # quantité totale ouverte au départ
     qty_remaining: float            # quantité restante (après fills partiels éventuels)
-    sl_current: Optional[float]     # SL actuel si déjà posé
-    tp_current: Optional[float]     # TP actuel (restant) si déjà posé
-    tp_initial: Optional[float]     # TP initial à l’ouverture (référence pour le seuil θ)
+    sl_current: Optional[Price]     # SL actuel si déjà posé (ticks si ctx.ticks)
+    tp_current: Optional[Price]     # TP actuel (restant) si déjà posé (ticks si ctx.ticks)
+    tp_initial: Optional[Price]     # TP initial à l’ouverture, référence pour le seuil θ (ticks si ctx.ticks)
     trail_dist: float               # distance de trailing (unité prix)
 
 @dataclass(frozen=True)
 class DesiredState:
-    sl_price: Optional[float]
-    tp_price: Optional[float]       # simple TP (pas de paliers dans ce squelette)
+    sl_price: Optional[Price]       # ticks si ctx.ticks
+    tp_price: Optional[Price]       # simple TP (pas de paliers dans ce squelette) ; ticks si ctx.ticks
     debug: dict                     # infos pour logs/tests
 
+@dataclass(frozen=True)
+class TargetPath:
+    """États désirés successifs le long d'un chemin de prix (un élément par prix)."""
+    sl_price: np.ndarray            # int64 si ctx.ticks
+    tp_price: np.ndarray            # int64 si ctx.ticks ; NaN si pas de TP
+
 @dataclass(frozen=True)
 class FillEvent:
     price: float
@@ -1,8 +1,15 @@
 from __future__ import annotations
+import dataclasses
 from dataclasses import dataclass
-from typing import Optional
-from .base import TrailingStrategy, StrategyContext, PositionSnapshot, DesiredState
-from utils.price_utils import align_price
+from typing import List, Literal, Optional, Sequence, Union
+
+import numpy as np
+
+from .base import TrailingStrategy, StrategyContext, PositionSnapshot, DesiredState, Price, TargetPath
+from utils.price_utils import _eps_units, price_to_ticks, ticks_to_prices
+
+# pas de TP mal estimés corrigés avant de repasser à la boucle scalaire
+_MAX_REPAIRS = 64
 # --- NEW: simple config dtos ---
 @dataclass(frozen=True)
 class TrailingSLOnlyConfig:
@@ -14,8 +21,52 @@ class TrailingSLAndTPConfig:
     theta: float = 0.5
     rho: float = 1.0
 # --------------------------------
+
+
+def _state_array(values: Sequence[Optional[Price]], ctx: StrategyContext) -> np.ndarray:
+    """SL / TP d'état en tableau (int64 en domaine ticks) ; None devient NaN."""
+    if any(v is None for v in values):
+        return np.array([np.nan if v is None else float(v) for v in values])
+    return np.array(values, dtype=np.int64 if ctx.ticks else np.float64)
+
+
+class _PathTargets:
+    """
+    `compute_targets` appliqué le long d'un chemin de prix : à chaque prix,
+    le SL / TP désirés au prix précédent deviennent les SL / TP courants.
+    Les sous-classes calculent la trajectoire par tableaux ; `_scalar_path`
+    est la référence (boucle sur `compute_targets`) et le repli.
+    """
+
+    def _scalar_path(self, prices: np.ndarray, snap: PositionSnapshot, ctx: StrategyContext) -> TargetPath:
+        sl, tp = snap.sl_current, snap.tp_current
+        sls: List[Optional[Price]] = []
+        tps: List[Optional[Price]] = []
+        for price in prices:
+            d = self.compute_targets(  # type: ignore[attr-defined]
+                dataclasses.replace(snap, current_price=float(price), sl_current=sl, tp_current=tp), ctx
+            )
+            sl, tp = d.sl_price, d.tp_price
+            sls.append(sl)
+            tps.append(tp)
+        return TargetPath(sl_price=_state_array(sls, ctx), tp_price=_state_array(tps, ctx))
+
+    def compute_targets_paths(
+        self,
+        prices: Sequence[Sequence[float]],
+        snaps: Sequence[PositionSnapshot],
+        ctx: Union[StrategyContext, Sequence[StrategyContext]],
+    ) -> List[TargetPath]:
+        """Plusieurs trades : un chemin de prix par snapshot ; `ctx` commun ou un par trade."""
+        ctxs = [ctx] * len(snaps) if isinstance(ctx, StrategyContext) else list(ctx)
+        return [
+            self.compute_targets_path(p, s, c)  # type: ignore[attr-defined]
+            for p, s, c in zip(prices, snaps, ctxs)
+        ]
+
+
 @dataclass(frozen=True)
-class TrailingSLOnly(TrailingStrategy):
+class TrailingSLOnly(_PathTargets, TrailingStrategy):
     """
     Trailing stop simple: on remonte (long) / on abaisse (short) le SL avec une distance fixe.
     Le TP n'est jamais modifié ici.
@@ -27,12 +78,12 @@ class TrailingSLOnly(TrailingStrategy):
         dist = snap.trail_dist
 
         if side == "buy":
-            sl_target = max(snap.sl_current or (snap.entry_price - dist), price - dist)
-            sl_target = align_price(sl_target, ctx.tick_size, mode="up")
+            sl_target = max(ctx.price(snap.sl_current) or (snap.entry_price - dist), price - dist)
+            sl_target = ctx.align(sl_target, mode="up")
             tp_target = snap.tp_current or snap.tp_initial
         else:
-            sl_target = min(snap.sl_current or (snap.entry_price + dist), price + dist)
-            sl_target = align_price(sl_target, ctx.tick_size, mode="down")
+            sl_target = min(ctx.price(snap.sl_current) or (snap.entry_price + dist), price + dist)
+            sl_target = ctx.align(sl_target, mode="down")
             tp_target = snap.tp_current or snap.tp_initial
 
         return DesiredState(
@@ -41,12 +92,39 @@ class TrailingSLOnly(TrailingStrategy):
             debug={"kind": "TrailingSLOnly"}
         )
 
+    def compute_targets_path(self, prices: Sequence[float], snap: PositionSnapshot, ctx: StrategyContext) -> TargetPath:
+        """
+        Trajectoire SL / TP de `compute_targets` le long de `prices`, au bit près.
+
+        L'alignement est monotone : le SL au prix k est l'alignement du max
+        (long) / min (short) cumulé de (SL initial, prix - dist...). Cette forme
+        suppose que réaligner un SL le laisse inchangé et qu'aucun SL n'est
+        nul (`sl_current or ...`) ; sinon, boucle scalaire.
+        """
+        p = np.asarray(prices, dtype=np.float64)
+        if not len(p) or not np.isfinite(p).all():
+            return self._scalar_path(p, snap, ctx)
+        dist = snap.trail_dist
+        mode: Literal["down", "up"]
+        if ctx.side == "buy":
+            mode = "up"
+            start = ctx.price(snap.sl_current) or (snap.entry_price - dist)
+            sl = ctx.align_array(np.maximum.accumulate(np.maximum(p - dist, start)), mode)
+        else:
+            mode = "down"
+            start = ctx.price(snap.sl_current) or (snap.entry_price + dist)
+            sl = ctx.align_array(np.minimum.accumulate(np.minimum(p + dist, start)), mode)
+        if (sl == 0).any() or (ctx.align_array(ctx.price_array(sl), mode) != sl).any():
+            return self._scalar_path(p, snap, ctx)
+        tp = np.repeat(_state_array([snap.tp_current or snap.tp_initial], ctx), len(p))
+        return TargetPath(sl_price=sl, tp_price=tp)
+
     def on_fill(self, snap, fill) -> None:
         # Pas d’état interne à maintenir dans ce squelette
         return
 
 @dataclass(frozen=True)
-class TrailingSLAndTP(TrailingStrategy):
+class TrailingSLAndTP(_PathTargets, TrailingStrategy):
     """
     Trailing SL + bump éventuel du TP:
       - on trail le SL comme ci-dessus;
@@ -66,44 +144,124 @@ class TrailingSLAndTP(TrailingStrategy):
         if snap.tp_initial is None:
             return TrailingSLOnly().compute_targets(snap, ctx)
 
-        # ✅ normalisation des alias locaux
-        tick = ctx.tick_size
+        # ✅ normalisation des alias locaux ; SL / TP restent dans le domaine de l'état
         side = ctx.side
         price = float(snap.current_price)
         dist = float(snap.trail_dist)
         entry = float(snap.entry_price)
-        tp0 = float(snap.tp_initial)
+        tp0 = float(ctx.price(snap.tp_initial))
         current_sl = snap.sl_current
-        current_tp = snap.tp_current if snap.tp_current is not None else tp0
+        current_tp = snap.tp_current if snap.tp_current is not None else snap.tp_initial
 
         dbg = {"kind": "TrailingSLAndTP", "theta": self.theta, "rho": self.rho}
 
         if side == "buy":
-            sl_cand = align_price(price - dist, tick, mode="down")
+            sl_cand = ctx.align(price - dist, mode="down")
             if current_sl is not None:
                 sl_cand = max(sl_cand, current_sl)  # SL monotone ↑
 
             threshold = entry + self.theta * (tp0 - entry)
             tp_next = current_tp
-            if sl_cand >= threshold:
-                bump = self.rho * (sl_cand - threshold)
-                tp_next = align_price(current_tp + bump, tick, mode="up")
+            if ctx.price(sl_cand) >= threshold:
+                bump = self.rho * (ctx.price(sl_cand) - threshold)
+                tp_next = ctx.align(ctx.price(current_tp) + bump, mode="up")
 
             return DesiredState(sl_price=sl_cand, tp_price=tp_next, debug=dbg)
 
         else:  # "sell"
             # miroir côté short
-            sl_cand = align_price(price - dist, tick, mode="down")
+            sl_cand = ctx.align(price - dist, mode="down")
             if current_sl is not None:
                 sl_cand = min(sl_cand, current_sl)  # SL monotone ↓
 
             threshold = entry - self.theta * (entry - tp0)
             tp_next = current_tp
-            if sl_cand <= threshold:
-                bump = self.rho * (threshold - sl_cand)
-                tp_next = align_price(current_tp - bump, tick, mode="down")
+            if ctx.price(sl_cand) <= threshold:
+                bump = self.rho * (threshold - ctx.price(sl_cand))
+                tp_next = ctx.align(ctx.price(current_tp) - bump, mode="down")
 
             return DesiredState(sl_price=sl_cand, tp_price=tp_next, debug=dbg)
+
+    def compute_targets_path(self, prices: Sequence[float], snap: PositionSnapshot, ctx: StrategyContext) -> TargetPath:
+        """
+        Trajectoire SL / TP de `compute_targets` le long de `prices`, au bit près.
+
+        SL : max (long) / min (short) cumulé des candidats alignés. TP : chaque
+        bump ρ·(SL - seuil) ajoute un nombre de ticks estimé en bloc (somme
+        cumulée) ; chaque pas est ensuite recalculé depuis le TP précédent de la
+        trajectoire et, au moindre écart, la boucle scalaire fait foi.
+        """
+        tp_initial = snap.tp_initial
+        if tp_initial is None:
+            return TrailingSLOnly().compute_targets_path(prices, snap, ctx)
+        p = np.asarray(prices, dtype=np.float64)
+        if not len(p) or not np.isfinite(p).all():
+            return self._scalar_path(p, snap, ctx)
+
+        buy = ctx.side == "buy"
+        dist = float(snap.trail_dist)
+        entry = float(snap.entry_price)
+        tp0 = float(ctx.price(tp_initial))
+        tp_start = snap.tp_current if snap.tp_current is not None else tp_initial
+
+        # même candidat des deux côtés, comme compute_targets
+        cand = ctx.align_array(p - dist, "down")
+        if buy:
+            sl = np.maximum.accumulate(cand)
+            if snap.sl_current is not None:
+                sl = np.maximum(sl, snap.sl_current)
+            threshold = entry + self.theta * (tp0 - entry)
+            sl_px = ctx.price_array(sl)
+            bumped = sl_px >= threshold
+            bump = self.rho * (sl_px - threshold)
+        else:
+            sl = np.minimum.accumulate(cand)
+            if snap.sl_current is not None:
+                sl = np.minimum(sl, snap.sl_current)
+            threshold = entry - self.theta * (entry - tp0)
+            sl_px = ctx.price_array(sl)
+            bumped = sl_px <= threshold
+            bump = self.rho * (threshold - sl_px)
+
+        tp = np.repeat(_state_array([tp_start], ctx), len(p))
+        if not bumped.any():
+            return TargetPath(sl_price=sl, tp_price=tp)
+
+        mode: Literal["down", "up"] = "up" if buy else "down"
+        tick = ctx.tick_size
+        first = int(np.argmax(bumped))
+        base = float(ctx.price(tp_start))
+        x0 = base + bump[first] if buy else base - bump[first]
+        # ticks ajoutés par chaque bump suivant, estimés d'un bloc
+        eps = _eps_units(tick)
+        step = np.where(bumped, np.ceil(bump / tick - eps) if buy else np.floor(eps - bump / tick), 0.0)
+        step[: first + 1] = 0.0
+        idx = price_to_ticks(x0, tick, mode) + np.cumsum(step).astype(np.int64)
+
+        # vérification : chaque bump recalculé depuis le TP précédent ; un pas
+        # mal estimé est corrigé et la suite décalée d'autant
+        later = np.flatnonzero(bumped)
+        later = later[later > first]
+        for _ in range(_MAX_REPAIRS):
+            vals = idx if ctx.ticks else ticks_to_prices(idx, tick)
+            prev = ctx.price_array(vals[later - 1])
+            x = prev + bump[later] if buy else prev - bump[later]
+            if x0 == 0 or (x == 0).any():
+                return self._scalar_path(p, snap, ctx)
+            exact = ctx.align_array(x, mode)
+            wrong = np.flatnonzero(exact != vals[later])
+            if not wrong.size:
+                break
+            k, w = later[wrong[0]], wrong[0]
+            fixed = int(exact[w]) if ctx.ticks else price_to_ticks(float(x[w]), tick, mode)
+            idx[k:] += fixed - idx[k]
+            later = later[w:]
+        else:
+            return self._scalar_path(p, snap, ctx)
+        tp = tp.astype(vals.dtype, copy=False)
+        tp[first:] = vals[first:]
+        return TargetPath(sl_price=sl, tp_price=tp)
+
     def on_fill(self, snap, fill) -> None:
         # Rien à persister ici : la quantité restante/ordres seront lus depuis l’exchange par le PM.
         return
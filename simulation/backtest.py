@@ -0,0 +1,253 @@
+# path: simulation/backtest.py
+import argparse
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import CANDLE_STORE_DIR, INVESTMENT_USD, LEVERAGE, LOOKBACK, STRATEGY_PARAMS, TICK_SIZE, TIMEFRAMES
+from data.align import asof_indices, timeframe_ms, to_ms
+from data.fetcher import OHLCV_COLUMNS
+from data.store import CandleStore
+from execution.order_manager import OrderManager
+from execution.position_manager import PositionManager
+from indicators.compute import compute_indicators
+from risk.strategies.registry import make_from_name
+from simulation.exchange import SimulatedExchange
+from simulation.fills import POLICIES, STOP_FIRST, IntrabarModel
+from simulation.metrics import summarize
+from strategy.signal import generate_signal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYMBOL = "ETH/USD:USD"
+M5_COLUMNS = ["EMA9", "EMA21", "RSI7", "Vol_SMA5", "ATR14"]
+M15_COLUMNS = ["EMA21", "EMA50", "RSI14"]
+
+
+@dataclass
+class BacktestResult:
+    trades: pd.DataFrame
+    equity: pd.DataFrame
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+
+def _columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    cols = {c: df[c].to_numpy(dtype=float) for c in OHLCV_COLUMNS[1:]}
+    cols["time"] = to_ms(df["time"])
+    return cols
+
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Agrège des bougies OHLCV vers une timeframe supérieure.
+
+    Seuls les seaux complets sont conservés (une bougie M15 n'existe que si
+    ses trois M5 sont présentes), pour ne jamais exposer de bougie partielle.
+    """
+    tf_ms = timeframe_ms(timeframe)
+    base = df.copy()
+    base["time"] = to_ms(base["time"])
+    step = int(np.median(np.diff(base["time"]))) if len(base) > 1 else tf_ms
+    bucket = base["time"] - base["time"] % tf_ms
+    g = base.groupby(bucket, sort=True)
+    out = pd.DataFrame({
+        "time": g["time"].first().index.to_numpy(),
+        "open": g["open"].first().to_numpy(),
+        "high": g["high"].max().to_numpy(),
+        "low": g["low"].min().to_numpy(),
+        "close": g["close"].last().to_numpy(),
+        "volume": g["volume"].sum().to_numpy(),
+    })
+    complete = g.size().to_numpy() == max(1, tf_ms // step)
+    out = out[complete].reset_index(drop=True)
+    out["time"] = pd.to_datetime(out["time"], unit="ms")
+    return out
+
+
+def run_backtest(
+    df_m5: pd.DataFrame,
+    df_m15: Optional[pd.DataFrame] = None,
+    symbol: str = DEFAULT_SYMBOL,
+    strategy: Optional[Any] = None,
+    investment_usd: float = INVESTMENT_USD,
+    leverage: float = LEVERAGE,
+    tick_size: float = TICK_SIZE,
+    fee_rate: float = 0.0005,
+    balance: Optional[float] = None,
+    warmup: int = LOOKBACK,
+    atr_multiplier: Optional[float] = None,
+    tick_prices: bool = False,
+    intrabar: Optional[IntrabarModel] = None,
+) -> BacktestResult:
+    """
+    Rejoue l'historique bougie par bougie à travers le vrai pipeline du bot.
+
+    À chaque clôture M5 : exécution des ordres en attente sur la bougie par
+    l'exchange simulé, puis la même séquence que `main.py` (watchdog,
+    trailing, check_exit, signal, ouverture via `PositionManager`). Les
+    indicateurs sont calculés une fois sur tout l'historique (ils sont
+    causaux) ; la bougie M15 utilisée est la dernière clôturée à l'instant
+    simulé.
+
+    Args:
+        df_m5: OHLCV M5 (format `fetch_ohlcv`).
+        df_m15: OHLCV M15 ; agrégé depuis `df_m5` si absent.
+        strategy: Stratégie de trailing (None = trailing historique).
+        balance: Capital initial (défaut : `investment_usd`).
+        warmup: Bougies ignorées au début (stabilisation des indicateurs).
+        atr_multiplier: Distance SL en ATR (None = défaut de `calculate_initial_sl_tp`).
+        tick_prices: SL / TP de la position en ticks entiers (cf. `PositionManager`).
+        intrabar: Ordre des exécutions SL / TP touchés par une même bougie
+            (None = SL d'abord, cf. `simulation.fills`).
+
+    `df_m5`/`df_m15` peuvent déjà contenir les colonnes de `compute_indicators`.
+    """
+    if df_m15 is None:
+        df_m15 = resample_ohlcv(df_m5, TIMEFRAMES["M15"])
+    ind5 = df_m5 if set(M5_COLUMNS).issubset(df_m5.columns) else compute_indicators(df_m5, TIMEFRAMES["M5"])
+    ind15 = df_m15 if set(M15_COLUMNS).issubset(df_m15.columns) else compute_indicators(df_m15, TIMEFRAMES["M15"])
+    c5, c15 = _columns(ind5), _columns(ind15)
+
+    # dernière M15 clôturée à la clôture de chaque M5 (pas de look-ahead)
+    j15 = asof_indices(c15["time"], c5["time"], TIMEFRAMES["M15"], TIMEFRAMES["M5"])
+    # condition nécessaire d'un signal : EMA9 - EMA21 change de signe sur les
+    # 3 dernières bougies ; `generate_signal` reste seul juge, on ne l'appelle
+    # simplement pas là où il ne peut que répondre « pas de signal »
+    diff = np.sign(ind5["EMA9"].to_numpy(dtype=float) - ind5["EMA21"].to_numpy(dtype=float))
+    may_cross = np.zeros(len(diff), dtype=bool)
+    may_cross[2:] = (diff[2:] != diff[1:-1]) | (diff[2:] != diff[:-2])
+
+    ex = SimulatedExchange(
+        symbol,
+        {TIMEFRAMES["M5"]: c5, TIMEFRAMES["M15"]: c15},
+        base_timeframe=TIMEFRAMES["M5"],
+        tick_size=tick_size,
+        fee_rate=fee_rate,
+        balance=investment_usd if balance is None else balance,
+        intrabar=intrabar,
+    )
+    # placement séquentiel des protections : ids d'ordres déterministes
+    pm = PositionManager(
+        ex, symbol, OrderManager(ex, symbol), strategy=strategy, atr_multiplier=atr_multiplier,
+        concurrent_protection=False, tick_prices=tick_prices,
+    )
+
+    n = len(ind5)
+    closes = c5["close"]
+    atr5 = ind5["ATR14"].to_numpy(dtype=float)
+    equity = np.empty(n)
+    position = np.zeros(n)
+    start = max(warmup, 2)
+    for i in range(n):
+        ex.advance()
+        # à plat sans croisement possible, la séquence de main.py est sans effet
+        if i >= start and j15[i] >= 0 and (pm.active or may_cross[i]):
+            with pm.tick():
+                df5 = ind5.iloc[i - 2:i + 1]
+                price = float(closes[i])
+                pm.watchdog(price)
+                pm.update_trail(df5)
+                pm.check_exit()
+                if not pm.active:
+                    j = int(j15[i])
+                    sig = generate_signal(ind15.iloc[j:j + 1], df5)
+                    side = "buy" if sig["long"] else "sell" if sig["short"] else None
+                    if side:
+                        size = investment_usd * leverage / price
+                        try:
+                            # ATR de la bougie du signal : pas de rechargement après le fill
+                            atr = None if np.isnan(atr5[i]) else float(atr5[i])
+                            pm.open_position(side, price, size, atr=atr)
+                        except RuntimeError as e:
+                            logger.warning("Backtest: open_position failed at %s: %s", c5["time"][i], e)
+                else:
+                    pm.update_trail(df5)
+                pm.check_exit()
+        equity[i] = ex.equity()
+        position[i] = ex.position
+
+    trades = pd.DataFrame(
+        ex.trades,
+        columns=["entry_time", "exit_time", "side", "size", "entry_price", "exit_price", "pnl"],
+    )
+    for col in ("entry_time", "exit_time"):
+        trades[col] = pd.to_datetime(trades[col], unit="ms")
+    curve = pd.DataFrame({
+        "time": pd.to_datetime(c5["time"], unit="ms"),
+        "close": closes,
+        "position": position,
+        "equity": equity,
+    })
+    metrics = summarize(trades, curve)
+    metrics["fees"] = ex.fees
+    return BacktestResult(trades=trades, equity=curve, metrics=metrics)
+
+
+def load_history(
+    store: CandleStore,
+    symbol: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """M5 (et M15 si stockée, sinon None) depuis le `CandleStore`."""
+    df5 = store.frame(symbol, TIMEFRAMES["M5"], start, end)
+    # M15 : on remonte d'une fenêtre pour que les EMA50 soient définies dès le début
+    lo = None if start is None else start - LOOKBACK * timeframe_ms(TIMEFRAMES["M15"])
+    df15 = store.frame(symbol, TIMEFRAMES["M15"], lo, end)
+    return df5, (df15 if len(df15) else None)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backtest événementiel sur bougies stockées")
+    parser.add_argument("--symbol", default=DEFAULT_SYMBOL, help="Symbole CCXT du stockage local.")
+    parser.add_argument("--store", default=CANDLE_STORE_DIR, help="Dossier du CandleStore.")
+    parser.add_argument("--start", default=None, help="Début (date ISO).")
+    parser.add_argument("--end", default=None, help="Fin (date ISO).")
+    parser.add_argument("--strategy", choices=["trailing_sl_only", "trailing_sl_and_tp", "none", "legacy"], default=None)
+    parser.add_argument("--theta", type=float, default=None)
+    parser.add_argument("--rho", type=float, default=None)
+    parser.add_argument("--fee-rate", type=float, default=0.0005)
+    parser.add_argument("--intrabar", choices=POLICIES, default=STOP_FIRST, help="Ordre supposé des SL / TP touchés par une même bougie.")
+    parser.add_argument("--intrabar-timeframe", default=None, help="Timeframe fine du stockage pour départager SL / TP (ex: 1m).")
+    parser.add_argument("--trades-csv", default=None, help="Export CSV des trades.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args = _parse_args()
+    ms = lambda s: None if s is None else int(pd.Timestamp(s).value // 10**6)  # noqa: E731
+    store = CandleStore(args.store)
+    df5, df15 = load_history(store, args.symbol, ms(args.start), ms(args.end))
+    if df5.empty:
+        raise SystemExit(f"Aucune bougie {TIMEFRAMES['M5']} pour {args.symbol} dans {args.store}")
+
+    strategy = None
+    if args.strategy not in (None, "none", "legacy"):
+        params = dict(STRATEGY_PARAMS or {})
+        if args.theta is not None:
+            params["theta"] = args.theta
+        if args.rho is not None:
+            params["rho"] = args.rho
+        strategy = make_from_name(args.strategy, **params)
+
+    intrabar = IntrabarModel(args.intrabar)
+    if args.intrabar_timeframe:
+        # sous-bougies jusqu'à la clôture de la dernière M5
+        end = ms(args.end)
+        if end is not None:
+            end += timeframe_ms(TIMEFRAMES["M5"])
+        intrabar = IntrabarModel.from_store(store, args.symbol, args.intrabar_timeframe, args.intrabar, ms(args.start), end)
+
+    res = run_backtest(df5, df15, symbol=args.symbol, strategy=strategy, fee_rate=args.fee_rate, intrabar=intrabar)
+    for k, v in res.metrics.items():
+        print(f"{k:>14}: {v:.4f}" if isinstance(v, float) else f"{k:>14}: {v}")
+    if args.trades_csv:
+        res.trades.to_csv(args.trades_csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+# path: simulation/exchange.py
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import ccxt
+import numpy as np
+
+from simulation.fills import IntrabarModel
+
+logger = logging.getLogger(__name__)
+
+OHLCV_FIELDS = ("time", "open", "high", "low", "close", "volume")
+
+
+class SimulatedExchange:
+    """
+    Exchange en mémoire qui remplace le client CCXT pendant une simulation.
+
+    Implémente le sous-ensemble utilisé par `OrderManager`, `PositionManager`
+    et `risk.sl_tp` (create_order, cancel_order, fetch_open_orders,
+    fetch_positions, fetch_ohlcv, load_markets, market, milliseconds,
+    parse_timeframe). Deux modes d'appariement :
+
+    - `advance()` (backtest) : bougie par bougie, les ordres en attente sont
+      confrontés au high/low de la bougie ; un stop touché s'exécute au stop
+      (ou à l'ouverture en cas de gap), hypothèse prudente de type
+      stop-market ; le prix courant devient ensuite la clôture. Quand
+      plusieurs ordres sont touchés par la même bougie, les stops passent
+      d'abord, ou l'ordre des franchissements estimé par `intrabar` ;
+    - `on_price()` / `advance_ticks()` (paper trading) : flux de prix dont le
+      trajet entre deux ticks est supposé continu (sauf gap). Un stop-limit
+      déclenché devient un ordre limite qui peut rester non exécuté après un
+      gap ; les ordres limites peuvent être exécutés partiellement selon le
+      volume du tick (`fill_ratio`).
+
+    Les positions sont signées (contracts > 0 = long), comme le suppose
+    `PositionManager`.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        candles: Dict[str, Dict[str, np.ndarray]],
+        base_timeframe: str = "5m",
+        tick_size: float = 0.5,
+        fee_rate: float = 0.0005,
+        balance: float = 1000.0,
+        market_id: Optional[str] = None,
+        fill_ratio: Optional[float] = None,
+        intrabar: Optional[IntrabarModel] = None,
+    ) -> None:
+        """
+        Args:
+            symbol: Symbole CCXT simulé.
+            candles: {timeframe: {"time": ms, "open", "high", "low", "close", "volume"}}.
+            base_timeframe: Timeframe dont les bougies pilotent `advance()`.
+            tick_size: Tick exposé via les métadonnées de marché.
+            fee_rate: Frais proportionnels au notionnel de chaque exécution.
+            balance: Capital initial (USD).
+            market_id: ID exchange du marché (ex: 'PF_ETHUSD'), pour `resolve_symbol`.
+            fill_ratio: Part du volume d'un tick disponible pour les ordres
+                limites en mode flux (None = exécution complète).
+            intrabar: Ordre des exécutions d'une bougie de `advance()`
+                (None = stops d'abord).
+        """
+        if base_timeframe not in candles:
+            raise ValueError(f"base timeframe {base_timeframe!r} missing from candles")
+        self.symbol = symbol
+        self.candles = {tf: {k: np.asarray(v[k]) for k in OHLCV_FIELDS} for tf, v in candles.items()}
+        self.base_timeframe = base_timeframe
+        self.fee_rate = fee_rate
+        self.fill_ratio = fill_ratio
+        self.intrabar = intrabar
+        self.has: Dict[str, Any] = {"editOrder": True}
+        self.markets = {
+            symbol: {
+                "id": market_id or symbol,
+                "symbol": symbol,
+                "info": {"tickSize": tick_size},
+                "precision": {},
+                "limits": {"price": {"step": tick_size}},
+            }
+        }
+        self._tf_ms = {tf: self.parse_timeframe(tf) * 1000 for tf in self.candles}
+        self.index = -1  # dernière bougie de base traitée
+        self.now = int(self.candles[base_timeframe]["time"][0]) if len(self.candles[base_timeframe]["time"]) else 0
+        self.price: Optional[float] = None
+
+        self.cash = float(balance)
+        self.position = 0.0
+        self.entry_price = 0.0
+        self.fees = 0.0
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.fills: List[Dict[str, Any]] = []
+        self.trades: List[Dict[str, Any]] = []
+        self._open_trade: Optional[Dict[str, Any]] = None
+        self._order_id = 0
+        # PositionManager peut envoyer TP et SL depuis deux threads
+        self._lock = threading.RLock()
+
+    # --- métadonnées / horloge ---
+    @staticmethod
+    def parse_timeframe(timeframe: str) -> int:
+        return int(ccxt.Exchange.parse_timeframe(timeframe))
+
+    def milliseconds(self) -> int:
+        return self.now
+
+    def load_markets(self, reload: bool = False) -> Dict[str, Any]:
+        return self.markets
+
+    def market(self, symbol: str) -> Dict[str, Any]:
+        if symbol not in self.markets:
+            raise ccxt.BadSymbol(f"unknown symbol {symbol}")
+        return self.markets[symbol]
+
+    def __len__(self) -> int:
+        return len(self.candles[self.base_timeframe]["time"])
+
+    # --- données ---
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "5m", since: Optional[int] = None, limit: Optional[int] = None, params: Optional[Dict[str, Any]] = None) -> List[List[float]]:
+        """Bougies clôturées à l'instant simulé (jamais de bougie future)."""
+        c = self.candles[timeframe]
+        t = c["time"]
+        hi = int(np.searchsorted(t, self.now - self._tf_ms[timeframe], side="right"))
+        lo = int(np.searchsorted(t, since, side="left")) if since is not None else 0
+        if limit is not None:
+            hi = min(hi, lo + int(limit)) if since is not None else hi
+            lo = max(lo, hi - int(limit))
+        return [
+            [int(t[i]), float(c["open"][i]), float(c["high"][i]), float(c["low"][i]), float(c["close"][i]), float(c["volume"][i])]
+            for i in range(lo, hi)
+        ]
+
+    # --- ordres ---
+    def create_order(self, symbol: str, type: str, side: str, amount: float, price: Optional[float] = None, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            params = dict(params or {})
+            if symbol != self.symbol:
+                raise ccxt.BadSymbol(f"unknown symbol {symbol}")
+            if side not in ("buy", "sell") or amount <= 0:
+                raise ccxt.InvalidOrder(f"invalid order {side} {amount}")
+            self._order_id += 1
+            order: Dict[str, Any] = {
+                "id": str(self._order_id),
+                "symbol": symbol,
+                "type": type,
+                "side": side,
+                "amount": float(amount),
+                "filled": 0.0,
+                "remaining": float(amount),
+                "price": price,
+                "average": None,
+                "status": "open",
+                "reduceOnly": bool(params.get("reduceOnly")),
+                "params": params,
+                "timestamp": self.now,
+                "info": {},
+            }
+            if params.get("stopPrice") is not None:
+                order["stopPrice"] = float(params["stopPrice"])
+                order["info"] = {"stopPrice": order["stopPrice"]}
+            self.orders[order["id"]] = order
+            if type == "market":
+                if self.price is None:
+                    raise ccxt.ExchangeError("no market price yet")
+                self._fill(order, self.price)
+                if order["status"] == "open":  # reduceOnly sans position
+                    order["status"] = "canceled"
+            elif self.price is not None:
+                # ordre marketable dès sa création : exécuté au prix courant
+                self._match(order, self.price, self.price, float("inf"))
+            return dict(order)
+
+    def cancel_order(self, id: str, symbol: Optional[str] = None, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            order = self.orders.get(id)
+            if order is None or order["status"] != "open":
+                raise ccxt.OrderNotFound(f"order {id} not found")
+            order["status"] = "canceled"
+            return {"id": id, "status": "canceled"}
+
+    def edit_order(self, id: str, symbol: str, type: str, side: str, amount: Optional[float] = None, price: Optional[float] = None, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Modifie en place un ordre limit / stop limit ouvert (même id)."""
+        with self._lock:
+            order = self.orders.get(id)
+            if order is None or order["status"] != "open":
+                raise ccxt.OrderNotFound(f"order {id} not found")
+            if order["type"] == "market" or side != order["side"]:
+                raise ccxt.InvalidOrder(f"cannot edit order {id}")
+            params = dict(params or {})
+            if amount is not None:
+                if amount <= order["filled"]:
+                    raise ccxt.InvalidOrder(f"invalid amount {amount}")
+                order["amount"] = float(amount)
+                order["remaining"] = float(amount) - order["filled"]
+            if price is not None:
+                order["price"] = price
+            if params.get("stopPrice") is not None:
+                order["stopPrice"] = float(params["stopPrice"])
+                order["info"] = {"stopPrice": order["stopPrice"]}
+                order.pop("triggered", None)
+            order["params"] = {**order["params"], **params}
+            order["timestamp"] = self.now
+            if self.price is not None:
+                self._match(order, self.price, self.price, float("inf"))
+            return dict(order)
+
+    def fetch_open_orders(self, symbol: Optional[str] = None, since: Optional[int] = None, limit: Optional[int] = None, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return [dict(o) for o in self.orders.values() if o["status"] == "open" and (symbol is None or o["symbol"] == symbol)]
+
+    def fetch_positions(self, symbols: Optional[List[str]] = None, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        if self.position == 0 or (symbols and self.symbol not in symbols):
+            return []
+        mark = self.price if self.price is not None else self.entry_price
+        return [{
+            "symbol": self.symbol,
+            "contracts": self.position,
+            "side": "long" if self.position > 0 else "short",
+            "entryPrice": self.entry_price,
+            "unrealizedPnl": self.position * (mark - self.entry_price),
+        }]
+
+    # --- moteur ---
+    def _fill(self, order: Dict[str, Any], price: float, qty: Optional[float] = None) -> float:
+        """Exécute `qty` (défaut : le reste) de l'ordre ; retourne la quantité exécutée."""
+        qty = order["remaining"] if qty is None else min(qty, order["remaining"])
+        signed = qty if order["side"] == "buy" else -qty
+        if order["reduceOnly"]:
+            if self.position == 0 or np.sign(signed) == np.sign(self.position):
+                return 0.0
+            signed = float(np.sign(signed)) * min(qty, abs(self.position))
+            qty = abs(signed)
+        self._apply_fill(signed, float(price))
+        order["filled"] += qty
+        order["remaining"] = max(0.0, order["remaining"] - qty)
+        order["average"] = float(price)
+        if order["remaining"] <= 1e-12 or (order["reduceOnly"] and self.position == 0):
+            order["remaining"] = 0.0
+            order["status"] = "closed"
+        self.fills.append({"time": self.now, "order": order["id"], "side": order["side"], "qty": qty, "price": float(price)})
+        return qty
+
+    def _apply_fill(self, signed: float, price: float) -> None:
+        fee = abs(signed) * price * self.fee_rate
+        self.cash -= fee
+        self.fees += fee
+        pos = self.position
+        if pos == 0 or np.sign(pos) == np.sign(signed):
+            new = pos + signed
+            self.entry_price = (pos * self.entry_price + signed * price) / new
+            self.position = new
+            if self._open_trade is None:
+                self._open_trade = {
+                    "entry_time": self.now, "side": "buy" if signed > 0 else "sell",
+                    "entry_price": price, "size": abs(signed), "pnl": -fee,
+                }
+            else:
+                self._open_trade["size"] += abs(signed)
+                self._open_trade["entry_price"] = self.entry_price
+                self._open_trade["pnl"] -= fee
+            return
+        closed = min(abs(signed), abs(pos)) * np.sign(pos)
+        pnl = closed * (price - self.entry_price)
+        self.cash += pnl
+        self.position = pos + signed
+        if self._open_trade is not None:
+            self._open_trade["pnl"] += pnl - fee
+        if abs(self.position) <= 1e-12:
+            self.position = 0.0
+            if self._open_trade is not None:
+                self._open_trade.update(exit_time=self.now, exit_price=price)
+                self.trades.append(self._open_trade)
+                self._open_trade = None
+            self.entry_price = 0.0
+        elif np.sign(self.position) != np.sign(pos):
+            # retournement : le reliquat ouvre une nouvelle position
+            if self._open_trade is not None:
+                self._open_trade.update(exit_time=self.now, exit_price=price)
+                self.trades.append(self._open_trade)
+            self.entry_price = price
+            self._open_trade = {
+                "entry_time": self.now, "side": "buy" if self.position > 0 else "sell",
+                "entry_price": price, "size": abs(self.position), "pnl": 0.0,
+            }
+
+    def _trigger_price(self, order: Dict[str, Any], o: float, h: float, l: float) -> Optional[float]:
+        """Prix d'exécution d'un ordre en attente sur la bougie (None si non touché)."""
+        side = order["side"]
+        if "stopPrice" in order:
+            stop = order["stopPrice"]
+            if side == "sell" and l <= stop:
+                return min(o, stop)  # gap à l'ouverture : exécution à l'open
+            if side == "buy" and h >= stop:
+                return max(o, stop)
+            return None
+        limit = order["price"]
+        if side == "sell" and h >= limit:
+            return max(o, limit)
+        if side == "buy" and l <= limit:
+            return min(o, limit)
+        return None
+
+    def _intrabar_fills(
+        self, intrabar: IntrabarModel, orders: List[Dict[str, Any]], i: int
+    ) -> List[Tuple[float, Dict[str, Any], float]]:
+        """(rang, ordre, prix) des ordres touchés par la bougie `i`, dans l'ordre estimé par `intrabar`."""
+        c = self.candles[self.base_timeframe]
+        o, h, l, cl = (c[k][i:i + 1] for k in ("open", "high", "low", "close"))
+        out = []
+        for od in orders:
+            stop = "stopPrice" in od
+            level = od["stopPrice"] if stop else od["price"]
+            # stop vendeur et limite acheteuse sont atteints par le bas
+            down = (od["side"] == "sell") == stop
+            rank, px = intrabar.cross(o, h, l, cl, level, down, stop, c["time"][i:i + 1], self._tf_ms[self.base_timeframe])
+            if np.isfinite(rank[0]):
+                out.append((float(rank[0]), od, float(px[0])))
+        out.sort(key=lambda x: x[0])
+        return out
+
+    def _match(self, order: Dict[str, Any], start: float, end: float, budget: float) -> float:
+        """
+        Confronte un ordre au trajet continu de prix `start` -> `end`.
+
+        Un stop touché est marqué déclenché puis traité comme un ordre limite
+        à `price` (stop-market si `price` est None) sur le reste du trajet.
+        Un ordre limite déjà marketable au début du trajet s'exécute à
+        `start`, sinon à sa limite s'il est franchi. `budget` borne la
+        quantité exécutable (volume disponible).
+
+        Returns:
+            Quantité exécutée.
+        """
+        sell = order["side"] == "sell"
+        if "stopPrice" in order and not order.get("triggered"):
+            stop = order["stopPrice"]
+            if (start <= stop) if sell else (start >= stop):
+                pass
+            elif (end <= stop) if sell else (end >= stop):
+                start = stop
+            else:
+                return 0.0
+            order["triggered"] = True
+        limit = order["price"]
+        if limit is None or ((start >= limit) if sell else (start <= limit)):
+            px = start
+        elif (end >= limit) if sell else (end <= limit):
+            px = limit
+        else:
+            return 0.0
+        if budget <= 0:
+            return 0.0
+        qty = self._fill(order, px, None if budget == float("inf") else budget)
+        if order["status"] == "open" and order["reduceOnly"] and self.position == 0:
+            order["status"] = "canceled"
+        return qty
+
+    def on_price(self, price: float, volume: Optional[float] = None, jump: bool = False) -> None:
+        """
+        Nouveau prix du flux : exécute les ordres atteints sur le trajet depuis
+        le prix précédent (stops avant limites), puis met à jour le prix courant.
+
+        Args:
+            price: Dernier prix.
+            volume: Volume échangé sur ce tick ; avec `fill_ratio`, borne la
+                quantité exécutée sur les ordres limites (exécutions partielles).
+            jump: Discontinuité (gap) : seul `price` est atteignable.
+        """
+        price = float(price)
+        start = price if jump or self.price is None else self.price
+        budget = float("inf")
+        if self.fill_ratio is not None and volume is not None:
+            budget = self.fill_ratio * float(volume)
+        pending = [od for od in self.orders.values() if od["status"] == "open" and od["type"] != "market"]
+        pending.sort(key=lambda od: 0 if "stopPrice" in od and not od.get("triggered") else 1)
+        for od in pending:
+            if od["status"] == "open":
+                # les stops (ordres déclenchés) ne consomment pas le volume des limites au repos
+                cap = float("inf") if "stopPrice" in od else budget
+                used = self._match(od, start, price, cap)
+                if "stopPrice" not in od:
+                    budget -= used
+        self.price = price
+
+    def advance_ticks(self) -> bool:
+        """
+        Rejoue la bougie de base suivante comme un flux de prix : ouverture
+        (gap possible depuis la clôture précédente), puis extrêmes dans l'ordre
+        le plus probable (bas puis haut si bougie haussière) et clôture, le
+        volume étant réparti entre les segments. L'horloge finit à la clôture.
+
+        Returns:
+            False quand l'historique est épuisé.
+        """
+        c = self.candles[self.base_timeframe]
+        if self.index + 1 >= len(c["time"]):
+            return False
+        self.index += 1
+        i = self.index
+        o, h, l, close, vol = (float(c[k][i]) for k in ("open", "high", "low", "close", "volume"))
+        self.now = int(c["time"][i])
+        path = (l, h) if close >= o else (h, l)
+        self.on_price(o, jump=True)
+        for px in (*path, close):
+            self.on_price(px, volume=vol / 3)
+        self.now = int(c["time"][i]) + self._tf_ms[self.base_timeframe]
+        return True
+
+    def advance(self) -> bool:
+        """
+        Traite la bougie de base suivante : exécute les ordres touchés (stops
+        avant limites si les deux sont atteints, hypothèse prudente, sauf
+        `intrabar`), puis place l'horloge à la clôture de la bougie.
+
+        Returns:
+            False quand l'historique est épuisé.
+        """
+        c = self.candles[self.base_timeframe]
+        if self.index + 1 >= len(c["time"]):
+            return False
+        self.index += 1
+        i = self.index
+        o, h, l, close = (float(c[k][i]) for k in ("open", "high", "low", "close"))
+        self.now = int(c["time"][i])
+        if self.price is not None:
+            pending = [od for od in self.orders.values() if od["status"] == "open"]
+            touched: List[Tuple[Dict[str, Any], Optional[float]]]
+            if self.intrabar is not None:
+                touched = [(od, px) for _, od, px in self._intrabar_fills(self.intrabar, pending, i)]
+            else:
+                pending.sort(key=lambda od: 0 if "stopPrice" in od else 1)
+                touched = [(od, self._trigger_price(od, o, h, l)) for od in pending]
+            for od, px in touched:
+                if od["status"] != "open":
+                    continue
+                if px is not None:
+                    self._fill(od, px)
+                    if od["status"] == "open" and od["reduceOnly"]:
+                        od["status"] = "canceled"
+        self.now = int(c["time"][i]) + self._tf_ms[self.base_timeframe]
+        self.price = close
+        return True
+
+    def equity(self) -> float:
+        """Capital + PnL latent au prix courant."""
+        if self.position == 0 or self.price is None:
+            return self.cash
+        return self.cash + self.position * (self.price - self.entry_price)
@@ -0,0 +1,171 @@
+# path: simulation/fills.py
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from data.fetcher import OHLCV_COLUMNS
+
+# Ordre supposé des événements dans une bougie quand plusieurs niveaux sont touchés
+STOP_FIRST = "stop_first"  # hypothèse prudente historique : un stop touché passe avant tout
+OHLC = "ohlc"              # trajet O -> bas -> haut -> C si haussière, O -> haut -> bas -> C sinon
+POLICIES = (STOP_FIRST, OHLC)
+
+NO_HIT, HIT_SL, HIT_TP = 0, 1, 2
+
+
+def _cross(
+    o: np.ndarray,
+    h: np.ndarray,
+    l: np.ndarray,
+    c: np.ndarray,
+    level: Any,
+    down: bool,
+    stop: bool,
+    policy: str,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Premier franchissement de `level` dans chaque bougie.
+
+    `down` : niveau atteint par le bas (stop vendeur, limite acheteuse).
+    Le rang ordonne les franchissements d'une même bougie : 0 = dès
+    l'ouverture (gap, `OHLC` seulement), 1 / 2 = première / seconde jambe du
+    trajet, inf = non touché. Le prix est l'ouverture en cas de gap, le niveau sinon.
+    """
+    level = np.broadcast_to(np.asarray(level, dtype=float), o.shape)
+    if down:
+        gap, touched = o <= level, l <= level
+    else:
+        gap, touched = o >= level, h >= level
+    if policy == STOP_FIRST:
+        rank = np.full(o.shape, 1.0 if stop else 2.0)
+    else:
+        # bougie haussière : le bas est supposé atteint avant le haut
+        rank = np.where((c >= o) == down, 1.0, 2.0)
+        rank[gap] = 0.0
+    rank[~touched] = np.inf
+    return rank, np.where(gap, o, level)
+
+
+@dataclass(frozen=True)
+class IntrabarModel:
+    """
+    Résolution des exécutions à l'intérieur d'une bougie.
+
+    Quand plusieurs ordres (typiquement SL et TP) sont touchés par la même
+    bougie, `policy` décide de l'ordre des franchissements. Avec `fine`
+    (bougies d'une timeframe inférieure, colonnes numpy comme
+    `CandleStore.read`), les bougies ambiguës sont rejouées sur les sous-bougies
+    qu'elles contiennent ; `policy` ne départage plus que les franchissements
+    d'une même sous-bougie. Tout est vectorisé sur les bougies.
+    """
+
+    policy: str = STOP_FIRST
+    fine: Optional[Dict[str, np.ndarray]] = None
+
+    def __post_init__(self) -> None:
+        if self.policy not in POLICIES:
+            raise ValueError(f"unknown intrabar policy {self.policy!r}")
+
+    @classmethod
+    def from_store(
+        cls,
+        store: Any,
+        symbol: str,
+        timeframe: str,
+        policy: str = STOP_FIRST,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> "IntrabarModel":
+        """Sous-bougies `timeframe` lues (memmap, sans copie) dans un `CandleStore`."""
+        fine = store.read(symbol, timeframe, start, end)
+        return cls(policy, fine if len(fine["time"]) else None)
+
+    def cross(
+        self,
+        o: np.ndarray,
+        h: np.ndarray,
+        l: np.ndarray,
+        c: np.ndarray,
+        level: Any,
+        down: bool,
+        stop: bool,
+        times: Optional[np.ndarray] = None,
+        bar_ms: Optional[int] = None,
+        where: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (rang, prix) du premier franchissement de `level` par bougie (cf.
+        `_cross`). Les bougies `where` touchées sans gap sont rejouées sur les
+        sous-bougies de [times, times + bar_ms) : rang 3 + 3 × (indice de la
+        sous-bougie) + rang dans la sous-bougie, comparable entre ordres d'une
+        même bougie seulement.
+        """
+        o, h, l, c = (np.asarray(x, dtype=float) for x in (o, h, l, c))
+        rank, px = _cross(o, h, l, c, level, down, stop, self.policy)
+        if self.fine is None or times is None or bar_ms is None:
+            return rank, px
+        drill = (rank > 0) & np.isfinite(rank)
+        if where is not None:
+            drill &= where
+        sel = np.flatnonzero(drill)
+        if not len(sel):
+            return rank, px
+        ft = self.fine["time"]
+        t0 = np.asarray(times, dtype=np.int64)[sel]
+        a = np.searchsorted(ft, t0, side="left")
+        cnt = np.searchsorted(ft, t0 + bar_ms, side="left") - a
+        sel, a, cnt = sel[cnt > 0], a[cnt > 0], cnt[cnt > 0]
+        if not len(sel):
+            return rank, px
+        # sous-bougies de toutes les bougies rejouées, concaténées
+        starts = np.cumsum(cnt) - cnt
+        seg = np.repeat(np.arange(len(sel)), cnt)
+        local = np.arange(int(cnt.sum())) - starts[seg]
+        rows = a[seg] + local
+        lv = np.broadcast_to(np.asarray(level, dtype=float), o.shape)[sel][seg]
+        f = {k: np.asarray(self.fine[k][rows], dtype=float) for k in OHLCV_COLUMNS[1:5]}
+        frank, fpx = _cross(f["open"], f["high"], f["low"], f["close"], lv, down, stop, self.policy)
+        best = np.minimum.reduceat(3.0 + 3.0 * local + frank, starts)
+        found = np.isfinite(best)
+        first = starts[found] + ((best[found] - 3.0) // 3.0).astype(np.int64)
+        rank, px = rank.copy(), px.copy()
+        rank[sel[found]] = best[found]
+        px[sel[found]] = fpx[first]
+        # sous-bougies incohérentes avec la bougie (niveau jamais touché) : après elles
+        miss = sel[~found]
+        rank[miss] += 3.0 * (cnt[~found] + 1)
+        return rank, px
+
+    def resolve_sl_tp(
+        self,
+        o: np.ndarray,
+        h: np.ndarray,
+        l: np.ndarray,
+        c: np.ndarray,
+        sl: Any,
+        tp: Any,
+        direction: int,
+        times: Optional[np.ndarray] = None,
+        bar_ms: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sortie de chaque bougie pour une position `direction` (+1 long, -1
+        short) protégée par un stop `sl` et une limite `tp` (scalaires ou un
+        niveau par bougie).
+
+        Returns:
+            (NO_HIT / HIT_SL / HIT_TP par bougie, prix d'exécution ou nan).
+        """
+        down = direction > 0
+        o, h, l, c = (np.asarray(x, dtype=float) for x in (o, h, l, c))
+        rs, ps = _cross(o, h, l, c, sl, down, True, self.policy)
+        rt, pt = _cross(o, h, l, c, tp, not down, False, self.policy)
+        if self.fine is not None and times is not None:
+            # seules les bougies touchant les deux niveaux sont à départager
+            both = np.isfinite(rs) & np.isfinite(rt)
+            if both.any():
+                rs, ps = self.cross(o, h, l, c, sl, down, True, times, bar_ms, where=both)
+                rt, pt = self.cross(o, h, l, c, tp, not down, False, times, bar_ms, where=both)
+        hit = np.where(rs < rt, HIT_SL, np.where(np.isfinite(rt), HIT_TP, NO_HIT)).astype(np.int8)
+        return hit, np.where(hit == HIT_SL, ps, np.where(hit == HIT_TP, pt, np.nan))
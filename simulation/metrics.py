@@ -0,0 +1,55 @@
+# path: simulation/metrics.py
+import math
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# barres M5 par an (marché continu 24/7)
+BARS_PER_YEAR_M5 = 365 * 24 * 12
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """Plus forte baisse relative depuis un sommet (0.25 = -25 %)."""
+    equity = np.asarray(equity, dtype=float)
+    if not len(equity):
+        return 0.0
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, (peak - equity) / peak, 0.0)
+    return float(np.nanmax(dd))
+
+
+def summarize(trades: pd.DataFrame, equity: pd.DataFrame, bars_per_year: int = BARS_PER_YEAR_M5) -> Dict[str, float]:
+    """
+    Métriques de synthèse d'un backtest.
+
+    Args:
+        trades: Une ligne par trade clôturé, colonne `pnl` (nette de frais).
+        equity: Courbe de capital, colonne `equity` (une ligne par bougie).
+        bars_per_year: Pour annualiser le ratio de Sharpe.
+    """
+    eq = equity["equity"].to_numpy(dtype=float) if len(equity) else np.empty(0)
+    pnl = trades["pnl"].to_numpy(dtype=float) if len(trades) else np.empty(0)
+    start = float(eq[0]) if len(eq) else 0.0
+    end = float(eq[-1]) if len(eq) else 0.0
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    gross_loss = float(-losses.sum())
+
+    sharpe = 0.0
+    if len(eq) > 1:
+        rets = np.diff(eq) / eq[:-1]
+        sd = float(rets.std())
+        if sd > 0:
+            sharpe = float(rets.mean()) / sd * math.sqrt(bars_per_year)
+
+    return {
+        "n_trades": int(len(pnl)),
+        "win_rate": float(len(wins) / len(pnl)) if len(pnl) else 0.0,
+        "total_pnl": float(pnl.sum()),
+        "return_pct": (end / start - 1.0) * 100.0 if start else 0.0,
+        "max_drawdown": max_drawdown(eq),
+        "profit_factor": float(wins.sum()) / gross_loss if gross_loss > 0 else float("inf") if len(wins) else 0.0,
+        "sharpe": sharpe,
+    }
@@ -0,0 +1,67 @@
+# path: simulation/paper.py
+import logging
+from typing import Optional
+
+import pandas as pd
+
+from config import LOOKBACK, SYMBOL, TICK_SIZE, TIMEFRAMES
+from data.align import timeframe_ms
+from data.store import CandleStore
+from simulation.backtest import DEFAULT_SYMBOL, _columns, resample_ohlcv
+from simulation.exchange import SimulatedExchange
+
+logger = logging.getLogger(__name__)
+
+
+def create_paper_exchange(
+    store_dir: str,
+    symbol: str = DEFAULT_SYMBOL,
+    market_id: str = SYMBOL,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    tick_size: float = TICK_SIZE,
+    fee_rate: float = 0.0005,
+    balance: float = 1000.0,
+    fill_ratio: Optional[float] = None,
+) -> SimulatedExchange:
+    """
+    Exchange simulé alimenté par le `CandleStore`, pour faire tourner la
+    boucle de `main.py` sans appel API (`--paper`).
+
+    L'horloge est placée après une fenêtre de chauffe de `LOOKBACK` bougies
+    M15 (le `bootstrap` du feed la trouve comme en live) ; la boucle avance
+    ensuite via `advance_ticks()`, qui rejoue chaque M5 comme un flux de prix.
+
+    Args:
+        store_dir: Dossier du `CandleStore`.
+        symbol: Symbole CCXT des bougies stockées.
+        market_id: ID exchange exposé (résolu par `resolve_symbol`).
+        start: Début du rejeu (ms) ; défaut : début du stockage + chauffe.
+        end: Fin du rejeu (ms).
+        fill_ratio: Cf. `SimulatedExchange`.
+    """
+    store = CandleStore(store_dir)
+    warm_ms = LOOKBACK * timeframe_ms(TIMEFRAMES["M15"])
+    lo = None if start is None else start - warm_ms
+    df5 = store.frame(symbol, TIMEFRAMES["M5"], lo, end)
+    if df5.empty:
+        raise ValueError(f"aucune bougie M5 stockée pour {symbol}")
+    df15 = store.frame(symbol, TIMEFRAMES["M15"], lo, end)
+    if df15.empty:
+        df15 = resample_ohlcv(df5, TIMEFRAMES["M15"])
+    ex = SimulatedExchange(
+        symbol,
+        {TIMEFRAMES["M5"]: _columns(df5), TIMEFRAMES["M15"]: _columns(df15)},
+        base_timeframe=TIMEFRAMES["M5"],
+        tick_size=tick_size,
+        fee_rate=fee_rate,
+        balance=balance,
+        market_id=market_id,
+        fill_ratio=fill_ratio,
+    )
+    first = int(ex.candles[TIMEFRAMES["M5"]]["time"][0])
+    origin = max(first + warm_ms, start or 0)
+    while ex.now < origin and ex.advance_ticks():
+        pass
+    logger.info("Paper trading %s à partir de %s", symbol, pd.to_datetime(ex.now, unit="ms"))
+    return ex
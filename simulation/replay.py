@@ -0,0 +1,328 @@
+# path: simulation/replay.py
+import argparse
+import dataclasses
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import INVESTMENT_USD, LEVERAGE, LOOKBACK, STRATEGY_PARAMS, TICK_SIZE, TICK_STORE_DIR, TIMEFRAMES
+from data.align import timeframe_ms
+from data.fetcher import OHLCV_COLUMNS, create_exchange
+from data.tick_store import TickStore
+from indicators.compute import compute_indicators
+from risk.sl_tp import DEFAULT_ATR_MULTIPLIER, sl_tp_from_distance
+from risk.strategies.base import PositionSnapshot, Side, StrategyContext
+from risk.strategies.registry import make_from_name
+from simulation.backtest import DEFAULT_SYMBOL, BacktestResult, resample_ohlcv
+from simulation.metrics import summarize
+from strategy.signal import generate_signal_series
+from utils.price_utils import align_prices
+
+logger = logging.getLogger(__name__)
+
+
+class CandleAggregator:
+    """
+    Bougies OHLCV construites à la volée depuis un flux de trades traité par
+    tranches. Une bougie n'est émise qu'une fois clôturée (premier trade
+    d'une bougie suivante) ; les bougies sans trade sont plates à la clôture
+    précédente, volume nul, comme une grille régulière d'exchange.
+    """
+
+    def __init__(self, tf_ms: int) -> None:
+        self.tf_ms = tf_ms
+        self._partial: Optional[Tuple[int, float, float, float, float, float]] = None  # (seau, o, h, l, c, v)
+
+    def update(self, times: np.ndarray, prices: np.ndarray, amounts: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Ajoute une tranche de trades (triés) ; retourne les bougies clôturées par elle."""
+        t = np.asarray(times, dtype=np.int64)
+        p = np.asarray(prices, dtype=np.float64)
+        a = np.zeros(len(p)) if amounts is None else np.asarray(amounts, dtype=np.float64)
+        if not len(t):
+            return self._empty()
+        b = t // self.tf_ms
+        cut = np.flatnonzero(b[1:] != b[:-1]) + 1
+        starts = np.r_[0, cut]
+        bucket = b[starts]
+        o, c = p[starts], p[np.r_[cut, len(p)] - 1]
+        h, l = np.maximum.reduceat(p, starts), np.minimum.reduceat(p, starts)
+        v = np.add.reduceat(a, starts)
+        if self._partial is not None:
+            pb, po, ph, pl, pc, pv = self._partial
+            if pb == bucket[0]:
+                o[0], h[0], l[0], v[0] = po, max(ph, h[0]), min(pl, l[0]), pv + v[0]
+            else:
+                bucket, o, h, l, c, v = (np.r_[x, y] for x, y in zip(self._partial, (bucket, o, h, l, c, v)))
+        self._partial = (int(bucket[-1]), float(o[-1]), float(h[-1]), float(l[-1]), float(c[-1]), float(v[-1]))
+        if len(bucket) == 1:
+            return self._empty()
+        return self._dense(bucket, o, h, l, c, v)
+
+    def _empty(self) -> Dict[str, np.ndarray]:
+        return {col: np.empty(0, dtype=np.int64 if col == "time" else np.float64) for col in OHLCV_COLUMNS}
+
+    def _dense(
+        self,
+        bucket: np.ndarray,
+        o: np.ndarray,
+        h: np.ndarray,
+        l: np.ndarray,
+        c: np.ndarray,
+        v: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        # seaux clôturés [bucket[0], bucket[-1]) ; les manquants reprennent la clôture précédente
+        full = np.arange(bucket[0], bucket[-1], dtype=np.int64)
+        j = np.searchsorted(bucket, full, side="right") - 1
+        present = bucket[j] == full
+        flat = c[j]
+        return {
+            "time": full * self.tf_ms,
+            "open": np.where(present, o[j], flat),
+            "high": np.where(present, h[j], flat),
+            "low": np.where(present, l[j], flat),
+            "close": flat,
+            "volume": np.where(present, v[j], 0.0),
+        }
+
+
+def aggregate_candles(chunks: Iterable[Dict[str, np.ndarray]], timeframe: str) -> pd.DataFrame:
+    """Bougies clôturées (format `fetch_ohlcv`) d'un flux de tranches de trades."""
+    agg = CandleAggregator(timeframe_ms(timeframe))
+    parts = [agg.update(ch["time"], ch["price"], ch.get("amount")) for ch in chunks]
+    cols = {col: np.concatenate([p[col] for p in parts]) if parts else agg._empty()[col] for col in OHLCV_COLUMNS}
+    df = pd.DataFrame(cols)
+    df["time"] = pd.to_datetime(df["time"], unit="ms")
+    return df
+
+
+def _trail_path(
+    strategy: Any,
+    prices: np.ndarray,
+    snap: PositionSnapshot,
+    ctx: StrategyContext,
+    sl_cur: float,
+    tp_cur: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """SL / TP désirés après chaque prix depuis `sl_cur` / `tp_cur` (trailing historique si `strategy` est None)."""
+    if strategy is not None:
+        snap = dataclasses.replace(snap, current_price=float(prices[0]), sl_current=sl_cur, tp_current=tp_cur)
+        path = strategy.compute_targets_path(prices, snap, ctx)
+        return np.asarray(path.sl_price, dtype=np.float64), np.asarray(path.tp_price, dtype=np.float64)
+    if ctx.side == "buy":
+        sl = np.maximum(sl_cur, np.maximum.accumulate(align_prices(prices - snap.trail_dist, ctx.tick_size, "down")))
+    else:
+        sl = np.minimum(sl_cur, np.minimum.accumulate(align_prices(prices + snap.trail_dist, ctx.tick_size, "up")))
+    return sl, np.full(len(prices), tp_cur, dtype=np.float64)
+
+
+def _resolve_exit_ticks(
+    prices: np.ndarray,
+    lo: int,
+    hi_max: int,
+    strategy: Any,
+    snap: PositionSnapshot,
+    ctx: StrategyContext,
+    chunk: int = 4096,
+) -> Tuple[int, float]:
+    """
+    Premier trade à partir de `lo` qui solde la position, résolu par blocs.
+
+    À chaque trade, les ordres posés au trade précédent sont confrontés au
+    trajet (supposé continu) depuis celui-ci : SL et TP s'exécutent à leur
+    niveau. La stratégie recalcule ensuite SL / TP sur ce prix ; un niveau
+    déjà franchi au moment de sa pose s'exécute au prix courant (stop de
+    type marché, limite marketable).
+
+    Returns:
+        (index du trade de sortie, prix d'exécution) ou (-1, nan).
+    """
+    if snap.sl_current is None or snap.tp_current is None:
+        raise ValueError("replay requires both SL and TP to be placed")
+    buy = ctx.side == "buy"
+    sl_cur, tp_cur = float(snap.sl_current), float(snap.tp_current)
+    while lo < hi_max:
+        hi = min(hi_max, lo + chunk)
+        p = np.asarray(prices[lo:hi], dtype=np.float64)
+        sl, tp = _trail_path(strategy, p, snap, ctx, sl_cur, tp_cur)
+        # niveaux en vigueur à l'arrivée de chaque trade
+        sl_in, tp_in = np.r_[sl_cur, sl[:-1]], np.r_[tp_cur, tp[:-1]]
+        if buy:
+            cross_sl, cross_tp, placed = p <= sl_in, p >= tp_in, (sl >= p) | (tp <= p)
+        else:
+            cross_sl, cross_tp, placed = p >= sl_in, p <= tp_in, (sl <= p) | (tp >= p)
+        cross = cross_sl | cross_tp
+        kc = int(np.argmax(cross)) if cross.any() else len(p)
+        kp = int(np.argmax(placed)) if placed.any() else len(p)
+        if kc < len(p) and kc <= kp:
+            return lo + kc, float(sl_in[kc] if cross_sl[kc] else tp_in[kc])
+        if kp < len(p):
+            return lo + kp, float(p[kp])
+        sl_cur, tp_cur = float(sl[-1]), float(tp[-1])
+        lo = hi
+        chunk *= 2
+    return -1, float("nan")
+
+
+def run_tick_replay(
+    ticks: Dict[str, np.ndarray],
+    strategy: Optional[Any] = None,
+    symbol: str = DEFAULT_SYMBOL,
+    investment_usd: float = INVESTMENT_USD,
+    leverage: float = LEVERAGE,
+    tick_size: float = TICK_SIZE,
+    fee_rate: float = 0.0005,
+    balance: Optional[float] = None,
+    warmup: int = LOOKBACK,
+    atr_multiplier: Optional[float] = None,
+    chunk: int = 1 << 20,
+) -> BacktestResult:
+    """
+    Rejoue des trades enregistrés (colonnes `TickStore.read`) à travers la
+    stratégie de trailing, appliquée à chaque trade et non plus à chaque
+    clôture M5.
+
+    Les bougies M5 sont agrégées à la volée depuis le flux, M15 en est
+    dérivée ; indicateurs et signaux sont ceux du backtest vectorisé (entrée
+    à la clôture M5 du signal, SL / TP initiaux de `sl_tp_from_distance`).
+    Pendant une position, seuls ses trades sont relus, par blocs : la
+    trajectoire SL / TP vient de `compute_targets_path` de la stratégie et
+    les exécutions suivent les règles de `SimulatedExchange.on_price`.
+
+    Args:
+        ticks: {"time": ms, "price", "amount"} triés par heure.
+        strategy: Stratégie de trailing (None = trailing historique du SL).
+        atr_multiplier: Distance SL en ATR (None = `DEFAULT_ATR_MULTIPLIER`).
+        chunk: Trades par tranche d'agrégation.
+    """
+    t0 = time.perf_counter()
+    times, prices = ticks["time"], ticks["price"]
+    n_ticks = len(times)
+    tf5 = timeframe_ms(TIMEFRAMES["M5"])
+    df5 = aggregate_candles(({k: v[lo:lo + chunk] for k, v in ticks.items()} for lo in range(0, n_ticks, chunk)), TIMEFRAMES["M5"])
+    if df5.empty:
+        raise ValueError("not enough ticks for a closed candle")
+    ind5 = compute_indicators(df5, TIMEFRAMES["M5"])
+    ind15 = compute_indicators(resample_ohlcv(df5, TIMEFRAMES["M15"]), TIMEFRAMES["M15"])
+    t5 = df5["time"].astype("datetime64[ms]").astype("int64").to_numpy()
+    close = df5["close"].to_numpy()
+    atr = ind5["ATR14"].to_numpy(dtype=float)
+    n = len(df5)
+
+    sig = generate_signal_series(ind15, ind5, TIMEFRAMES["M15"], TIMEFRAMES["M5"])
+    long_ = sig["long"].to_numpy().copy()
+    short = sig["short"].to_numpy().copy()
+    long_[:warmup] = short[:warmup] = False
+    entries = np.flatnonzero((long_ | short) & ~np.isnan(atr))
+    # trades des bougies clôturées seulement
+    last = int(np.searchsorted(times, t5[-1] + tf5, side="left"))
+    mult = DEFAULT_ATR_MULTIPLIER if atr_multiplier is None else atr_multiplier
+
+    balance = investment_usd if balance is None else balance
+    rows = []
+    cash = np.zeros(n)
+    pos = np.zeros(n)
+    entry_px = np.zeros(n)
+    at = 0
+    while True:
+        p = int(np.searchsorted(entries, at))
+        if p >= len(entries):
+            break
+        i = int(entries[p])
+        side: Side = "buy" if long_[i] else "sell"
+        direction = 1 if side == "buy" else -1
+        entry = float(close[i])
+        sltp = sl_tp_from_distance(entry, side, float(atr[i]) * mult, tick_size)
+        size = investment_usd * leverage / entry
+        snap = PositionSnapshot(
+            entry_price=entry, current_price=entry, qty_open=size, qty_remaining=size,
+            sl_current=sltp["sl_price"], tp_current=sltp["tp_price"], tp_initial=sltp["tp_price"],
+            trail_dist=sltp["trail_dist"],
+        )
+        ctx = StrategyContext(symbol=symbol, side=side, tick_size=tick_size)
+        start = int(np.searchsorted(times, t5[i] + tf5, side="left"))
+        j, exit_px = _resolve_exit_ticks(prices, start, last, strategy, snap, ctx)
+        k = -1 if j < 0 else int(np.searchsorted(t5, int(times[j]), side="right")) - 1
+        end = n if k < 0 else k
+        cash[i] -= size * entry * fee_rate
+        pos[i:end] = direction * size
+        entry_px[i:end] = entry
+        if k < 0:
+            break  # position encore ouverte en fin d'historique
+        fees = size * (entry + exit_px) * fee_rate
+        pnl = direction * size * (exit_px - entry)
+        cash[k] += pnl - size * exit_px * fee_rate
+        rows.append({
+            "entry_time": int(t5[i]) + tf5,
+            "exit_time": int(times[j]),
+            "side": side,
+            "size": size,
+            "entry_price": entry,
+            "exit_price": exit_px,
+            "pnl": pnl - fees,
+        })
+        at = k
+
+    trades = pd.DataFrame(rows, columns=["entry_time", "exit_time", "side", "size", "entry_price", "exit_price", "pnl"])
+    for col in ("entry_time", "exit_time"):
+        trades[col] = pd.to_datetime(trades[col], unit="ms")
+    equity = balance + np.cumsum(cash) + pos * (close - entry_px)
+    curve = pd.DataFrame({"time": df5["time"], "close": close, "position": pos, "equity": equity})
+    metrics = summarize(trades, curve)
+    metrics["fees"] = float(trades["size"].mul(trades["entry_price"] + trades["exit_price"]).sum() * fee_rate)
+    metrics["ticks"] = n_ticks
+    elapsed = time.perf_counter() - t0
+    logger.info("Rejeu : %d trades en %.2f s (%.1f M/s)", n_ticks, elapsed, n_ticks / max(elapsed, 1e-9) / 1e6)
+    return BacktestResult(trades=trades, equity=curve, metrics=metrics)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rejeu de trades enregistrés (trailing à chaque trade)")
+    parser.add_argument("--symbol", default=DEFAULT_SYMBOL, help="Symbole CCXT du stockage de trades.")
+    parser.add_argument("--store", default=TICK_STORE_DIR, help="Dossier du TickStore.")
+    parser.add_argument("--start", default=None, help="Début (date ISO).")
+    parser.add_argument("--end", default=None, help="Fin (date ISO).")
+    parser.add_argument("--record", action="store_true", help="Télécharge d'abord les trades manquants jusqu'à --end.")
+    parser.add_argument("--strategy", choices=["trailing_sl_only", "trailing_sl_and_tp", "none", "legacy"], default=None)
+    parser.add_argument("--theta", type=float, default=None)
+    parser.add_argument("--rho", type=float, default=None)
+    parser.add_argument("--fee-rate", type=float, default=0.0005)
+    parser.add_argument("--trades-csv", default=None, help="Export CSV des trades.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args = _parse_args()
+    ms = lambda s: None if s is None else int(pd.Timestamp(s).value // 10**6)  # noqa: E731
+    store = TickStore(args.store)
+    if args.record:
+        since = store.last_time(args.symbol)
+        since = ms(args.start) if since is None else since + 1
+        if since is None:
+            raise SystemExit("--record requiert --start pour un stockage vide")
+        store.record(create_exchange(), args.symbol, since, ms(args.end))
+    ticks = store.read(args.symbol, ms(args.start), ms(args.end))
+    if not len(ticks["time"]):
+        raise SystemExit(f"Aucun trade pour {args.symbol} dans {args.store}")
+
+    strategy = None
+    if args.strategy not in (None, "none", "legacy"):
+        params = dict(STRATEGY_PARAMS or {})
+        if args.theta is not None:
+            params["theta"] = args.theta
+        if args.rho is not None:
+            params["rho"] = args.rho
+        strategy = make_from_name(args.strategy, **params)
+
+    res = run_tick_replay(ticks, strategy=strategy, symbol=args.symbol, fee_rate=args.fee_rate)
+    for k, v in res.metrics.items():
+        print(f"{k:>14}: {v:.4f}" if isinstance(v, float) else f"{k:>14}: {v}")
+    if args.trades_csv:
+        res.trades.to_csv(args.trades_csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# path: simulation/sweep.py
+import argparse
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from config import CANDLE_STORE_DIR, TIMEFRAMES
+from data.store import CandleStore
+from indicators.compute import compute_indicators
+from risk.strategies.trailing import TrailingSLAndTP
+from simulation.backtest import DEFAULT_SYMBOL, load_history, resample_ohlcv, run_backtest
+from simulation.vectorized import run_vectorized_backtest
+
+logger = logging.getLogger(__name__)
+
+PARAMS = ("theta", "rho", "atr_multiplier")
+
+# données de marché du worker, chargées une fois par processus (initializer)
+_DATA: Dict[str, pd.DataFrame] = {}
+
+
+def _load(source: Tuple[Any, ...]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Charge les données et calcule les indicateurs (une fois par processus).
+
+    `source` = ("store", root, symbol, start, end) : lecture memmap du
+    `CandleStore`, pages partagées par l'OS entre workers ;
+    ou ("frames", df_m5, df_m15) : transmis une fois par worker.
+    """
+    if source[0] == "store":
+        _, root, symbol, start, end = source
+        df5, df15 = load_history(CandleStore(root), symbol, start, end)
+    elif source[0] == "frames":
+        _, df5, df15 = source
+    else:
+        raise ValueError(f"source inconnue: {source[0]!r}")
+    if df5.empty:
+        raise ValueError("aucune bougie M5 à rejouer")
+    if df15 is None:
+        df15 = resample_ohlcv(df5, TIMEFRAMES["M15"])
+    return compute_indicators(df5, TIMEFRAMES["M5"]), compute_indicators(df15, TIMEFRAMES["M15"])
+
+
+def _init_worker(source: Tuple[Any, ...]) -> None:
+    logging.disable(logging.INFO)  # PositionManager/OrderManager loggent chaque ordre
+    _DATA["m5"], _DATA["m15"] = _load(source)
+
+
+def _run_one(params: Dict[str, Optional[float]], engine: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    ind5, ind15 = _DATA["m5"], _DATA["m15"]
+    theta, rho, atr = params.get("theta"), params.get("rho"), params.get("atr_multiplier")
+    if engine == "vectorized":
+        res = run_vectorized_backtest(ind5, ind15, atr_multiplier=1.5 if atr is None else atr, **options)
+    else:
+        strategy = None
+        if theta is not None or rho is not None:
+            strategy = TrailingSLAndTP(theta=0.5 if theta is None else theta, rho=1.0 if rho is None else rho)
+        res = run_backtest(ind5, ind15, strategy=strategy, atr_multiplier=atr, **options)
+    return {**params, **res.metrics}
+
+
+def parameter_grid(**axes: Optional[Sequence[float]]) -> List[Dict[str, Optional[float]]]:
+    """Produit cartésien des axes fournis (axes vides ou None : valeur par défaut)."""
+    unknown = set(axes) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"paramètres inconnus: {sorted(unknown)}")
+    values: List[Sequence[Optional[float]]] = [axes.get(k) or (None,) for k in PARAMS]
+    return [
+        {k: None if v is None else float(v) for k, v in zip(PARAMS, combo)}
+        for combo in itertools.product(*values)
+    ]
+
+
+def run_sweep(
+    source: Tuple[Any, ...],
+    grid: Iterable[Dict[str, Optional[float]]],
+    workers: Optional[int] = None,
+    engine: str = "event",
+    rank_by: str = "total_pnl",
+    **options: Any,
+) -> pd.DataFrame:
+    """
+    Rejoue la même historique pour chaque combinaison de paramètres, sur un
+    pool de processus.
+
+    Les données (et leurs indicateurs) sont chargées une seule fois par
+    worker via l'initializer du pool : seules les combinaisons de paramètres
+    transitent par tâche.
+
+    Args:
+        source: ("store", root, symbol, start, end) ou ("frames", df_m5, df_m15).
+        grid: Combinaisons (cf. `parameter_grid`).
+        workers: Taille du pool (défaut : nombre de CPU) ; 1 = exécution locale.
+        engine: "event" (`run_backtest`, toutes stratégies) ou "vectorized"
+            (`run_vectorized_backtest`, trailing historique : theta/rho refusés).
+        rank_by: Métrique de classement (décroissant).
+        options: Transmis au moteur (fee_rate, investment_usd...).
+
+    Returns:
+        Une ligne par combinaison (paramètres + métriques), triée, colonne `rank`.
+    """
+    grid = list(grid)
+    if engine not in ("event", "vectorized"):
+        raise ValueError(f"engine inconnu: {engine!r}")
+    if engine == "vectorized" and any(p.get("theta") is not None or p.get("rho") is not None for p in grid):
+        raise ValueError("le moteur vectorisé ne gère que le trailing historique (pas de theta/rho)")
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(grid) <= 1:
+        _DATA["m5"], _DATA["m15"] = _load(source)
+        rows = [_run_one(p, engine, options) for p in grid]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(grid)), initializer=_init_worker, initargs=(source,)) as pool:
+            rows = list(pool.map(_run_one, grid, [engine] * len(grid), [options] * len(grid)))
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    table = table.sort_values(rank_by, ascending=False, kind="stable").reset_index(drop=True)
+    table.insert(0, "rank", range(1, len(table) + 1))
+    return table
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Grid search theta / rho / atr_multiplier")
+    parser.add_argument("--symbol", default=DEFAULT_SYMBOL)
+    parser.add_argument("--store", default=CANDLE_STORE_DIR)
+    parser.add_argument("--start", default=None, help="Début (date ISO).")
+    parser.add_argument("--end", default=None, help="Fin (date ISO).")
+    parser.add_argument("--theta", type=float, nargs="*", default=None)
+    parser.add_argument("--rho", type=float, nargs="*", default=None)
+    parser.add_argument("--atr", type=float, nargs="*", default=None, help="Valeurs d'atr_multiplier.")
+    parser.add_argument("--engine", choices=["event", "vectorized"], default="event")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="total_pnl")
+    parser.add_argument("--csv", default=None, help="Export CSV du tableau.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args = _parse_args()
+    ms = lambda s: None if s is None else int(pd.Timestamp(s).value // 10**6)  # noqa: E731
+    source = ("store", args.store, args.symbol, ms(args.start), ms(args.end))
+    grid = parameter_grid(theta=args.theta, rho=args.rho, atr_multiplier=args.atr)
+    table = run_sweep(source, grid, workers=args.workers, engine=args.engine, rank_by=args.rank_by)
+    print(table.to_string(index=False))
+    if args.csv:
+        table.to_csv(args.csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# path: simulation/vectorized.py
+import logging
+from typing import Dict, Literal, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import INVESTMENT_USD, LEVERAGE, LOOKBACK, TICK_SIZE, TIMEFRAMES
+from indicators.compute import compute_indicators
+from data.align import timeframe_ms
+from simulation.backtest import M5_COLUMNS, M15_COLUMNS, BacktestResult, _columns, resample_ohlcv
+from simulation.fills import IntrabarModel
+from simulation.metrics import summarize
+from strategy.signal import generate_signal_series
+from utils.price_utils import align_price, align_prices
+
+logger = logging.getLogger(__name__)
+
+
+def _align(x: np.ndarray, tick: float, mode: Literal["down", "up"]) -> np.ndarray:
+    """`align_prices` laissant passer les ±inf (SL suiveur pas encore armé)."""
+    out = np.array(x, dtype=float)
+    finite = np.isfinite(out)
+    out[finite] = align_prices(out[finite], tick, mode)
+    return out
+
+
+def _resolve_exit(
+    i: int,
+    direction: int,
+    dist: float,
+    tp: float,
+    sl0: float,
+    c: Dict[str, np.ndarray],
+    tick: float,
+    trailing: bool,
+    intrabar: IntrabarModel = IntrabarModel(),
+    bar_ms: Optional[int] = None,
+    chunk: int = 256,
+) -> Tuple[int, float]:
+    """
+    Première bougie après `i` où le SL (éventuellement suiveur) ou le TP est
+    touché, résolue par blocs de bougies.
+
+    Le SL en vigueur sur la bougie k dépend des clôtures i+1..k-1 (le trailing
+    est appliqué après chaque clôture). Comme l'alignement est monotone, le
+    meilleur SL suiveur ne dépend que du max (long) / min (short) cumulé des
+    clôtures. Si SL et TP sont touchés dans la même bougie, `intrabar`
+    décide lequel est exécuté (par défaut le SL).
+
+    Returns:
+        (index de la bougie de sortie, prix d'exécution) ou (-1, nan).
+    """
+    n = len(c["close"])
+    lo = i + 1
+    best = -np.inf if direction > 0 else np.inf
+    while lo < n:
+        hi = min(n, lo + chunk)
+        o, h, l, cl = c["open"][lo:hi], c["high"][lo:hi], c["low"][lo:hi], c["close"][lo:hi]
+        sl = np.full(hi - lo, sl0)
+        if trailing:
+            # clôtures précédant chaque bougie du bloc (celle d'entrée exclue)
+            prev = c["close"][lo - 1:hi - 1].copy()
+            if lo == i + 1:
+                prev[0] = best
+            if direction > 0:
+                run = np.maximum.accumulate(np.maximum(prev, best))
+                trail = _align(run - dist, tick, "down")
+                sl = np.maximum(sl, trail)
+            else:
+                run = np.minimum.accumulate(np.minimum(prev, best))
+                trail = _align(run + dist, tick, "up")
+                sl = np.minimum(sl, trail)
+            best = float(run[-1])
+        hit, px = intrabar.resolve_sl_tp(o, h, l, cl, sl, tp, direction, c["time"][lo:hi], bar_ms)
+        if hit.any():
+            k = int(np.argmax(hit != 0))
+            return lo + k, float(px[k])
+        lo = hi
+        chunk *= 2
+    return -1, float("nan")
+
+
+def run_vectorized_backtest(
+    df_m5: pd.DataFrame,
+    df_m15: Optional[pd.DataFrame] = None,
+    investment_usd: float = INVESTMENT_USD,
+    leverage: float = LEVERAGE,
+    tick_size: float = TICK_SIZE,
+    fee_rate: float = 0.0005,
+    balance: Optional[float] = None,
+    warmup: int = LOOKBACK,
+    atr_multiplier: float = 1.5,
+    trailing: bool = True,
+    intrabar: Optional[IntrabarModel] = None,
+) -> BacktestResult:
+    """
+    Backtest vectorisé de la stratégie EMA/RSI avec sorties ATR.
+
+    Mêmes hypothèses que `run_backtest` (entrée à la clôture du signal, SL =
+    `atr_multiplier` × ATR14, TP = 2 × distance SL, trailing historique du SL
+    si `trailing`, SL prioritaire quand les deux sont touchés sauf autre
+    `intrabar`, ré-entrée possible sur la bougie de sortie) mais sans boucle
+    par bougie : les signaux sont calculés en bloc et seule la résolution
+    des sorties itère, une fois par trade, sur des tableaux.
+
+    `df_m5`/`df_m15` peuvent déjà contenir les colonnes de `compute_indicators`
+    (recherche de paramètres : calcul fait une seule fois).
+    """
+    if df_m15 is None:
+        df_m15 = resample_ohlcv(df_m5, TIMEFRAMES["M15"])
+    ind5 = df_m5 if set(M5_COLUMNS).issubset(df_m5.columns) else compute_indicators(df_m5, TIMEFRAMES["M5"])
+    ind15 = df_m15 if set(M15_COLUMNS).issubset(df_m15.columns) else compute_indicators(df_m15, TIMEFRAMES["M15"])
+    c5 = _columns(ind5)
+    n = len(ind5)
+    close = c5["close"]
+    atr = ind5["ATR14"].to_numpy(dtype=float)
+    intrabar = IntrabarModel() if intrabar is None else intrabar
+    bar_ms = timeframe_ms(TIMEFRAMES["M5"])
+
+    sig = generate_signal_series(ind15, ind5, TIMEFRAMES["M15"], TIMEFRAMES["M5"])
+    long_ = sig["long"].to_numpy().copy()
+    short = sig["short"].to_numpy().copy()
+    long_[:warmup] = short[:warmup] = False
+    entries = np.flatnonzero((long_ | short) & ~np.isnan(atr))
+
+    balance = investment_usd if balance is None else balance
+    rows = []
+    cash = np.zeros(n)
+    pos = np.zeros(n)
+    entry_px = np.zeros(n)
+    at = 0
+    while True:
+        p = int(np.searchsorted(entries, at))
+        if p >= len(entries):
+            break
+        i = int(entries[p])
+        direction = 1 if long_[i] else -1
+        entry = float(close[i])
+        dist = float(atr[i]) * atr_multiplier
+        if direction > 0:
+            sl0 = align_price(entry - dist, tick_size, mode="down")
+            tp = align_price(entry + 2 * dist, tick_size, mode="up")
+        else:
+            sl0 = align_price(entry + dist, tick_size, mode="up")
+            tp = align_price(entry - 2 * dist, tick_size, mode="down")
+        size = investment_usd * leverage / entry
+        k, exit_px = _resolve_exit(i, direction, dist, tp, sl0, c5, tick_size, trailing, intrabar, bar_ms)
+        end = n if k < 0 else k
+        cash[i] -= size * entry * fee_rate
+        pos[i:end] = direction * size
+        entry_px[i:end] = entry
+        if k < 0:
+            break  # position encore ouverte en fin d'historique
+        fees = size * (entry + exit_px) * fee_rate
+        pnl = direction * size * (exit_px - entry)
+        cash[k] += pnl - size * exit_px * fee_rate
+        rows.append({
+            "entry_time": int(c5["time"][i]) + timeframe_ms(TIMEFRAMES["M5"]),
+            "exit_time": int(c5["time"][k]),
+            "side": "buy" if direction > 0 else "sell",
+            "size": size,
+            "entry_price": entry,
+            "exit_price": exit_px,
+            "pnl": pnl - fees,
+        })
+        at = k
+
+    trades = pd.DataFrame(rows, columns=["entry_time", "exit_time", "side", "size", "entry_price", "exit_price", "pnl"])
+    for col in ("entry_time", "exit_time"):
+        trades[col] = pd.to_datetime(trades[col], unit="ms")
+    equity = balance + np.cumsum(cash) + pos * (close - entry_px)
+    curve = pd.DataFrame({
+        "time": pd.to_datetime(c5["time"], unit="ms"),
+        "close": close,
+        "position": pos,
+        "equity": equity,
+    })
+    metrics = summarize(trades, curve)
+    metrics["fees"] = float(trades["size"].mul(trades["entry_price"] + trades["exit_price"]).sum() * fee_rate)
+    return BacktestResult(trades=trades, equity=curve, metrics=metrics)
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from data.align import asof_indices
+
 def generate_signal(df_m15: pd.DataFrame, df_m5: pd.DataFrame) -> dict:
     """
     Analyse les indicateurs M15 et M5 pour générer un signal de trading.
@@ -56,3 +59,62 @@ def generate_signal(df_m15: pd.DataFrame, df_m5: pd.DataFrame) -> dict:
         'vol_ok': vol_ok,
         'rsi': rsi7,
     }
+
+
+def generate_signal_series(
+    df_m15: pd.DataFrame,
+    df_m5: pd.DataFrame,
+    tf_m15: str = '15m',
+    tf_m5: str = '5m',
+) -> pd.DataFrame:
+    """
+    Version vectorisée de `generate_signal` : une ligne par bougie M5.
+
+    Chaque bougie M5 est associée à la dernière bougie M15 clôturée à sa
+    clôture (ouverture M15 + 15m <= ouverture M5 + 5m), jamais à une bougie
+    future. La dernière ligne est identique au résultat de `generate_signal`
+    appelé sur les mêmes données ; les lignes sans M15 clôturée sont
+    neutres, comme les deux premières (pas de croisement calculable).
+
+    Returns:
+        DataFrame indexé comme `df_m5`, colonnes 'long', 'short', 'mom',
+        'cross', 'vol_ok', 'rsi'.
+    """
+    if 'time' not in df_m15.columns or 'time' not in df_m5.columns:
+        raise ValueError("generate_signal_series: colonne 'time' requise pour l'alignement")
+    j15 = asof_indices(df_m15['time'], df_m5['time'], tf_m15, tf_m5)
+    has15 = j15 >= 0
+    j15 = np.where(has15, j15, 0)
+
+    # ----- 1. Momentum M15 -----
+    e21_15 = df_m15['EMA21'].to_numpy(dtype=float)[j15]
+    e50_15 = df_m15['EMA50'].to_numpy(dtype=float)[j15]
+    up = has15 & (e21_15 > e50_15)
+    down = has15 & (e21_15 < e50_15)
+    mom = np.where(up, 'up', np.where(down, 'down', 'neutral')).astype(object)
+
+    # ----- 2. Croisement EMA sur M5 (bougie, précédente, avant-précédente) -----
+    e9 = df_m5['EMA9'].to_numpy(dtype=float)
+    e21 = df_m5['EMA21'].to_numpy(dtype=float)
+    n = len(e9)
+    cross = np.zeros(n, dtype=np.int8)
+    if n >= 3:
+        above, below = e9[2:] > e21[2:], e9[2:] < e21[2:]
+        le, ge = e9 <= e21, e9 >= e21
+        bull = above & (le[1:-1] | le[:-2])
+        bear = below & (ge[1:-1] | ge[:-2])
+        cross[2:] = np.where(bull, 1, np.where(bear, -1, 0))
+
+    # ----- 3. Volume & RSI sur M5 -----
+    vol_ok = df_m5['volume'].to_numpy(dtype=float) > df_m5['Vol_SMA5'].to_numpy(dtype=float)
+    rsi7 = df_m5['RSI7'].to_numpy(dtype=float)
+
+    # ----- 4. Conditions de signal -----
+    return pd.DataFrame({
+        'long': up & (cross == 1) & (rsi7 > 30),
+        'short': down & (cross == -1) & (rsi7 < 70),
+        'mom': mom,
+        'cross': cross,
+        'vol_ok': vol_ok,
+        'rsi': rsi7,
+    }, index=df_m5.index)
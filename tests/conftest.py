@@ -1,4 +1,6 @@
 # path: tests/conftest.py
+import numpy as np
+import pandas as pd
 import pytest
 import ccxt
 
@@ -112,3 +114,25 @@ def order_manager(dummy_exchange):
     from execution.order_manager import OrderManager
 
     return OrderManager(dummy_exchange, "BTC/USDT")
+
+
+def _synthetic_ohlcv(n, seed=0, start_ms=1_699_999_200_000):
+    """M5 synthétiques : tendance de fond + oscillations (croisements M5 dans le sens du M15)."""
+    rng = np.random.default_rng(seed)
+    i = np.arange(n)
+    trend = np.where((i // 500) % 2 == 0, 0.4, -0.4)
+    close = 2000 + np.cumsum(trend) + 12 * np.sin(2 * np.pi * i / 40) + rng.normal(0, 1, n)
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        "time": pd.to_datetime(start_ms + i * 300_000, unit="ms"),
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.random(n) * 2,
+        "low": np.minimum(open_, close) - rng.random(n) * 2,
+        "close": close,
+        "volume": rng.random(n) * 100 + 1,
+    })
+
+
+@pytest.fixture
+def synthetic_ohlcv():
+    return _synthetic_ohlcv
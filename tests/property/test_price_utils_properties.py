@@ -2,10 +2,11 @@
 import math
 from typing import Literal
 
+import numpy as np
 import pytest
-from hypothesis import given, settings, strategies as st
+from hypothesis import assume, given, settings, strategies as st
 
-from utils.price_utils import align_price
+from utils.price_utils import align_price, align_prices
 
 
 # Stratégies sûres pour éviter NaN/inf et pas trop petits (erreurs flottantes)
@@ -48,12 +49,53 @@ def test_align_price_idempotent_within_one_tick(p: float, t: float, mode: Litera
     Idempotence robuste : réappliquer l'alignement ne doit pas déplacer de plus d'UN tick
     (pour tolérer les effets de bord quand la valeur tombe pile sur une frontière).
     """
+    # au-delà de ~1e9 ticks, un ulp du prix dépasse la tolérance t * 5e-7
+    # (p=15005001.0, t=1e-6 : écart d'un tick + 2.4e-10)
+    assume(abs(p) <= t * 1e9)
     once = align_price(p, t, mode=mode)
     twice = align_price(once, t, mode=mode)
     eps = max(1e-12, t * 5e-7)
     assert abs(twice - once) <= t + eps
 
 
+# prix proches d'un multiple du tick, à l'epsilon de snap près : les cas limites
+near_grid = st.tuples(
+    st.integers(min_value=-10**9, max_value=10**9),
+    st.sampled_from([0.0, 1e-7, -1e-7, 5e-7, -5e-7, 4.99e-7, -4.99e-7, 1e-12, -1e-12]),
+)
+grid_ticks = st.sampled_from([1e-6, 1e-4, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 1e6])
+
+
+def _same_bits(a: np.ndarray, b: np.ndarray) -> bool:
+    return a.view(np.int64).tolist() == b.view(np.int64).tolist()
+
+
+@given(ps=st.lists(prices, max_size=50), t=ticks, mode=modes)
+@settings(max_examples=200)
+def test_align_prices_matches_scalar(ps, t: float, mode: Literal["down", "up"]) -> None:
+    """Version tableau identique au bit près à `align_price`, élément par élément."""
+    expected = np.array([align_price(p, t, mode=mode) for p in ps], dtype=np.float64)
+    assert _same_bits(align_prices(np.array(ps, dtype=np.float64), t, mode), expected)
+
+
+@given(ks=st.lists(near_grid, min_size=1, max_size=50), t=grid_ticks, mode=modes)
+@settings(max_examples=200)
+def test_align_prices_matches_scalar_near_snap_boundary(ks, t: float, mode: Literal["down", "up"]) -> None:
+    ps = [(k + off) * t for k, off in ks]
+    expected = np.array([align_price(p, t, mode=mode) for p in ps], dtype=np.float64)
+    assert _same_bits(align_prices(np.array(ps), t, mode), expected)
+
+
+def test_align_prices_keeps_shape_and_validates_args() -> None:
+    grid = np.array([[100.03, -0.0], [0.0, 1.23456]])
+    out = align_prices(grid, 0.05, mode="up")
+    assert out.shape == (2, 2) and out[0, 0] == 100.05 and math.copysign(1, out[0, 1]) == -1
+    with pytest.raises(ValueError):
+        align_prices(grid, 0.0, mode="down")
+    with pytest.raises(ValueError):
+        align_prices(grid, 0.05, mode="sideways")  # type: ignore[arg-type]
+
+
 def test_align_price_raises_on_zero_or_negative_tick() -> None:
     with pytest.raises(ValueError):
         align_price(100.0, 0.0, mode="down")
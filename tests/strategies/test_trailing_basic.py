@@ -88,3 +88,78 @@ def test_idempotent_same_inputs():
     d1 = strat.compute_targets(s, ctx("buy"))
     d2 = strat.compute_targets(s, ctx("buy"))
     assert d1 == d2
+
+
+def test_tick_domain_matches_float_domain():
+    from utils.price_utils import ticks_to_price
+
+    tick = 0.05
+    for name, side, price, snap in [
+        ("trailing_sl_only", "buy", 111.13, snapshot_long),
+        ("trailing_sl_only", "sell", 88.87, snapshot_short),
+        ("trailing_sl_and_tp", "buy", 117.01, snapshot_long),
+        ("trailing_sl_and_tp", "sell", 83.33, snapshot_short),
+    ]:
+        strat = make_strategy(name, theta=0.5, rho=1.0)
+        f_sl = f_tp = t_sl = t_tp = None
+        for step in range(4):
+            p = price + (step if side == "buy" else -step) * 0.37
+            tp0 = 120.0 if side == "buy" else 80.0
+            d = strat.compute_targets(snap(price=p, sl=f_sl, tp=f_tp, tp0=tp0), ctx(side, tick))
+            f_sl, f_tp = d.sl_price, d.tp_price
+            dt = strat.compute_targets(
+                snap(price=p, sl=t_sl, tp=t_tp, tp0=round(tp0 / tick)),
+                StrategyContext(symbol="BTC/USDT", side=side, tick_size=tick, ticks=True),
+            )
+            t_sl, t_tp = dt.sl_price, dt.tp_price
+            assert isinstance(t_sl, int) and isinstance(t_tp, int)
+            assert ticks_to_price(t_sl, tick) == f_sl and ticks_to_price(t_tp, tick) == f_tp
+
+
+def _scalar_path(strat, prices, snap, c):
+    sl, tp, out = snap.sl_current, snap.tp_current, []
+    for p in prices:
+        d = strat.compute_targets(
+            PositionSnapshot(snap.entry_price, float(p), 1.0, 1.0, sl, tp, snap.tp_initial, snap.trail_dist), c
+        )
+        sl, tp = d.sl_price, d.tp_price
+        out.append((sl, tp))
+    return out
+
+
+def test_compute_targets_path_is_bit_identical_to_scalar_loop():
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    for trial in range(120):
+        side = "buy" if trial % 2 else "sell"
+        ticks = trial % 4 >= 2
+        tick = [0.01, 0.05, 0.5][trial % 3]
+        entry = float(rng.uniform(50, 5000))
+        dist = entry * float(rng.uniform(0.002, 0.03))
+        drift = 0.2 if side == "buy" else -0.2
+        prices = entry + np.cumsum(rng.normal(drift, 1.0, int(rng.integers(1, 200)))) * entry * 1e-3
+        tp0 = entry + 2 * dist if side == "buy" else entry - 2 * dist
+        c = StrategyContext(symbol="BTC/USDT", side=side, tick_size=tick, ticks=ticks)
+        snap = PositionSnapshot(entry, entry, 1.0, 1.0, None, None, round(tp0 / tick) if ticks else tp0, dist)
+        for strat in (make_strategy("trailing_sl_only"), make_strategy("trailing_sl_and_tp", theta=0.3, rho=1.5)):
+            path = strat.compute_targets_path(prices, snap, c)
+            ref = _scalar_path(strat, prices, snap, c)
+            assert path.sl_price.tobytes() == np.array([r[0] for r in ref], dtype=path.sl_price.dtype).tobytes()
+            assert path.tp_price.tobytes() == np.array([r[1] for r in ref], dtype=path.tp_price.dtype).tobytes()
+            assert path.sl_price.dtype == (np.int64 if ticks else np.float64)
+
+
+def test_compute_targets_paths_handles_several_trades():
+    strat = make_strategy("trailing_sl_and_tp", theta=0.5, rho=1.0)
+    paths = strat.compute_targets_paths(
+        [[110.0, 115.0, 118.0], [90.0, 85.0]],
+        [snapshot_long(sl=95.0), snapshot_short(sl=105.0)],
+        [ctx("buy"), ctx("sell")],
+    )
+    assert [len(p.sl_price) for p in paths] == [3, 2]
+    assert paths[0].sl_price.tolist() == [105.0, 110.0, 113.0]
+    assert paths[0].tp_price[-1] > 120.0
+    # pas de TP initial : trajectoire TP vide de sens (NaN)
+    empty = strat.compute_targets_path([110.0], snapshot_long(tp0=None), ctx("buy"))
+    assert math.isnan(empty.tp_price[0])
@@ -0,0 +1,57 @@
+# path: tests/test_align.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.align import AsOfAligner, align_frames, asof_frame, asof_indices, timeframe_ms
+
+M5, M15 = 300_000, 900_000
+T0 = 1_699_999_200_000  # multiple de 15 min
+
+
+def test_timeframe_ms():
+    assert timeframe_ms("5m") == M5
+    assert timeframe_ms("1h") == 3_600_000
+    with pytest.raises(ValueError):
+        timeframe_ms("5x")
+
+
+def test_asof_indices_never_uses_forming_bar():
+    t15 = T0 + np.arange(4) * M15
+    t5 = T0 + np.arange(12) * M5
+    idx = asof_indices(t15, t5, "15m", "5m")
+    # la M15 n°k n'est utilisable qu'à partir de la 3e M5 qu'elle contient (clôture commune)
+    assert list(idx) == [-1, -1, 0, 0, 0, 1, 1, 1, 2, 2, 2, 3]
+    # datetimes et entiers donnent le même résultat
+    idx_dt = asof_indices(pd.Series(pd.to_datetime(t15, unit="ms")), pd.to_datetime(t5, unit="ms"), "15m", "5m")
+    np.testing.assert_array_equal(idx, idx_dt)
+
+
+def test_align_frames_and_asof_frame():
+    m15 = pd.DataFrame({"time": pd.to_datetime(T0 + np.arange(3) * M15, unit="ms"), "EMA50": [1.0, 2.0, 3.0]})
+    m5 = pd.DataFrame({"time": pd.to_datetime(T0 + np.arange(9) * M5, unit="ms")}, index=range(10, 19))
+    out = align_frames(m15, m5, "15m", "5m")
+    assert list(out.index) == list(m5.index)
+    np.testing.assert_array_equal(out["EMA50"], [np.nan, np.nan, 1, 1, 1, 2, 2, 2, 3])
+    assert asof_frame(m15, m5["time"].iloc[4], "15m", "5m")["EMA50"].tolist() == [1.0]
+    assert asof_frame(m15, m5["time"].iloc[0], "15m", "5m").empty
+
+
+def test_incremental_aligner_matches_bulk():
+    rng = np.random.default_rng(0)
+    t15 = T0 + np.sort(rng.choice(200, 120, replace=False)) * M15  # M15 avec trous
+    t5 = T0 + np.arange(600) * M5
+    bulk = asof_indices(t15, t5, "15m", "5m")
+    al = AsOfAligner("15m", "5m", maxlen=50)
+    pushed = 0
+    for i, t in enumerate(t5):
+        # live : chaque M15 est poussée une fois clôturée
+        while pushed < len(t15) and t15[pushed] + M15 <= t + M5:
+            al.push(int(t15[pushed]))
+            pushed += 1
+        got = al.asof(int(t))
+        assert got == (None if bulk[i] < 0 else int(t15[bulk[i]])), i
+    # requête dans le passé : repli sur recherche binaire
+    assert al.asof(int(t5[-1])) == int(t15[bulk[-1]])
+    k = len(t5) - 30
+    assert al.asof(int(t5[k])) == int(t15[bulk[k]])
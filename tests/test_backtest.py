@@ -0,0 +1,92 @@
+# path: tests/test_backtest.py
+import ccxt
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation.backtest import resample_ohlcv, run_backtest
+from simulation.exchange import SimulatedExchange
+
+TF_MS = 5 * 60_000
+T0 = 1_700_000_000_000 - (1_700_000_000_000 % (3 * TF_MS))
+SYM = "ETH/USD:USD"
+
+
+def _candles(opens, highs, lows, closes):
+    n = len(opens)
+    return {
+        "time": T0 + np.arange(n) * TF_MS,
+        "open": np.asarray(opens, dtype=float),
+        "high": np.asarray(highs, dtype=float),
+        "low": np.asarray(lows, dtype=float),
+        "close": np.asarray(closes, dtype=float),
+        "volume": np.ones(n),
+    }
+
+
+def test_fetch_ohlcv_never_returns_future_candles():
+    c = _candles([1, 2, 3, 4], [1, 2, 3, 4], [1, 2, 3, 4], [1, 2, 3, 4])
+    ex = SimulatedExchange(SYM, {"5m": c})
+    assert ex.fetch_ohlcv(SYM, "5m") == []
+    ex.advance()
+    ex.advance()
+    assert ex.milliseconds() == T0 + 2 * TF_MS
+    rows = ex.fetch_ohlcv(SYM, "5m", since=T0 - 10 * TF_MS, limit=100)
+    assert [r[0] for r in rows] == [T0, T0 + TF_MS]
+    assert ex.fetch_ohlcv(SYM, "5m", limit=1)[0][0] == T0 + TF_MS
+
+
+def test_stop_gap_fills_at_open_and_reduce_only_sibling_stays_open():
+    c = _candles([100, 100, 90], [101, 101, 91], [99, 99, 88], [100, 100, 89])
+    ex = SimulatedExchange(SYM, {"5m": c}, fee_rate=0.0)
+    ex.advance()
+    ex.create_order(SYM, "market", "buy", 2.0)
+    assert ex.fetch_positions([SYM])[0]["contracts"] == 2.0
+    sl = ex.create_order(SYM, "limit", "sell", 2.0, 95.0, {"stopPrice": 95.0, "reduceOnly": True})
+    tp = ex.create_order(SYM, "limit", "sell", 2.0, 110.0, {"reduceOnly": True})
+    ex.advance()
+    assert len(ex.fetch_open_orders(SYM)) == 2
+    ex.advance()  # ouverture à 90 sous le stop : exécution à l'open
+    assert ex.orders[sl["id"]]["status"] == "closed"
+    assert ex.orders[sl["id"]]["average"] == 90.0
+    assert ex.fetch_positions([SYM]) == []
+    assert ex.trades[0]["pnl"] == pytest.approx(-20.0)
+    # le TP reduceOnly reste au carnet jusqu'à son annulation (check_exit)
+    assert [o["id"] for o in ex.fetch_open_orders(SYM)] == [tp["id"]]
+    ex.cancel_order(tp["id"], SYM)
+    with pytest.raises(ccxt.OrderNotFound):
+        ex.cancel_order(tp["id"], SYM)
+
+
+def test_resample_keeps_only_complete_buckets(synthetic_ohlcv):
+    df = synthetic_ohlcv(10)
+    out = resample_ohlcv(df, "15m")
+    assert len(out) == 3  # 10 M5 = 3 M15 complètes + 1 partielle écartée
+    assert out["high"].iloc[0] == df["high"].iloc[:3].max()
+    assert out["close"].iloc[2] == df["close"].iloc[8]
+
+
+def test_backtest_runs_real_pipeline_and_reports_metrics(synthetic_ohlcv):
+    df = synthetic_ohlcv(1500)
+    res = run_backtest(df, fee_rate=0.0005)
+    assert len(res.equity) == len(df)
+    assert res.metrics["n_trades"] == len(res.trades) > 0
+    # toutes les positions sont soldées par SL/TP/sortie d'urgence, jamais en avance
+    assert (res.trades["exit_time"] >= res.trades["entry_time"]).all()
+    assert res.trades["entry_time"].min() >= df["time"].iloc[100]
+    # cohérence comptable : capital final = initial + somme des PnL des trades (+ latent)
+    open_pnl = res.equity["equity"].iloc[-1] - (res.equity["equity"].iloc[0] + res.trades["pnl"].sum())
+    if res.equity["position"].iloc[-1] == 0:
+        assert open_pnl == pytest.approx(0.0, abs=1e-9)
+    assert 0.0 <= res.metrics["max_drawdown"] <= 1.0
+
+
+def test_backtest_tick_prices_matches_float_state(synthetic_ohlcv):
+    from risk.strategies.registry import make_strategy
+
+    df = synthetic_ohlcv(1500)
+    strategy = make_strategy("trailing_sl_and_tp", theta=0.3, rho=1.0)
+    floats = run_backtest(df, strategy=strategy)
+    ticks = run_backtest(df, strategy=strategy, tick_prices=True)
+    assert len(floats.trades) > 0
+    pd.testing.assert_frame_equal(ticks.trades, floats.trades)
@@ -0,0 +1,101 @@
+# path: tests/test_clock.py
+import pytest
+
+from data.clock import CandleClock
+from data.feed import CandleFeed
+
+M5 = 5 * 60_000
+M15 = 15 * 60_000
+T0 = 1_700_000_100_000 - (1_700_000_100_000 % M15)
+
+
+class FakeTime:
+    """Exchange dont l'horloge locale avance avec `sleep` ; le serveur a `skew` ms d'avance."""
+
+    def __init__(self, now, skew=0, publish_delay=0):
+        self.now = now
+        self.skew = skew
+        self.publish_delay = publish_delay  # ms après sa clôture avant qu'une bougie soit servie
+        self.has = {"fetchTime": True}
+        self.ohlcv_calls = 0
+        self.sleeps = []
+
+    def milliseconds(self):
+        return self.now
+
+    def parse_timeframe(self, timeframe):
+        return int(timeframe[:-1]) * 60
+
+    def fetch_time(self):
+        return self.now + self.skew
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += int(round(seconds * 1000))
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.ohlcv_calls += 1
+        tf = self.parse_timeframe(timeframe) * 1000
+        server = self.now + self.skew
+        ts, rows = since - since % tf, []
+        while ts + tf <= server - self.publish_delay and (limit is None or len(rows) < limit):
+            rows.append([ts, 1.0, 2.0, 0.5, 1.5, 10.0])
+            ts += tf
+        return rows
+
+
+def test_sync_estimates_offset_and_next_close_uses_server_time():
+    fx = FakeTime(T0 + 10_000, skew=2_000)
+    clock = CandleClock(fx, ["5m", "15m"], sleep=fx.sleep)
+    assert clock.sync() == pytest.approx(2_000)
+    assert clock.now_ms() == T0 + 12_000
+    assert clock.next_close("5m") == T0 + M5
+    assert clock.next_close("15m") == T0 + M15
+    assert clock.last_closed_open("5m") == T0 - M5
+
+
+def test_sync_falls_back_to_date_header():
+    fx = FakeTime(T0)
+    fx.has = {}
+    fx.last_response_headers = {"Date": "Tue, 14 Nov 2023 22:13:20 GMT"}  # 1_700_000_000 s
+    clock = CandleClock(fx, ["5m"])
+    assert clock.sync() == pytest.approx(1_700_000_000_500 - T0)
+
+
+def test_wait_sleeps_until_next_close_and_reports_timeframes():
+    fx = FakeTime(T0 + M5 - 3_000, skew=1_000)
+    clock = CandleClock(fx, ["5m", "15m"], grace=0.5, sleep=fx.sleep)
+    assert clock.wait() == ["5m"]
+    assert fx.sleeps == [pytest.approx(2.5)]  # 2 s (heure serveur) + grâce
+    assert fx.now + fx.skew == T0 + M5 + 500
+    assert clock.wait() == ["5m"]
+    assert clock.wait() == ["5m", "15m"]
+    assert fx.now + fx.skew == T0 + M15 + 500
+
+
+def test_poll_closed_waits_for_publication_then_stays_idle():
+    fx = FakeTime(T0 + M5 + 500, publish_delay=2_000)
+    clock = CandleClock(fx, ["5m", "15m"], poll_interval=1.0, sleep=fx.sleep)
+    clock.sync()
+    feed = CandleFeed(fx, window=10, clock=clock.now_ms)
+    fx.now = T0 + M5 - 1  # bootstrap avant la clôture de la bougie T0
+    feed.bootstrap("ETH/USD", "5m")
+    feed.bootstrap("ETH/USD", "15m")
+    fx.now = T0 + M5 + 500
+    fx.ohlcv_calls = 0
+
+    assert clock.poll_closed(feed, "ETH/USD", "5m") == 1
+    assert feed.last_closed("ETH/USD", "5m") == T0
+    assert fx.ohlcv_calls == 3  # publiée 2 s après la clôture, re-demandée chaque seconde
+    # M15 pas encore clôturée, M5 déjà à jour : aucune requête
+    assert clock.poll_closed(feed, "ETH/USD", "15m") == 0
+    assert clock.poll_closed(feed, "ETH/USD", "5m") == 0
+    assert fx.ohlcv_calls == 3
+
+
+def test_poll_until_gives_up_after_max_wait():
+    fx = FakeTime(T0)
+    clock = CandleClock(fx, ["5m"], poll_interval=1.0, max_wait=3.0, sleep=fx.sleep)
+    calls = []
+    assert clock.poll_until(lambda: calls.append(1) or 0, lambda: False) == 0
+    assert len(calls) == 4
@@ -0,0 +1,183 @@
+# path: tests/test_engine.py
+import asyncio
+import contextlib
+import time
+
+import ccxt
+import pandas as pd
+import pytest
+
+from config import LOOKBACK
+from data.feed import CandleFeed
+from data.fetcher import resolve_symbol
+from data.store import CandleStore
+from execution.engine import AsyncEngine, MultiSymbolEngine, with_retries_async
+from execution.order_manager import OrderManager
+from execution.position_manager import PositionManager
+from indicators.streaming import StreamingIndicators
+from simulation.paper import create_paper_exchange
+
+SYM = "ETH/USD:USD"
+
+
+def test_retry_backoff_does_not_block_other_tasks():
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise ccxt.NetworkError("boom")
+        return "ok"
+
+    async def scenario():
+        ticks = 0
+
+        async def other():
+            nonlocal ticks
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        result, _ = await asyncio.gather(with_retries_async(flaky, base_delay=0.1), other())
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    assert result == "ok" and len(attempts) == 2
+    assert ticks == 5
+
+
+class _SlowFeed:
+    """Chaque requête prend `delay` s ; une bougie M5 et une M15 nouvelles."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.frames = {
+            tf: pd.DataFrame({"time": pd.to_datetime([0], unit="ms"), "close": [100.0]}) for tf in ("15m", "5m")
+        }
+
+    def poll(self, symbol, timeframe):
+        time.sleep(self.delay)
+        return 1
+
+    def frame(self, symbol, timeframe):
+        return self.frames[timeframe]
+
+
+class _Ind:
+    def extend(self, df):
+        self.df = df
+
+    def frame(self):
+        return self.df
+
+
+class _SlowPM:
+    def __init__(self, delay):
+        self.delay = delay
+        self.prefetched = False
+
+    def tick(self):
+        return contextlib.nullcontext()
+
+    def prefetch(self):
+        time.sleep(self.delay)
+        self.prefetched = True
+
+    def close(self):
+        pass
+
+
+def test_step_refreshes_timeframes_and_positions_concurrently():
+    pm = _SlowPM(0.2)
+    engine = AsyncEngine(_SlowFeed(0.2), pm, SYM, _Ind(), _Ind(), 100.0, 1.0)
+    handled = []
+    engine.on_m5_close = lambda: handled.append(engine.df5)
+
+    t0 = time.perf_counter()
+    assert asyncio.run(engine.step()) is True
+    elapsed = time.perf_counter() - t0
+    assert elapsed < 0.45  # ~ la requête la plus lente, pas la somme (0.6 s)
+    assert pm.prefetched and len(handled) == 1
+    assert engine.df15 is not None
+
+
+def test_engine_runs_paper_replay(tmp_path, synthetic_ohlcv):
+    df = synthetic_ohlcv(900)
+    CandleStore(str(tmp_path)).append(SYM, "5m", df)
+    ex = create_paper_exchange(str(tmp_path), fee_rate=0.0)
+    sym = resolve_symbol(ex, "PF_ETHUSD")
+    pm = PositionManager(ex, sym, OrderManager(ex, sym))
+    engine = AsyncEngine(
+        CandleFeed(ex, window=LOOKBACK), pm, sym,
+        StreamingIndicators("15m", maxlen=LOOKBACK), StreamingIndicators("5m", maxlen=LOOKBACK),
+        investment_usd=100.0, leverage=1.0,
+    )
+    asyncio.run(engine.run(ex.advance_ticks))
+    assert ex.index == len(df) - 1
+    # toutes les bougies rejouées ont été traitées, indicateurs à jour
+    assert engine.df5.time.iloc[-1] == df["time"].iloc[-1]
+    assert len(engine.df5) == LOOKBACK and engine.df5.ATR14.notna().iloc[-1]
+    assert len(ex.trades) > 0
+
+
+class _FakeEngine:
+    def __init__(self, symbol, log, fail=False):
+        self.symbol = symbol
+        self.log = log
+        self.fail = fail
+        self.running = 0
+
+    async def bootstrap(self):
+        pass
+
+    async def step(self):
+        self.log.append(("start", self.symbol, time.perf_counter()))
+        await asyncio.sleep(0.05)
+        self.log.append(("end", self.symbol, time.perf_counter()))
+        if self.fail:
+            raise ccxt.ExchangeError("rejected")
+        return True
+
+
+def test_multi_symbol_staggers_bounds_concurrency_and_isolates_errors():
+    log = []
+    engines = [_FakeEngine(f"S{i}", log, fail=(i == 1)) for i in range(6)]
+    multi = MultiSymbolEngine(engines, stagger=0.06, max_concurrency=2)
+    t0 = time.perf_counter()
+    processed = asyncio.run(multi.step())
+    assert processed == 5  # le symbole en erreur n'empêche pas les autres
+    starts = [t for kind, _, t in log if kind == "start"]
+    assert starts[0] - t0 < 0.02 and starts[-1] - t0 >= 0.05  # départs étalés sur la fenêtre
+    running = peak = 0
+    for kind, _, _ in sorted(log, key=lambda e: e[2]):
+        running += 1 if kind == "start" else -1
+        peak = max(peak, running)
+    assert peak <= 2
+
+
+def test_multi_symbol_engine_shares_feed_and_exchange_across_symbols():
+    class FX:
+        def __init__(self):
+            self.calls = []
+            self.now = 3 * 300_000
+
+        def milliseconds(self):
+            return self.now
+
+        def parse_timeframe(self, tf):
+            return int(tf[:-1]) * 60
+
+        def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+            self.calls.append(symbol)
+            return []
+
+    fx = FX()
+    feed = CandleFeed(fx, window=10)
+    engines = [
+        AsyncEngine(feed, _SlowPM(0.0), sym, StreamingIndicators("15m"), StreamingIndicators("5m"), 100.0, 1.0)
+        for sym in ("A/USD:USD", "B/USD:USD", "C/USD:USD")
+    ]
+    multi = MultiSymbolEngine(engines, stagger=0.0)
+    asyncio.run(multi.run(lambda: False))
+    assert sorted(set(fx.calls)) == ["A/USD:USD", "B/USD:USD", "C/USD:USD"]
+    assert len(fx.calls) == 6  # un bootstrap M5 + M15 par symbole, sur un seul client
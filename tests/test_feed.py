@@ -0,0 +1,88 @@
+# path: tests/test_feed.py
+import pandas as pd
+import pytest
+
+from data.feed import CandleFeed
+
+TF_MS = 5 * 60_000
+T0 = 1_700_000_100_000 - (1_700_000_100_000 % TF_MS)
+
+
+class FXClock:
+    """Exchange simulé : série de bougies 5m régulières et horloge pilotable."""
+
+    def __init__(self, now: int) -> None:
+        self.now = now
+        self.calls: list[tuple[int | None, int | None]] = []
+
+    def milliseconds(self) -> int:
+        return self.now
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return int(timeframe[:-1]) * 60
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append((since, limit))
+        start = since - since % TF_MS
+        rows = []
+        ts = start
+        while ts <= self.now and (limit is None or len(rows) < limit):
+            px = float(ts // TF_MS % 1000)
+            rows.append([ts, px, px + 1, px - 1, px + 0.5, 10.0])
+            ts += TF_MS
+        return rows
+
+
+def test_bootstrap_keeps_only_closed_candles():
+    fx = FXClock(now=T0 + 2 * 60_000)  # bougie T0 en formation
+    feed = CandleFeed(fx, window=10)
+    df = feed.bootstrap("ETH/USD", "5m")
+    assert len(df) == 10
+    assert feed.last_closed("ETH/USD", "5m") == T0 - TF_MS
+    assert feed.partial("ETH/USD", "5m")[0] == T0
+    assert pd.api.types.is_datetime64_any_dtype(df["time"])
+    assert df["time"].iloc[-1] == pd.to_datetime(T0 - TF_MS, unit="ms")
+
+
+def test_poll_fetches_from_cursor_only():
+    fx = FXClock(now=T0 + 2 * 60_000)
+    feed = CandleFeed(fx, window=10)
+    feed.bootstrap("ETH/USD", "5m")
+
+    # Même bougie en formation : rien de nouveau
+    fx.now += 60_000
+    assert feed.poll("ETH/USD", "5m") == 0
+    since, limit = fx.calls[-1]
+    assert since == T0 - TF_MS
+    assert limit <= 3
+
+    # La bougie T0 se clôture
+    fx.now = T0 + TF_MS + 1_000
+    assert feed.poll("ETH/USD", "5m") == 1
+    df = feed.frame("ETH/USD", "5m")
+    assert len(df) == 10  # fenêtre bornée
+    assert df["time"].iloc[-1] == pd.to_datetime(T0, unit="ms")
+    assert df["time"].is_monotonic_increasing
+
+
+def test_poll_catches_up_after_missed_candles():
+    fx = FXClock(now=T0 + 1_000)
+    feed = CandleFeed(fx, window=5)
+    feed.bootstrap("ETH/USD", "5m")
+    fx.now = T0 + 3 * TF_MS + 1_000
+    assert feed.poll("ETH/USD", "5m") == 3
+    df = feed.frame("ETH/USD", "5m")
+    assert len(df) == 5
+    assert df["time"].diff().dropna().eq(pd.Timedelta(minutes=5)).all()
+
+
+def test_poll_without_bootstrap_bootstraps():
+    fx = FXClock(now=T0 + 1_000)
+    feed = CandleFeed(fx, window=4)
+    assert feed.poll("ETH/USD", "5m") == 4
+    assert len(fx.calls) == 1
+
+
+def test_invalid_window_raises():
+    with pytest.raises(ValueError):
+        CandleFeed(FXClock(now=T0), window=0)
@@ -0,0 +1,107 @@
+# path: tests/test_fills.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.store import CandleStore
+from simulation.backtest import resample_ohlcv, run_backtest
+from simulation.fills import HIT_SL, HIT_TP, NO_HIT, OHLC, STOP_FIRST, IntrabarModel
+from simulation.vectorized import run_vectorized_backtest
+
+
+def _bars(*rows):
+    return tuple(np.array(col, dtype=float) for col in zip(*rows))
+
+
+def test_policies_on_ambiguous_bars():
+    # long, SL 95 / TP 105 : bougie haussière, baissière, gap au-dessus du TP, rien
+    o, h, l, c = _bars((100, 106, 94, 104), (100, 106, 94, 96), (106, 107, 94, 95), (100, 101, 99, 100))
+    hit, px = IntrabarModel(STOP_FIRST).resolve_sl_tp(o, h, l, c, 95.0, 105.0, 1)
+    np.testing.assert_array_equal(hit, [HIT_SL, HIT_SL, HIT_SL, NO_HIT])
+    np.testing.assert_array_equal(px[:3], [95.0, 95.0, 95.0])
+
+    hit, px = IntrabarModel(OHLC).resolve_sl_tp(o, h, l, c, 95.0, 105.0, 1)
+    np.testing.assert_array_equal(hit, [HIT_SL, HIT_TP, HIT_TP, NO_HIT])
+    np.testing.assert_array_equal(px[:3], [95.0, 105.0, 106.0])
+
+    # short, SL 105 / TP 95 : mêmes bougies, rôles inversés
+    hit, _ = IntrabarModel(OHLC).resolve_sl_tp(o, h, l, c, 105.0, 95.0, -1)
+    np.testing.assert_array_equal(hit, [HIT_TP, HIT_SL, HIT_SL, NO_HIT])
+
+    with pytest.raises(ValueError):
+        IntrabarModel("close_first")
+
+
+def _fine(n, seed):
+    """Sous-bougies M1 continues (ouverture = clôture précédente)."""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 1.5, n))
+    open_ = np.r_[2000.0, close[:-1]]
+    return pd.DataFrame({
+        "time": pd.to_datetime(1_699_999_200_000 + np.arange(n) * 60_000, unit="ms"),
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.random(n),
+        "low": np.minimum(open_, close) - rng.random(n),
+        "close": close,
+        "volume": rng.random(n) + 1,
+    })
+
+
+@pytest.mark.parametrize("policy", [STOP_FIRST, OHLC])
+def test_drill_down_matches_sequential_replay(policy):
+    fine = _fine(5000, seed=3)
+    coarse = resample_ohlcv(fine, "5m")
+    t = coarse["time"].astype("datetime64[ms]").astype("int64").to_numpy()
+    o, h, l, c = (coarse[k].to_numpy() for k in ("open", "high", "low", "close"))
+    rng = np.random.default_rng(4)
+    sl = o - rng.uniform(0, 4, len(o))
+    tp = o + rng.uniform(0, 4, len(o))
+    cols = {k: fine[k].to_numpy() for k in ("open", "high", "low", "close", "volume")}
+    cols["time"] = fine["time"].astype("datetime64[ms]").astype("int64").to_numpy()
+    hit, px = IntrabarModel(policy, cols).resolve_sl_tp(o, h, l, c, sl, tp, 1, t, 300_000)
+    assert (hit == HIT_TP).sum() > 10 and (hit == HIT_SL).sum() > 10
+
+    flat = IntrabarModel(policy)
+    for k in range(len(t)):
+        j = slice(5 * k, 5 * k + 5)
+        fh, fp = flat.resolve_sl_tp(*(cols[x][j] for x in ("open", "high", "low", "close")), sl[k], tp[k], 1)
+        first = np.flatnonzero(fh)
+        assert hit[k] == (fh[first[0]] if len(first) else NO_HIT)
+        if len(first):
+            assert px[k] == fp[first[0]]
+
+
+def _split_m1(df, seed):
+    """M1 dont l'agrégat est `df` : ouverture, extrêmes dans un ordre aléatoire, clôture."""
+    rng = np.random.default_rng(seed)
+    o, h, l, c = (df[k].to_numpy() for k in ("open", "high", "low", "close"))
+    up = rng.random(len(df)) < 0.5
+    pts = np.stack([o, np.where(up, h, l), np.where(up, l, h), c, c, c], axis=1)
+    start, end = pts[:, :-1].ravel(), pts[:, 1:].ravel()
+    t0 = df["time"].astype("datetime64[ms]").astype("int64").to_numpy()
+    return pd.DataFrame({
+        "time": pd.to_datetime((t0[:, None] + np.arange(5) * 60_000).ravel(), unit="ms"),
+        "open": start,
+        "high": np.maximum(start, end),
+        "low": np.minimum(start, end),
+        "close": end,
+        "volume": 1.0,
+    })
+
+
+@pytest.mark.parametrize("drill", [False, True])
+def test_engines_agree_with_intrabar_model(synthetic_ohlcv, tmp_path, drill):
+    df = synthetic_ohlcv(2000, seed=1)
+    model = IntrabarModel(OHLC)
+    if drill:
+        store = CandleStore(str(tmp_path))
+        store.append("ETH/USD:USD", "1m", _split_m1(df, seed=5))
+        model = IntrabarModel.from_store(store, "ETH/USD:USD", "1m", OHLC)
+    # SL serré : SL et TP souvent touchés par la même bougie
+    ref = run_backtest(df, atr_multiplier=0.3, intrabar=model)
+    vec = run_vectorized_backtest(df, atr_multiplier=0.3, intrabar=model)
+    assert len(ref.trades) > 10
+    if drill:
+        assert not vec.trades.equals(run_vectorized_backtest(df, atr_multiplier=0.3).trades)
+    pd.testing.assert_frame_equal(vec.trades, ref.trades, check_exact=False, rtol=1e-12)
+    np.testing.assert_allclose(vec.equity["equity"], ref.equity["equity"], rtol=0, atol=1e-9)
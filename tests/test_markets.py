@@ -0,0 +1,91 @@
+# path: tests/test_markets.py
+import json
+import os
+import time
+
+from data.fetcher import create_exchange, resolve_symbol
+from data.markets import MarketCache, market_tick_size
+
+MARKETS = {
+    "ETH/USD:USD": {
+        "id": "PF_ETHUSD",
+        "symbol": "ETH/USD:USD",
+        "precision": {"price": 0.1, "amount": 0.001},
+        "limits": {"amount": {"min": 0.001}},
+        "info": {"tickSize": "0.1"},
+    },
+    "BTC/USD:USD": {"id": "PF_XBTUSD", "symbol": "BTC/USD:USD", "precision": {"price": 1, "amount": 4}},
+}
+
+
+class FakeEx:
+    def __init__(self):
+        self.markets = {}
+        self.currencies = {}
+        self.load_calls = 0
+
+    def load_markets(self):
+        self.load_calls += 1
+        self.markets = json.loads(json.dumps(MARKETS))
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = dict(markets)
+        self.currencies = currencies or {}
+
+
+def test_market_tick_size_fallbacks():
+    assert market_tick_size({"info": {"tickSize": "0.5"}}) == 0.5
+    assert market_tick_size({"precision": {"price": 2}}) == 0.01
+    assert market_tick_size({"limits": {"price": {"step": 0.25}}}) == 0.25
+    assert market_tick_size({}) is None
+
+
+def test_cache_miss_downloads_then_hit_skips_load_markets(tmp_path):
+    path = str(tmp_path / "markets.json")
+    first = FakeEx()
+    assert MarketCache(path, ttl=60).apply(first) is False
+    assert first.load_calls == 1 and os.path.exists(path)
+
+    second = FakeEx()
+    cache = MarketCache(path, ttl=60)
+    assert cache.apply(second) is True
+    assert second.load_calls == 0
+    assert set(second.markets) == set(MARKETS)
+    assert cache.symbol_for("PF_XBTUSD") == "BTC/USD:USD"
+    meta = cache.meta("ETH/USD:USD")
+    assert meta.tick_size == 0.1 and meta.amount_precision == 0.001
+    assert meta.limits["amount"]["min"] == 0.001
+    assert cache.tick_size("BTC/USD:USD") == 0.1  # précision de prix : 1 décimale
+    assert cache.tick_size("UNKNOWN") is None
+
+
+def test_stale_or_corrupt_cache_is_refreshed(tmp_path):
+    path = tmp_path / "markets.json"
+    path.write_text(json.dumps({"saved_at": time.time() - 3600, "markets": MARKETS}))
+    ex = FakeEx()
+    assert MarketCache(str(path), ttl=60).apply(ex) is False
+    assert ex.load_calls == 1
+    assert json.loads(path.read_text())["saved_at"] > time.time() - 60
+
+    path.write_text("{not json")
+    ex = FakeEx()
+    assert MarketCache(str(path), ttl=60).apply(ex) is False
+    assert ex.load_calls == 1
+
+
+def test_create_exchange_uses_fresh_cache(monkeypatch, tmp_path):
+    path = str(tmp_path / "markets.json")
+    MarketCache(path).write(MARKETS)
+    monkeypatch.setattr("data.fetcher.ccxt", type("ccxt", (), {"krakenfutures": lambda cfg: FakeEx()}))
+    ex = create_exchange(MarketCache(path))
+    assert ex.load_calls == 0
+    assert resolve_symbol(ex, "PF_ETHUSD") == "ETH/USD:USD"
+
+
+def test_resolve_symbol_index_follows_market_reload():
+    ex = FakeEx()
+    ex.load_markets()
+    assert resolve_symbol(ex, "PF_XBTUSD") == "BTC/USD:USD"
+    ex.set_markets({"SOL/USD:USD": {"id": "PF_SOLUSD"}})
+    assert resolve_symbol(ex, "PF_SOLUSD") == "SOL/USD:USD"
@@ -1,4 +1,5 @@
 # path: tests/test_order_manager.py
+import ccxt
 import pytest
 def test_place_market_order_params_leverage_not_overwritten(order_manager):
     # leverage fourni ET déjà présent dans params -> on ne doit PAS l’écraser
@@ -120,3 +121,38 @@ def test_place_stop_limit_order_invalid_side(order_manager):
     import pytest
     with pytest.raises(ValueError):
         order_manager.place_stop_limit_order("foo", 1.0, price=95.0, stop_price=90.0)
+
+
+def test_amend_order_falls_back_to_cancel_and_create(order_manager, dummy_exchange):
+    sl = order_manager.place_stop_limit_order("sell", 1.0, 90.0, params={"stopPrice": 90.0, "reduceOnly": True})
+    assert order_manager.supports_edit is False
+    new = order_manager.amend_order(sl["id"], "sell", 1.0, 95.0, params={"stopPrice": 95.0, "reduceOnly": True})
+    assert sl["id"] in dummy_exchange.cancelled
+    assert new["id"] != sl["id"] and new["stopPrice"] == 95.0
+    assert [o["id"] for o in order_manager.registry.select(role="sl")] == [new["id"]]
+
+
+def test_amend_order_uses_native_edit_once_detected(order_manager, dummy_exchange):
+    edits = []
+
+    def edit_order(id, symbol, type, side, amount=None, price=None, params=None):
+        edits.append(id)
+        order = dummy_exchange.orders[id]
+        order.update(price=price, params=params)
+        return dict(order)
+
+    dummy_exchange.has = {"editOrder": True}
+    dummy_exchange.edit_order = edit_order
+    tp = order_manager.place_limit_order("sell", 1.0, 110.0, params={"reduceOnly": True})
+    new = order_manager.amend_order(tp["id"], "sell", 1.0, 112.0, params={"reduceOnly": True})
+    assert edits == [tp["id"]] and new["id"] == tp["id"] and new["price"] == 112.0
+    assert not dummy_exchange.cancelled
+    assert order_manager.registry.get(tp["id"])["price"] == 112.0
+
+    # capacité mise en cache ; un refus de l'exchange bascule sur annulation + création
+    dummy_exchange.has = {}
+    assert order_manager.supports_edit is True
+    dummy_exchange.edit_order = lambda *a, **k: (_ for _ in ()).throw(ccxt.NotSupported("no"))
+    new = order_manager.amend_order(tp["id"], "sell", 1.0, 113.0, params={"reduceOnly": True})
+    assert tp["id"] in dummy_exchange.cancelled and new["price"] == 113.0
+    assert order_manager.supports_edit is False
@@ -0,0 +1,43 @@
+# path: tests/test_order_registry.py
+import ccxt
+import pytest
+
+from execution.order_registry import OrderRegistry
+
+
+def test_order_manager_calls_keep_registry_indexed(dummy_exchange, order_manager):
+    reg = order_manager.registry
+    order_manager.place_market_order("buy", 1.0)
+    tp = order_manager.place_limit_order("sell", 1.0, 110.0, params={"reduceOnly": True})
+    sl = order_manager.place_stop_limit_order("sell", 1.0, 90.0, params={"stopPrice": 90.0, "reduceOnly": True})
+    other = order_manager.place_limit_order("buy", 1.0, 80.0)
+    assert len(reg) == 3  # l'ordre marché exécuté n'est pas au carnet
+    assert [o["id"] for o in reg.select(role="sl")] == [sl["id"]]
+    assert reg.get(sl["id"])["stop_price"] == 90.0
+    assert [o["id"] for o in reg.select(side="sell", reduce_only=True)] == [tp["id"], sl["id"]]
+    assert [o["id"] for o in reg.select(reduce_only=False)] == [other["id"]]
+
+    order_manager.cancel_order(tp["id"])
+    assert tp["id"] not in reg and sl["id"] in reg
+    dummy_exchange.orders.pop(sl["id"])  # disparu côté exchange
+    with pytest.raises(ccxt.OrderNotFound):
+        order_manager.cancel_order(sl["id"])
+    assert sl["id"] not in reg
+
+
+def test_reconcile_corrects_drift_and_keeps_local_roles():
+    reg = OrderRegistry()
+    assert reg.age() == float("inf")
+    reg.add({"id": "1", "side": "sell", "type": "limit", "price": 90.0, "status": "open"}, role="sl", reduce_only=True)
+    reg.add({"id": "2", "side": "sell", "type": "limit", "price": 110.0}, reduce_only=True)
+    # l'exchange ne renvoie ni stopPrice ni reduceOnly pour "1" ; "2" a été exécuté ; "3" est inconnu
+    remote = [
+        {"id": "1", "side": "sell", "type": "limit", "price": 90.0},
+        {"id": "3", "side": "buy", "type": "limit", "price": 80.0, "info": {"stopPrice": 79.0}},
+    ]
+    assert reg.reconcile(remote) == 2
+    assert reg.age() < 1.0
+    assert reg.get("1")["role"] == "sl" and reg.get("1")["reduce_only"]
+    assert "2" not in reg
+    assert reg.get("3")["role"] == "sl" and reg.select(side="buy")[0]["stop_price"] == 79.0
+    assert reg.reconcile(remote) == 0
@@ -0,0 +1,122 @@
+# path: tests/test_paper_exchange.py
+import ccxt
+import numpy as np
+import pytest
+
+from config import LOOKBACK
+from data.feed import CandleFeed
+from data.fetcher import resolve_symbol
+from data.store import CandleStore
+from execution.order_manager import OrderManager
+from execution.position_manager import PositionManager
+from indicators.compute import compute_indicators
+from simulation.exchange import SimulatedExchange
+from simulation.paper import create_paper_exchange
+from strategy.signal import generate_signal
+
+TF_MS = 5 * 60_000
+T0 = 1_700_000_000_000 - (1_700_000_000_000 % (3 * TF_MS))
+SYM = "ETH/USD:USD"
+
+
+def _exchange(**kw):
+    c = {"time": T0 + np.arange(3) * TF_MS, **{k: np.full(3, 100.0) for k in ("open", "high", "low", "close")}, "volume": np.ones(3)}
+    ex = SimulatedExchange(SYM, {"5m": c}, fee_rate=0.0, **kw)
+    ex.on_price(100.0)
+    return ex
+
+
+def test_stop_limit_fills_at_limit_on_continuous_path():
+    ex = _exchange()
+    ex.create_order(SYM, "market", "buy", 1.0)
+    sl = ex.create_order(SYM, "limit", "sell", 1.0, 94.5, {"stopPrice": 95.0, "reduceOnly": True})
+    ex.on_price(96.0)
+    assert ex.orders[sl["id"]]["status"] == "open" and not ex.orders[sl["id"]].get("triggered")
+    ex.on_price(90.0)  # passe par 95 (déclenchement) puis 94.5 (limite)
+    assert ex.orders[sl["id"]]["status"] == "closed"
+    assert ex.orders[sl["id"]]["average"] == 95.0  # marketable dès le déclenchement
+    assert ex.position == 0
+
+
+def test_stop_limit_gap_stays_unfilled_until_price_returns():
+    ex = _exchange()
+    ex.create_order(SYM, "market", "buy", 1.0)
+    sl = ex.create_order(SYM, "limit", "sell", 1.0, 94.5, {"stopPrice": 95.0, "reduceOnly": True})
+    ex.on_price(90.0, jump=True)  # gap sous la limite : déclenché, non exécuté
+    od = ex.orders[sl["id"]]
+    assert od["triggered"] and od["status"] == "open" and ex.position == 1.0
+    ex.on_price(93.0)
+    assert od["status"] == "open"
+    ex.on_price(96.0)
+    assert od["status"] == "closed" and od["average"] == 94.5
+
+
+def test_partial_fills_share_tick_volume():
+    ex = _exchange(fill_ratio=0.5)
+    tp = ex.create_order(SYM, "limit", "sell", 3.0, 101.0)
+    ex.on_price(102.0, volume=2.0)
+    od = ex.orders[tp["id"]]
+    assert (od["filled"], od["remaining"], od["status"]) == (1.0, 2.0, "open")
+    ex.on_price(103.0, volume=10.0)  # déjà marketable : exécution au prix de départ
+    assert od["status"] == "closed" and od["average"] == 102.0
+    assert ex.position == -3.0
+
+
+def test_reduce_only_is_capped_and_canceled_without_position():
+    ex = _exchange()
+    ex.create_order(SYM, "market", "buy", 1.0)
+    tp = ex.create_order(SYM, "limit", "sell", 5.0, 101.0, {"reduceOnly": True})
+    sl = ex.create_order(SYM, "limit", "sell", 1.0, 99.0, {"stopPrice": 99.0, "reduceOnly": True})
+    ex.on_price(102.0)
+    assert ex.orders[tp["id"]]["filled"] == 1.0 and ex.position == 0
+    ex.on_price(98.0)
+    assert ex.orders[sl["id"]]["status"] == "canceled"
+    assert ex.position == 0
+    rejected = ex.create_order(SYM, "market", "sell", 1.0, params={"reduceOnly": True})
+    assert rejected["status"] == "canceled"
+
+
+def test_paper_loop_runs_real_pipeline_without_api(tmp_path, synthetic_ohlcv):
+    df = synthetic_ohlcv(900)
+    CandleStore(str(tmp_path)).append(SYM, "5m", df)
+    ex = create_paper_exchange(str(tmp_path), fee_rate=0.0)
+    assert ex.index == 3 * LOOKBACK - 1
+    sym = resolve_symbol(ex, "PF_ETHUSD")
+    pm = PositionManager(ex, sym, OrderManager(ex, sym))
+    feed = CandleFeed(ex, window=LOOKBACK)
+    df15 = compute_indicators(feed.bootstrap(sym, "15m"), "15m")
+    assert len(df15) == LOOKBACK
+    feed.bootstrap(sym, "5m")
+    while ex.advance_ticks():
+        if feed.poll(sym, "15m"):
+            df15 = compute_indicators(feed.frame(sym, "15m"), "15m")
+        if not feed.poll(sym, "5m"):
+            continue
+        df5 = compute_indicators(feed.frame(sym, "5m"), "5m")
+        pm.watchdog(df5.close.iloc[-1])
+        pm.update_trail(df5)
+        pm.check_exit()
+        sig = generate_signal(df15, df5)
+        if not pm.active and (sig["long"] or sig["short"]):
+            pm.open_position("buy" if sig["long"] else "sell", df5.close.iloc[-1], 1.0)
+        pm.check_exit()
+    assert ex.index == len(df) - 1
+    assert len(ex.trades) > 0
+    # chaque position fermée l'a été par un ordre du carnet, jamais sans exécution
+    assert sum(f["qty"] for f in ex.fills) == pytest.approx(2 * sum(t["size"] for t in ex.trades) + abs(ex.position))
+
+
+def test_edit_order_amends_in_place_and_rearms_stop():
+    ex = _exchange()
+    ex.create_order(SYM, "market", "buy", 1.0)
+    sl = ex.create_order(SYM, "limit", "sell", 1.0, 90.0, {"stopPrice": 91.0, "reduceOnly": True})
+    ex.on_price(89.0, jump=True)  # déclenché, limite 90 non atteinte
+    assert ex.orders[sl["id"]]["triggered"]
+    edited = ex.edit_order(sl["id"], SYM, "limit", "sell", 1.0, 85.0, {"stopPrice": 86.0, "reduceOnly": True})
+    assert edited["id"] == sl["id"] and "triggered" not in edited
+    ex.on_price(88.0)
+    assert ex.orders[sl["id"]]["status"] == "open"
+    ex.on_price(85.5)
+    assert ex.orders[sl["id"]]["status"] == "closed" and ex.orders[sl["id"]]["average"] == 86.0
+    with pytest.raises(ccxt.OrderNotFound):
+        ex.edit_order(sl["id"], SYM, "limit", "sell", 1.0, 80.0)
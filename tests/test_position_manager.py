@@ -1,4 +1,7 @@
 # path: tests/test_position_manager.py
+import threading
+import time
+
 import pandas as pd
 import pytest
 import ccxt
@@ -571,4 +574,170 @@ def test_purge_stale_reduce_only_info_flag(dummy_exchange, order_manager):
     }
 
     pm._purge_stale_reduce_only("sell")
-    assert "200" in dummy_exchange.cancelled
\ No newline at end of file
+    assert "200" in dummy_exchange.cancelled
+
+def test_update_trail_stops_after_sl_already_filled(monkeypatch, dummy_exchange, order_manager):
+    """SL exécuté côté exchange : le remplacement échoue, la position est soldée, pas de bump TP ensuite."""
+    from risk.strategies.trailing import TrailingSLAndTP
+
+    def dummy_calc(exchange, symbol, entry_price, side):
+        return {"sl_price": 95.0, "tp_price": 110.0, "trail_dist": 5.0}
+
+    monkeypatch.setattr("execution.position_manager.calculate_initial_sl_tp", dummy_calc)
+    pm = PositionManager(dummy_exchange, "BTC/USDT", order_manager, strategy=TrailingSLAndTP(theta=0.1, rho=1.0))
+    pm.open_position("buy", entry_price=100.0, size=1.0)
+    # l'exchange a exécuté le SL : ordre disparu, position à plat
+    del dummy_exchange.orders[pm.active["ids"]["sl"]]
+    dummy_exchange.positions["BTC/USDT"] = (0.0, None)
+
+    pm.update_trail(pd.DataFrame({"close": [108.0]}))  # SL ↑ et bump TP demandés
+    assert pm.active is None
+
+
+def _counting(monkeypatch, exchange):
+    calls = {"fetch_positions": 0, "fetch_open_orders": 0}
+    for name in calls:
+        real = getattr(exchange, name)
+
+        def wrapper(*a, _real=real, _name=name, **k):
+            calls[_name] += 1
+            return _real(*a, **k)
+
+        monkeypatch.setattr(exchange, name, wrapper)
+    return calls
+
+
+def test_tick_snapshot_fetches_once_and_invalidates_after_mutations(monkeypatch, dummy_exchange, order_manager):
+    monkeypatch.setattr(
+        "execution.position_manager.calculate_initial_sl_tp",
+        lambda exchange, symbol, entry_price, side: {"sl_price": 90.0, "tp_price": 110.0, "trail_dist": 10.0},
+    )
+    pm = PositionManager(dummy_exchange, "BTC/USDT", order_manager)
+    pm.open_position("buy", entry_price=100.0, size=1.0)
+    calls = _counting(monkeypatch, dummy_exchange)
+    with pm.tick():
+        pm.check_exit()
+        pm.check_exit()
+        assert pm._position_contracts() == 1.0
+    assert calls == {"fetch_positions": 1, "fetch_open_orders": 1}
+
+    # hors tick : lecture directe à chaque appel (comportement historique)
+    pm.check_exit()
+    assert calls == {"fetch_positions": 2, "fetch_open_orders": 2}
+
+    calls.update(fetch_positions=0, fetch_open_orders=0)
+    with pm.tick():
+        pm._emergency_exit("test")  # 3 lectures de position -> 1 requête
+        assert calls["fetch_positions"] == 1
+        # les annulations et l'ordre marché invalident : le carnet est relu
+        assert calls["fetch_open_orders"] == 2
+        assert pm._position_contracts() == 0.0
+        assert calls["fetch_positions"] == 2
+    assert pm.active is None
+    assert dummy_exchange.fetch_open_orders("BTC/USDT") == []
+
+
+def test_check_exit_reconciles_protection_every_tick(monkeypatch, dummy_exchange, order_manager):
+    monkeypatch.setattr(
+        "execution.position_manager.calculate_initial_sl_tp",
+        lambda exchange, symbol, entry_price, side: {"sl_price": 90.0, "tp_price": 110.0, "trail_dist": 10.0},
+    )
+    pm = PositionManager(dummy_exchange, "BTC/USDT", order_manager, reconcile_interval=3600)
+    pm.open_position("buy", entry_price=100.0, size=1.0)
+    calls = _counting(monkeypatch, dummy_exchange)
+    with pm.tick():
+        pm.prefetch()
+        pm.check_exit()
+        pm.check_exit()
+    assert calls["fetch_open_orders"] == 1  # une lecture par tick, partagée
+    assert pm.active is not None
+    # ordres perdus côté exchange : vus dès le tick suivant malgré reconcile_interval
+    for o in dummy_exchange.orders.values():
+        o["status"] = "canceled"
+    with pm.tick():
+        pm.check_exit()
+    assert pm.active is None
+
+
+def test_protective_legs_are_sent_concurrently_and_timed(monkeypatch, dummy_exchange, order_manager):
+    monkeypatch.setattr(
+        "execution.position_manager.calculate_initial_sl_tp",
+        lambda exchange, symbol, entry_price, side: {"sl_price": 90.0, "tp_price": 110.0, "trail_dist": 10.0},
+    )
+    create = dummy_exchange.create_order
+    barrier = threading.Barrier(2, timeout=2)
+
+    def slow_create(symbol, type, side, amount, price=None, params=None):
+        if type == "limit":
+            barrier.wait()  # n'aboutit que si TP et SL sont en vol simultanément
+        return create(symbol, type, side, amount, price, params)
+
+    monkeypatch.setattr(dummy_exchange, "create_order", slow_create)
+    pm = PositionManager(dummy_exchange, "BTC/USDT", order_manager)
+    pm.open_position("buy", entry_price=100.0, size=1.0)
+    assert pm.active["ids"]["sl"] in order_manager.registry
+    assert pm.active["ids"]["tp"] in order_manager.registry
+    stats = pm.protection_stats()
+    assert stats["count"] == 1 and stats["max_ms"] >= pm.protection_latency[0]["orders_ms"]
+    executor = pm._executor
+    pm.close()
+    assert pm._executor is None and executor._shutdown
+
+    # échec d'une jambe : l'autre, déjà posée, est annulée par la sortie d'urgence
+    monkeypatch.setattr(dummy_exchange, "create_order", create)
+    pm2 = PositionManager(dummy_exchange, "ETH/USDT", type(order_manager)(dummy_exchange, "ETH/USDT"))
+
+    def failing_sl(*a, **k):
+        time.sleep(0.05)
+        raise ccxt.NetworkError("sl down")
+
+    monkeypatch.setattr(pm2.om, "place_stop_limit_order", failing_sl)
+    with pytest.raises(RuntimeError):
+        pm2.open_position("buy", entry_price=100.0, size=1.0)
+    assert pm2.active is None
+    assert dummy_exchange.fetch_open_orders("ETH/USDT") == []
+    assert not pm2.protection_latency
+
+
+def test_open_position_with_precomputed_atr_skips_refetch(monkeypatch, dummy_exchange, order_manager):
+    def no_refetch(*a, **k):
+        raise AssertionError("calculate_initial_sl_tp ne doit pas être appelé")
+
+    monkeypatch.setattr("execution.position_manager.calculate_initial_sl_tp", no_refetch)
+    loads = []
+    dummy_exchange.load_markets = lambda: loads.append(1)
+    dummy_exchange.market = lambda symbol: {"info": {"tickSize": 0.5}}
+    pm = PositionManager(dummy_exchange, "BTC/USDT", order_manager, atr_multiplier=2.0)
+    pm.open_position("buy", entry_price=100.0, size=1.0, atr=5.2)  # distance 10.4
+    assert pm.active["trail_dist"] == pytest.approx(10.4)
+    assert pm.active["current_sl_price"] == 89.5 and pm.active["tp_price"] == 121.0
+    pm._emergency_exit("reset")
+    pm.open_position("sell", entry_price=100.0, size=1.0, atr=5.2)
+    assert pm.active["current_sl_price"] == 110.5 and pm.active["tp_price"] == 79.0
+    assert loads == [1]  # tick size lu une seule fois
+
+
+def test_tick_prices_state_is_integer_and_orders_get_floats(monkeypatch, dummy_exchange, order_manager):
+    def dummy_calc(exchange, symbol, entry_price, side):
+        return {"sl_price": 90.0, "tp_price": 110.0, "trail_dist": 10.0}
+
+    monkeypatch.setattr("execution.position_manager.calculate_initial_sl_tp", dummy_calc)
+    monkeypatch.setattr("execution.position_manager.get_tick_size", lambda ex, sym: 0.05)
+    pm = PositionManager(dummy_exchange, "BTC/USDT", order_manager, tick_prices=True)
+    pm.open_position("buy", entry_price=100.0, size=1.0)
+    assert pm.active["current_sl_price"] == 1800 and pm.active["tp_price"] == 2200
+    assert pm.tp_price == 110.0
+
+    pm.update_trail(pd.DataFrame({"close": [103.333]}))
+    assert pm.active["current_sl_price"] == 1866  # 93.333 aligné vers le bas
+    new_order = dummy_exchange.orders[pm.active["ids"]["sl"]]
+    assert isinstance(new_order["price"], float)
+    assert new_order["price"] == align_price(103.333 - 10.0, 0.05, mode="down") == 93.3
+
+    # même prix : aucun remplacement (comparaison entière exacte)
+    sl_id = pm.active["ids"]["sl"]
+    pm.update_trail(pd.DataFrame({"close": [103.333]}))
+    assert pm.active["ids"]["sl"] == sl_id
+
+    # les règles du watchdog lisent les niveaux en prix
+    assert RULES["sl_breach"]["condition"](pm, 93.3) and not RULES["sl_breach"]["condition"](pm, 93.35)
@@ -0,0 +1,111 @@
+# path: tests/test_replay.py
+import dataclasses
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.tick_store import TickStore
+from risk.strategies.base import PositionSnapshot, StrategyContext
+from risk.strategies.trailing import TrailingSLAndTP, TrailingSLOnly
+from simulation.backtest import resample_ohlcv
+from simulation.replay import _resolve_exit_ticks, aggregate_candles, run_tick_replay
+from utils.price_utils import align_price
+
+T0 = 1_699_999_200_000
+
+
+def _ticks(n, seed, step_ms=700):
+    rng = np.random.default_rng(seed)
+    t = T0 + np.cumsum(rng.integers(0, 2 * step_ms, n))
+    price = 2000 + np.cumsum(rng.normal(0, 0.4, n)) + 15 * np.sin(np.arange(n) / 3000)
+    return {"time": t, "price": price, "amount": rng.random(n), "side": rng.choice([-1, 1], n)}
+
+
+def test_tick_store_roundtrip_and_late_append(tmp_path):
+    store = TickStore(str(tmp_path))
+    ticks = _ticks(1000, seed=0)
+    assert store.append("ETH/USD:USD", {k: v[500:] for k, v in ticks.items()}) == 500
+    # trades plus anciens : fusion triée
+    assert store.append("ETH/USD:USD", {k: v[:500] for k, v in ticks.items()}) == 500
+    cols = store.read("ETH/USD:USD")
+    assert isinstance(cols["price"], np.memmap)
+    np.testing.assert_array_equal(cols["time"], ticks["time"])
+    np.testing.assert_array_equal(cols["price"], ticks["price"])
+    lo, hi = int(ticks["time"][100]), int(ticks["time"][900])
+    part = store.read("ETH/USD:USD", lo, hi)
+    assert part["time"][0] == lo and part["time"][-1] < hi
+    assert sum(len(ch["time"]) for ch in store.chunks("ETH/USD:USD", size=128)) == 1000
+
+    store.append("ETH/USD:USD", [{"timestamp": int(ticks["time"][-1]) + 5, "price": 1.5, "amount": 2.0, "side": "sell"}])
+    assert store.count("ETH/USD:USD") == 1001 and store.read("ETH/USD:USD")["side"][-1] == -1
+
+
+def test_aggregation_is_chunk_independent():
+    ticks = _ticks(20000, seed=1, step_ms=4000)  # quelques bougies M5 sans trade
+    one = aggregate_candles([ticks], "5m")
+    many = aggregate_candles(({k: v[lo:lo + 333] for k, v in ticks.items()} for lo in range(0, 20000, 333)), "5m")
+    pd.testing.assert_frame_equal(one, many)
+    assert (np.diff(one["time"].to_numpy()) == np.timedelta64(300_000, "ms")).all()
+
+    t = pd.to_datetime(ticks["time"], unit="ms")
+    s = pd.Series(ticks["price"], index=t).resample("5min")
+    ref = pd.DataFrame({"open": s.first(), "high": s.max(), "low": s.min(), "close": s.last()}).iloc[:-1]
+    ref["close"] = ref["close"].ffill()
+    ref = ref.fillna({c: ref["close"] for c in ("open", "high", "low")})
+    np.testing.assert_array_equal(one[["open", "high", "low", "close"]].to_numpy(), ref.to_numpy())
+
+
+def _reference_exit(prices, strategy, snap, ctx):
+    """Boucle trade par trade : exécution des ordres posés, puis trailing sur le prix."""
+    buy = ctx.side == "buy"
+    sl, tp = snap.sl_current, snap.tp_current
+    for k, price in enumerate(prices):
+        if (price <= sl) if buy else (price >= sl):
+            return k, sl
+        if (price >= tp) if buy else (price <= tp):
+            return k, tp
+        if strategy is None:
+            new = align_price(price - snap.trail_dist, ctx.tick_size, "down") if buy else align_price(price + snap.trail_dist, ctx.tick_size, "up")
+            sl = max(sl, new) if buy else min(sl, new)
+        else:
+            d = strategy.compute_targets(dataclasses.replace(snap, current_price=float(price), sl_current=sl, tp_current=tp), ctx)
+            sl, tp = d.sl_price, d.tp_price
+        if (sl >= price or tp <= price) if buy else (sl <= price or tp >= price):
+            return k, float(price)
+    return -1, None
+
+
+@pytest.mark.parametrize("strategy", [None, TrailingSLOnly(), TrailingSLAndTP(theta=0.2, rho=1.0)])
+@pytest.mark.parametrize("side", ["buy", "sell"])
+def test_exit_matches_tick_by_tick_reference(strategy, side):
+    prices = _ticks(30000, seed=2)["price"]
+    ctx = StrategyContext(symbol="ETH/USD:USD", side=side, tick_size=0.5)
+    for start in range(0, 30000, 1500):
+        entry = float(prices[start])
+        sign = 1 if side == "buy" else -1
+        snap = PositionSnapshot(
+            entry_price=entry, current_price=entry, qty_open=1.0, qty_remaining=1.0,
+            sl_current=align_price(entry - sign * 6, 0.5, "down" if sign > 0 else "up"),
+            tp_current=align_price(entry + sign * 12, 0.5, "up" if sign > 0 else "down"),
+            tp_initial=align_price(entry + sign * 12, 0.5, "up" if sign > 0 else "down"),
+            trail_dist=6.0,
+        )
+        k, px = _resolve_exit_ticks(prices, start + 1, len(prices), strategy, snap, ctx, chunk=7)
+        rk, rpx = _reference_exit(prices[start + 1:], strategy, snap, ctx)
+        assert k == (-1 if rk < 0 else start + 1 + rk)
+        if rk >= 0:
+            assert px == rpx
+
+
+def test_replay_runs_on_recorded_ticks(tmp_path):
+    store = TickStore(str(tmp_path))
+    store.append("ETH/USD:USD", _ticks(400_000, seed=3))
+    ticks = store.read("ETH/USD:USD")
+    res = run_tick_replay(ticks, strategy=TrailingSLAndTP(theta=0.3, rho=1.0), warmup=60, chunk=50_000)
+    assert res.metrics["ticks"] == 400_000
+    assert len(res.trades) > 5
+    assert (res.trades["exit_time"] > res.trades["entry_time"]).all()
+    # M15 dérivée des M5 agrégées : mêmes bougies que le rééchantillonnage
+    df5 = aggregate_candles([ticks], "5m")
+    assert len(res.equity) == len(df5) and len(resample_ohlcv(df5, "15m")) > 0
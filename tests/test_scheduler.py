@@ -0,0 +1,105 @@
+# path: tests/test_scheduler.py
+import threading
+import time
+
+import pytest
+
+from conftest import DummyExchange
+from execution.order_manager import OrderManager
+from execution.position_manager import PositionManager
+from execution.scheduler import (
+    ENDPOINT_COSTS,
+    Priority,
+    RequestScheduler,
+    ScheduledExchange,
+    current_priority,
+    request_priority,
+)
+
+
+class RecordingScheduler(RequestScheduler):
+    def __init__(self):
+        super().__init__(rate=1e6, capacity=1e6)
+        self.calls = []
+
+    def call(self, endpoint, fn, *args, **kwargs):
+        self.calls.append((endpoint, current_priority(endpoint)))
+        return super().call(endpoint, fn, *args, **kwargs)
+
+
+def test_request_priority_nests_towards_most_urgent_and_is_thread_local():
+    assert current_priority("fetch_ohlcv") is Priority.MARKET_DATA
+    assert current_priority("create_order") is Priority.PROTECTIVE
+    seen = []
+    with request_priority(Priority.EMERGENCY):
+        with request_priority(Priority.TRAILING):
+            assert current_priority("fetch_positions") is Priority.EMERGENCY
+        t = threading.Thread(target=lambda: seen.append(current_priority("fetch_positions")))
+        t.start()
+        t.join()
+    assert seen == [Priority.MARKET_DATA]
+    assert current_priority("fetch_positions") is Priority.MARKET_DATA
+
+
+def test_bucket_limits_rate_and_emergency_never_waits():
+    sched = RequestScheduler(rate=20.0, capacity=2)
+    assert sched.acquire(2) < 0.01
+    assert sched.acquire(1) == pytest.approx(0.05, abs=0.03)  # un jeton rechargé en 50 ms
+    assert sched.acquire(2, Priority.EMERGENCY) < 0.01        # découvert autorisé
+    assert sched.acquire(1) >= 0.12                           # 3 jetons à recharger ensuite
+
+
+def test_high_priority_is_served_before_queued_market_data():
+    sched = RequestScheduler(rate=20.0, capacity=1)
+    sched.acquire(1)
+    served = []
+
+    def worker(prio, tag):
+        sched.acquire(1, prio)
+        served.append(tag)
+
+    data = [threading.Thread(target=worker, args=(Priority.MARKET_DATA, f"data{i}")) for i in range(3)]
+    for t in data:
+        t.start()
+    while len(sched._waiting) < 3:
+        time.sleep(0.001)
+    urgent = threading.Thread(target=worker, args=(Priority.PROTECTIVE, "sl"))
+    urgent.start()
+    for t in data + [urgent]:
+        t.join()
+    assert served[0] == "sl"
+    assert served[1:] == ["data0", "data1", "data2"]  # FIFO à priorité égale
+    assert sched.stats()["PROTECTIVE"]["served"] == 1
+
+
+def test_scheduled_exchange_routes_network_calls_only():
+    ex = DummyExchange()
+    sched = RecordingScheduler()
+    proxy = ScheduledExchange(ex, sched)
+    proxy.markets = {"BTC/USDT": {"id": "X"}}
+    assert ex.markets == {"BTC/USDT": {"id": "X"}}
+    proxy.fetch_positions(["BTC/USDT"])
+    proxy.create_order("BTC/USDT", "market", "buy", 1.0, None, {})
+    assert sched.calls == [("fetch_positions", Priority.MARKET_DATA), ("create_order", Priority.PROTECTIVE)]
+    assert set(sched.calls) <= {(e, p) for e in ENDPOINT_COSTS for p in Priority}
+    assert proxy.unwrapped is ex
+
+
+def test_position_manager_tags_emergency_and_protective_calls(monkeypatch):
+    ex = DummyExchange()
+    sched = RecordingScheduler()
+    proxy = ScheduledExchange(ex, sched)
+    om = OrderManager(proxy, "BTC/USDT")
+    pm = PositionManager(proxy, "BTC/USDT", om)
+    monkeypatch.setattr(
+        "execution.position_manager.calculate_initial_sl_tp",
+        lambda *a, **k: {"sl_price": 90.0, "tp_price": 110.0, "trail_dist": 10.0},
+    )
+    pm.open_position("buy", entry_price=100.0, size=1.0)
+    creates = [p for e, p in sched.calls if e == "create_order"]
+    assert creates == [Priority.PROTECTIVE] * 3
+
+    sched.calls.clear()
+    pm._emergency_exit("test")
+    assert sched.calls and all(p is Priority.EMERGENCY for _, p in sched.calls)
+    assert ("create_order", Priority.EMERGENCY) in sched.calls
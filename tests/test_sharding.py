@@ -0,0 +1,99 @@
+# path: tests/test_sharding.py
+import asyncio
+import multiprocessing as mp
+
+import numpy as np
+import pytest
+
+from config import LOOKBACK
+from data.feed import CandleFeed
+from data.fetcher import resolve_symbol
+from data.shm_ring import CandleRing, RingFeed
+from data.store import CandleStore
+from execution.engine import AsyncEngine, MultiSymbolEngine
+from execution.order_manager import OrderManager
+from execution.position_manager import PositionManager
+from execution.sharding import ShardSupervisor
+from indicators.streaming import StreamingIndicators
+from simulation.paper import create_paper_exchange
+
+SYM = "ETH/USD:USD"
+TF_MS = 5 * 60_000
+
+
+def _rows(start, n):
+    return [[i * TF_MS, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0] for i in range(start, start + n)]
+
+
+def _read_in_child(name, capacity, out):
+    ring = CandleRing.attach(name, capacity, untrack=False)  # enfant : tracker partagé
+    rows, count = ring.read(0)
+    out.put((rows.tolist(), count))
+    del rows
+    ring.close()
+
+
+def test_ring_wraps_and_is_readable_from_another_process():
+    ring = CandleRing.create(4)
+    try:
+        ring.append(_rows(0, 3))
+        rows, count = ring.read(1)
+        assert count == 3 and rows[:, 0].tolist() == [TF_MS, 2 * TF_MS]
+        assert np.shares_memory(rows, ring._rows)  # plage contiguë : vue sans copie
+        del rows
+        ring.append(_rows(3, 3))  # 6 lignes écrites dans 4 cases
+        rows, count = ring.read(0)
+        assert count == 6 and rows[:, 0].tolist() == [i * TF_MS for i in range(2, 6)]
+        del rows
+
+        out = mp.get_context("fork").Queue()
+        child = mp.get_context("fork").Process(target=_read_in_child, args=(ring.name, 4, out))
+        child.start()
+        child_rows, child_count = out.get(timeout=10)
+        child.join(timeout=10)
+        assert child_count == 6 and [r[0] for r in child_rows] == [i * TF_MS for i in range(2, 6)]
+    finally:
+        ring.close()
+
+
+def test_ring_feed_matches_candle_feed_interface():
+    ring = CandleRing.create(16)
+    try:
+        ring.append(_rows(0, 5))
+        feed = RingFeed({(SYM, "5m"): ring}, window=3)
+        df = feed.bootstrap(SYM, "5m")
+        assert len(df) == 3 and feed.last_closed(SYM, "5m") == 4 * TF_MS
+        assert feed.poll(SYM, "5m") == 0
+        ring.append(_rows(5, 2))
+        assert feed.poll(SYM, "5m") == 2
+        assert feed.frame(SYM, "5m").close.tolist() == [5.5, 6.5, 7.5]
+    finally:
+        ring.close()
+
+
+def _paper(tmp_path, df):
+    CandleStore(str(tmp_path)).append(SYM, "5m", df)
+    ex = create_paper_exchange(str(tmp_path), fee_rate=0.0)
+    return ex, resolve_symbol(ex, "PF_ETHUSD")
+
+
+def test_sharded_run_matches_single_process_engine(tmp_path, synthetic_ohlcv):
+    df = synthetic_ohlcv(700)
+
+    ex, sym = _paper(tmp_path / "a", df)
+    pm = PositionManager(ex, sym, OrderManager(ex, sym))
+    engine = AsyncEngine(
+        CandleFeed(ex, window=LOOKBACK), pm, sym,
+        StreamingIndicators("15m", maxlen=LOOKBACK), StreamingIndicators("5m", maxlen=LOOKBACK), 100.0, 1.0,
+    )
+    asyncio.run(MultiSymbolEngine([engine], stagger=0.0).run(ex.advance_ticks))
+
+    ex2, sym2 = _paper(tmp_path / "b", df)
+    sup = ShardSupervisor(ex2, [sym2], n_workers=2, investment_usd=100.0, leverage=1.0, mp_context="fork")
+    assert len(sup.shards) == 1  # pas de worker sans symbole
+    sup.run(ex2.advance_ticks)
+
+    assert len(ex.trades) > 0
+    assert [t["pnl"] for t in ex2.trades] == pytest.approx([t["pnl"] for t in ex.trades])
+    assert sup.calls["create_order"] >= len(ex2.trades)  # ordres passés par l'exécuteur du superviseur
+    assert not sup.rings and all(not p.is_alive() for p in sup.workers)
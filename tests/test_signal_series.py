@@ -0,0 +1,68 @@
+# path: tests/test_signal_series.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators.compute import compute_indicators
+from simulation.backtest import resample_ohlcv
+from strategy.signal import generate_signal, generate_signal_series
+
+KEYS = ["long", "short", "mom", "cross", "vol_ok", "rsi"]
+
+
+def _same(a, b) -> bool:
+    return (a != a and b != b) or a == b
+
+
+@pytest.fixture
+def frames(synthetic_ohlcv):
+    df = synthetic_ohlcv(900, seed=3)
+    return compute_indicators(resample_ohlcv(df, "15m"), "15m"), compute_indicators(df, "5m")
+
+
+def test_last_row_equals_scalar(frames):
+    m15, m5 = frames
+    out = generate_signal_series(m15, m5)
+    assert list(out.columns) == KEYS
+    assert len(out) == len(m5)
+    ref = generate_signal(m15, m5)
+    for k in KEYS:
+        assert _same(out[k].iloc[-1], ref[k]), k
+
+
+def test_every_row_equals_scalar_on_closed_history(frames):
+    m15, m5 = frames
+    out = generate_signal_series(m15, m5)
+    assert out["long"].any() and out["short"].any()
+    close15 = m15["time"] + pd.Timedelta(minutes=15)
+    for i in range(60, len(m5)):
+        # M15 disponibles à la clôture de la bougie M5 i
+        avail = m15[close15 <= m5["time"].iloc[i] + pd.Timedelta(minutes=5)]
+        ref = generate_signal(avail, m5.iloc[: i + 1])
+        for k in KEYS:
+            assert _same(out[k].iloc[i], ref[k]), (i, k)
+
+
+def test_no_lookahead_on_forming_m15():
+    t5 = pd.to_datetime(1_700_000_100_000 // 900_000 * 900_000 + np.arange(6) * 300_000, unit="ms")
+    m5 = pd.DataFrame({
+        "time": t5,
+        "EMA9": [99, 99, 101, 101, 101, 101.0],
+        "EMA21": [100.0] * 6,
+        "volume": [1.0] * 6,
+        "Vol_SMA5": [1.0] * 6,
+        "RSI7": [50.0] * 6,
+    })
+    # 2e M15 haussière mais ne clôture qu'avec la 6e M5
+    m15 = pd.DataFrame({"time": [t5[0] - pd.Timedelta(minutes=15), t5[3]], "EMA21": [99.0, 101.0], "EMA50": [100.0, 100.0]})
+    out = generate_signal_series(m15, m5)
+    assert list(out["mom"]) == ["down"] * 5 + ["up"]
+    assert not out["long"].iloc[2]  # croisement haussier mais M15 connue baissière
+    assert list(out["cross"]) == [0, 0, 1, 1, 0, 0]
+
+
+def test_requires_time_column():
+    m15 = pd.DataFrame([{"EMA21": 1.0, "EMA50": 0.0}])
+    m5 = pd.DataFrame([{"EMA9": 1.0, "EMA21": 0.0, "volume": 1.0, "Vol_SMA5": 1.0, "RSI7": 50.0}] * 3)
+    with pytest.raises(ValueError):
+        generate_signal_series(m15, m5)
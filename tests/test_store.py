@@ -0,0 +1,106 @@
+# path: tests/test_store.py
+import numpy as np
+import pandas as pd
+
+from data.fetcher import fetch_ohlcv, fetch_ohlcv_since
+from data.feed import CandleFeed
+from data.store import CandleStore
+
+TF_MS = 5 * 60_000
+T0 = 1_700_000_000_000 - (1_700_000_000_000 % TF_MS)
+
+
+def _rows(start: int, n: int) -> list[list[float]]:
+    return [[start + i * TF_MS, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0] for i in range(n)]
+
+
+class FXHistory:
+    """Exchange simulé avec historique complet et pagination par `limit`."""
+
+    def __init__(self, now: int) -> None:
+        self.now = now
+        self.calls: list[tuple[int | None, int | None]] = []
+
+    def milliseconds(self) -> int:
+        return self.now
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return int(timeframe[:-1]) * 60
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append((since, limit))
+        start = since - since % TF_MS
+        n = min(limit or 1000, (self.now - start) // TF_MS + 1)
+        return _rows(start, int(n))
+
+
+def test_append_read_roundtrip_is_memmapped(tmp_path):
+    store = CandleStore(str(tmp_path))
+    assert store.append("ETH/USD:USD", "5m", _rows(T0, 10)) == 10
+    # recouvrement : seules les nouvelles bougies sont écrites
+    assert store.append("ETH/USD:USD", "5m", _rows(T0 + 5 * TF_MS, 10)) == 5
+    cols = store.read("ETH/USD:USD", "5m")
+    assert isinstance(cols["close"], np.memmap) or isinstance(cols["close"].base, np.memmap)
+    assert len(cols["time"]) == 15
+    assert np.all(np.diff(cols["time"]) == TF_MS)
+    sub = store.read("ETH/USD:USD", "5m", start=T0 + 2 * TF_MS, end=T0 + 4 * TF_MS)
+    assert list(sub["time"]) == [T0 + 2 * TF_MS, T0 + 3 * TF_MS, T0 + 4 * TF_MS]
+    df = store.frame("ETH/USD:USD", "5m")
+    assert list(df.columns) == ["time", "open", "high", "low", "close", "volume"]
+    assert pd.api.types.is_datetime64_any_dtype(df["time"])
+
+
+def test_gap_detection_and_out_of_order_fill(tmp_path):
+    store = CandleStore(str(tmp_path))
+    rows = _rows(T0, 20)
+    store.append("X", "5m", rows[:5] + rows[8:20])
+    assert store.gaps("X", "5m", TF_MS) == [(T0 + 5 * TF_MS, T0 + 7 * TF_MS)]
+    assert store.gaps("X", "5m", TF_MS, start=T0 - 2 * TF_MS, end=T0 + 21 * TF_MS) == [
+        (T0 - 2 * TF_MS, T0 - TF_MS),
+        (T0 + 5 * TF_MS, T0 + 7 * TF_MS),
+        (T0 + 20 * TF_MS, T0 + 21 * TF_MS),
+    ]
+    assert store.append("X", "5m", rows[5:8]) == 3
+    t = store.read("X", "5m")["time"]
+    assert np.all(np.diff(t) == TF_MS) and len(t) == 20
+
+
+def test_backfill_paginates_and_skips_forming_candle(tmp_path):
+    fx = FXHistory(now=T0 + 50 * TF_MS + 1_000)  # bougie T0+50 en formation
+    store = CandleStore(str(tmp_path))
+    added = store.backfill(fx, "X", "5m", start=T0, page=20)
+    assert added == 50
+    assert len(fx.calls) >= 3  # 50 bougies par pages de 20
+    assert all(limit == 20 for _, limit in fx.calls)
+    assert store.last_time("X", "5m") == T0 + 49 * TF_MS
+    assert store.gaps("X", "5m", TF_MS, start=T0) == []
+    # rien à refaire
+    fx.calls.clear()
+    assert store.backfill(fx, "X", "5m", start=T0) == 0
+    assert fx.calls == []
+
+
+def test_fetch_ohlcv_writes_through_closed_candles(tmp_path):
+    fx = FXHistory(now=T0 + 10 * TF_MS + 1_000)
+    store = CandleStore(str(tmp_path))
+    df = fetch_ohlcv(fx, "X", "5m", 6, store=store)
+    assert len(df) == 6
+    assert store.count("X", "5m") == 6
+    raw = fetch_ohlcv_since(fx, "X", "5m", T0, store=store)
+    assert len(raw) == 11
+    assert store.count("X", "5m") == 10  # la bougie en formation n'est pas stockée
+    assert store.gaps("X", "5m", TF_MS) == []  # la bougie en formation n'est pas stockée
+
+
+def test_feed_restart_reads_history_from_store(tmp_path):
+    fx = FXHistory(now=T0 + 200 * TF_MS + 1_000)
+    store = CandleStore(str(tmp_path))
+    CandleFeed(fx, window=50, store=store).bootstrap("X", "5m")
+    fx.calls.clear()
+
+    fx.now += TF_MS  # redémarrage une bougie plus tard
+    df = CandleFeed(fx, window=50, store=store).bootstrap("X", "5m")
+    assert len(df) == 50
+    assert df["time"].iloc[-1] == pd.to_datetime(T0 + 200 * TF_MS, unit="ms")
+    # seule la bougie manquante est demandée à l'exchange
+    assert len(fx.calls) == 1 and fx.calls[0][0] == T0 + 200 * TF_MS
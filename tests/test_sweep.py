@@ -0,0 +1,38 @@
+# path: tests/test_sweep.py
+import pytest
+
+from simulation import sweep
+from simulation.backtest import run_backtest
+from risk.strategies.trailing import TrailingSLAndTP
+
+
+def test_parameter_grid():
+    grid = sweep.parameter_grid(theta=[0.3, 0.5], atr_multiplier=[1.0, 1.5, 2.0])
+    assert len(grid) == 6
+    assert grid[0] == {"theta": 0.3, "rho": None, "atr_multiplier": 1.0}
+    assert sweep.parameter_grid() == [{"theta": None, "rho": None, "atr_multiplier": None}]
+    with pytest.raises(ValueError):
+        sweep.parameter_grid(gamma=[1.0])
+
+
+def test_sweep_on_process_pool_matches_direct_runs(synthetic_ohlcv):
+    df = synthetic_ohlcv(1500, seed=4)
+    grid = sweep.parameter_grid(theta=[0.3, 0.6], atr_multiplier=[1.0, 2.0])
+    table = sweep.run_sweep(("frames", df, None), grid, workers=2)
+    assert list(table["rank"]) == [1, 2, 3, 4]
+    assert table["total_pnl"].is_monotonic_decreasing
+    assert {"theta", "rho", "atr_multiplier", "n_trades", "sharpe", "max_drawdown"} <= set(table.columns)
+    best = table.iloc[0]
+    ref = run_backtest(df, strategy=TrailingSLAndTP(theta=best.theta, rho=1.0), atr_multiplier=best.atr_multiplier)
+    assert best["n_trades"] == ref.metrics["n_trades"]
+    assert best["total_pnl"] == pytest.approx(ref.metrics["total_pnl"])
+    # l'ATR multiplier change réellement les sorties
+    assert table.groupby("atr_multiplier")["n_trades"].sum().nunique() > 1 or table["total_pnl"].nunique() > 1
+
+
+def test_vectorized_engine_refuses_strategy_params(synthetic_ohlcv):
+    df = synthetic_ohlcv(600)
+    with pytest.raises(ValueError):
+        sweep.run_sweep(("frames", df, None), sweep.parameter_grid(theta=[0.5]), engine="vectorized")
+    table = sweep.run_sweep(("frames", df, None), sweep.parameter_grid(atr_multiplier=[1.0, 1.5]), workers=1, engine="vectorized")
+    assert len(table) == 2
@@ -0,0 +1,47 @@
+# path: tests/test_vectorized_backtest.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators.compute import compute_indicators
+from simulation.backtest import resample_ohlcv, run_backtest
+from simulation.vectorized import _align, run_vectorized_backtest
+from utils.price_utils import align_price
+
+
+def test_vectorized_matches_event_driven_engine(synthetic_ohlcv):
+    df = synthetic_ohlcv(3000, seed=1)
+    ref = run_backtest(df)
+    vec = run_vectorized_backtest(df)
+    assert len(ref.trades) > 10
+    pd.testing.assert_frame_equal(vec.trades, ref.trades, check_exact=False, rtol=1e-12)
+    np.testing.assert_allclose(vec.equity["equity"], ref.equity["equity"], rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(vec.equity["position"], ref.equity["position"])
+
+
+def test_precomputed_indicators_and_fixed_bracket(synthetic_ohlcv):
+    df = synthetic_ohlcv(2000, seed=2)
+    ind5 = compute_indicators(df, "5m")
+    ind15 = compute_indicators(resample_ohlcv(df, "15m"), "15m")
+    pd.testing.assert_frame_equal(run_vectorized_backtest(df).trades, run_vectorized_backtest(ind5, ind15).trades)
+
+    fixed = run_vectorized_backtest(ind5, ind15, trailing=False)
+    assert len(fixed.trades) > 0
+    bars = ind5.set_index("time")
+    for t in fixed.trades.itertuples():
+        # sans trailing : sortie au SL/TP initial, ou à l'ouverture si gap
+        dist = 1.5 * bars["ATR14"].loc[t.entry_time - pd.Timedelta(minutes=5)]
+        if t.side == "buy":
+            levels = {align_price(t.entry_price - dist, 0.5, "down"), align_price(t.entry_price + 2 * dist, 0.5, "up")}
+        else:
+            levels = {align_price(t.entry_price + dist, 0.5, "up"), align_price(t.entry_price - 2 * dist, 0.5, "down")}
+        assert t.exit_price in levels | {bars["open"].loc[t.exit_time]}
+
+
+@pytest.mark.parametrize("tick", [0.5, 0.01, 0.25])
+def test_array_align_matches_scalar(tick):
+    rng = np.random.default_rng(0)
+    x = np.r_[rng.uniform(1, 5000, 2000), np.arange(0, 50, tick) + tick * 1e-9]
+    for mode in ("down", "up"):
+        expected = [align_price(float(v), tick, mode=mode) for v in x]
+        np.testing.assert_array_equal(_align(x, tick, mode), expected)
@@ -1,19 +1,48 @@
 # utils/price_utils.py
+import functools
 import math
 from decimal import Decimal, getcontext, ROUND_FLOOR, ROUND_CEILING, ROUND_HALF_UP
 
-from typing import Literal
+from typing import Literal, Optional, Tuple
+
+import numpy as np
+
 getcontext().prec = 34
+# entiers représentés exactement en float64
+_EXACT_INT = 2.0 ** 53
 def compute_size(investment_usd, leverage, price):
     """Calcule la taille de position."""
     return investment_usd * leverage / price
 
-def align_price(p: float, tick: float, mode: Literal["down", "up"]) -> float:
+def _check_tick_mode(tick: float, mode: str) -> None:
     if tick <= 0:
         raise ValueError("tick must be > 0")
     if mode not in ("down", "up"):
         raise ValueError("mode must be 'down' or 'up'")
 
+
+@functools.lru_cache(maxsize=256)
+def _tick_fraction(tick: float) -> Optional[Tuple[float, float]]:
+    """
+    tick = num / den en flottants exacts (den puissance de 10), d'après
+    `str(tick)` ; None si l'un des deux ne l'est pas.
+    """
+    _, digits, exponent = Decimal(str(tick)).as_tuple()
+    if not isinstance(exponent, int):
+        return None
+    num = int("".join(map(str, digits))) * 10 ** max(exponent, 0)
+    if num >= _EXACT_INT or -exponent > 22:
+        return None
+    return float(num), 10.0 ** max(-exponent, 0)
+
+
+def _eps_units(tick: float) -> float:
+    # Epsilon absolue max(1e-12, tick*5e-7) convertie en unités de tick
+    return max(1e-12, tick * 5e-7) / tick
+
+
+def _align_index_exact(p: float, tick: float, mode: Literal["down", "up"]) -> Decimal:
+    """Multiple du tick retenu par l'alignement, en arithmétique décimale."""
     step = Decimal(str(tick))
     d = Decimal(str(p))
 
@@ -22,18 +51,150 @@ def align_price(p: float, tick: float, mode: Literal["down", "up"]) -> float:
     q_ceil = q_floor if q == q_floor else q_floor + 1
     rem = q - q_floor  # in [0,1)
 
-    # Epsilon absolue max(1e-12, tick*5e-7) convertie en unités de tick
+    # très petit, ~1e-6 de tick
     eps_abs = max(1e-12, float(step) * 5e-7)
-    eps_units = Decimal(str(eps_abs)) / step  # très petit, ~1e-6 de tick
+    eps_units = Decimal(str(eps_abs)) / step
 
     if mode == "down":
         # si on est quasi au multiple supérieur, on accepte de « snap up » seulement
         # si l'écart est < eps (sinon on reste floor)
-        n = q_ceil if (Decimal(1) - rem) <= eps_units else q_floor
-    else:  # mode == "up"
-        # si on est quasi au multiple inférieur, on « snap down » seulement si < eps
-        # (sinon on respecte la direction et on prend ceil)
-        n = q_floor if rem <= eps_units else q_ceil
-
-    res = (n * step).quantize(step, rounding=ROUND_HALF_UP)
-    return float(res)
\ No newline at end of file
+        return q_ceil if (Decimal(1) - rem) <= eps_units else q_floor
+    # mode == "up" : si on est quasi au multiple inférieur, on « snap down »
+    # seulement si < eps (sinon on respecte la direction et on prend ceil)
+    return q_floor if rem <= eps_units else q_ceil
+
+
+def _align_index_fast(p: float, tick: float, mode: str) -> Optional[int]:
+    """
+    `_align_index_exact` en flottant ; None si q ± eps (q = p / tick) est
+    trop proche d'un entier pour exclure l'erreur d'arrondi, ou non fini.
+    """
+    q = p / tick
+    if not (math.isfinite(q) and math.isfinite(tick)):
+        return None
+    if mode == "down":
+        t = q + _eps_units(tick)
+        n = math.floor(t)
+    else:
+        t = q - _eps_units(tick)
+        n = math.ceil(t)
+    # erreur relative de q (p et tick lus en décimal, division, ± eps) < 4 ulp : marge x4
+    if abs(t - round(t)) > (abs(q) + 1.0) * 2.0 ** -49:
+        return n
+    return None
+
+
+def price_to_ticks(p: float, tick: float, mode: Literal["down", "up"]) -> int:
+    """
+    Prix aligné comme par `align_price`, exprimé en nombre entier de ticks.
+    L'arithmétique décimale ne sert qu'aux cas limites.
+    """
+    _check_tick_mode(tick, mode)
+    n = _align_index_fast(p, tick, mode)
+    return int(_align_index_exact(p, tick, mode)) if n is None else n
+
+
+def ticks_to_price(n: int, tick: float) -> float:
+    """
+    Prix flottant de `n` ticks : le float le plus proche de n × `str(tick)`,
+    comme `align_price`. (n × m) / 10^k est un quotient de flottants exacts,
+    donc correctement arrondi ; décimal sinon.
+    """
+    frac = _tick_fraction(tick)
+    if frac is not None and abs(n) * frac[0] < _EXACT_INT:
+        return (n * frac[0]) / frac[1] + 0.0
+    step = Decimal(str(tick))
+    return float((Decimal(n) * step).quantize(step, rounding=ROUND_HALF_UP))
+
+
+def align_price(p: float, tick: float, mode: Literal["down", "up"]) -> float:
+    _check_tick_mode(tick, mode)
+    n = _align_index_fast(p, tick, mode)
+    if n is None:
+        step = Decimal(str(tick))
+        res = (_align_index_exact(p, tick, mode) * step).quantize(step, rounding=ROUND_HALF_UP)
+        return float(res)
+    if p == 0:
+        return float(p)  # -0.0 reste -0.0
+    return ticks_to_price(n, tick)
+
+
+def _align_index_array(flat: np.ndarray, tick: float, mode: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `_align_index_fast` sur un tableau : (multiples du tick en float64, masque
+    des éléments à recalculer exactement).
+    """
+    with np.errstate(all="ignore"):
+        q = flat / tick
+        eps_units = _eps_units(tick)
+        t = q + eps_units if mode == "down" else q - eps_units
+        n = np.floor(t) if mode == "down" else np.ceil(t)
+        # erreur relative de q (p et tick lus en décimal, division, ± eps) < 4 ulp : marge x4
+        tol = (np.abs(q) + 1.0) * 2.0 ** -49
+        slow = ~(np.abs(t - np.rint(t)) > tol)
+    return n, slow
+
+
+def prices_to_ticks(prices: np.ndarray, tick: float, mode: Literal["down", "up"]) -> np.ndarray:
+    """`price_to_ticks` sur un tableau (int64)."""
+    _check_tick_mode(tick, mode)
+    p = np.asarray(prices, dtype=np.float64)
+    flat = p.ravel()
+    if not math.isfinite(tick):
+        return np.array([price_to_ticks(float(x), tick, mode) for x in flat], dtype=np.int64).reshape(p.shape)
+    n, slow = _align_index_array(flat, float(tick), mode)
+    slow |= ~(np.abs(n) < 2.0 ** 62)
+    out = np.where(slow, 0.0, n).astype(np.int64)
+    for i in np.flatnonzero(slow):
+        out[i] = price_to_ticks(float(flat[i]), tick, mode)
+    return out.reshape(p.shape)
+
+
+def ticks_to_prices(ticks: np.ndarray, tick: float) -> np.ndarray:
+    """`ticks_to_price` sur un tableau d'entiers."""
+    n = np.asarray(ticks)
+    flat = n.ravel()
+    frac = _tick_fraction(tick) if math.isfinite(tick) else None
+    if frac is None:
+        return np.array([ticks_to_price(int(x), tick) for x in flat], dtype=np.float64).reshape(n.shape)
+    num, den = frac
+    nf = flat.astype(np.float64)
+    n_num = nf * num
+    # + 0.0 : 0 tick donne 0.0, jamais -0.0
+    out = n_num / den + 0.0
+    for i in np.flatnonzero(~(np.abs(n_num) < _EXACT_INT)):
+        out[i] = ticks_to_price(int(flat[i]), tick)
+    return out.reshape(n.shape)
+
+
+def align_prices(prices: np.ndarray, tick: float, mode: Literal["down", "up"]) -> np.ndarray:
+    """
+    `align_price` sur un tableau : mêmes résultats au bit près, en float64.
+
+    Le multiple retenu est floor(q + eps) ("down") ou ceil(q - eps) ("up"),
+    q = p / tick. Les éléments dont q ± eps est trop proche d'un entier pour
+    exclure l'erreur d'arrondi flottante (un prix déjà aligné en est à eps :
+    ils sont rares) sont recalculés par `align_price`, de même que les
+    non-finis. Avec tick = m / 10^k (écriture décimale de `str(tick)`),
+    n * tick est calculé comme (n * m) / 10^k : quotient de deux flottants
+    exacts, donc correctement arrondi comme le `float(Decimal)` scalaire.
+    """
+    _check_tick_mode(tick, mode)
+    p = np.asarray(prices, dtype=np.float64)
+    flat = p.ravel()
+    frac = _tick_fraction(tick) if math.isfinite(tick) else None
+    if frac is None:
+        return np.array([align_price(float(x), tick, mode) for x in flat]).reshape(p.shape)
+    num, den = frac
+    tick = float(tick)
+    n, slow = _align_index_array(flat, tick, mode)
+    with np.errstate(all="ignore"):
+        n_num = n * num
+        # + 0.0 : ceil(-0.3) vaut -0.0 là où le scalaire donne 0.0
+        out = n_num / den + 0.0
+    slow |= ~(np.abs(n_num) < _EXACT_INT)
+    # seul -0.0 donne -0.0
+    out = np.where(flat == 0, flat, out)
+    for i in np.flatnonzero(slow):
+        out[i] = align_price(float(flat[i]), tick, mode)
+    return out.reshape(p.shape)